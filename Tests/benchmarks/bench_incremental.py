@@ -0,0 +1,86 @@
+# Incremental build (compile(artifacts=False , incremental=True)) against a full release build
+# of a generated program, after editing one function: the edited declaration is
+# compiled again and the others come from the cache. output.txt must match.
+# usage (from the project root): python3 Tests/benchmarks/bench_incremental.py [--functions 400] [--repeat 5]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from bench_memory import FUNCTION , MAIN , compile_once
+from code_gen.incremental import compile_declarations
+from scanner.scanner import load_automaton
+
+
+def write_source(path , functions , edited , edit):
+    with open(path , "w" , encoding="utf-8") as f :
+        for i in range(functions) :
+            text = FUNCTION.format(i=i)
+            if i == edited :
+                text = text.replace("s = 0;" , f"s = {edit};")
+            f.write(text)
+        f.write(MAIN)
+
+
+def full(path):
+    compile_once(path , "compiled" , "buffered" , artifacts=False)
+    with open("output.txt") as f :
+        return f.read()
+
+
+def incremental(path , dfa):
+    codeGen = compile_declarations(path , "incremental_cache.bin" , dfa)
+    codeGen.set_exec_block("main")
+    codeGen.export(file_path="output.txt")
+    with open("output.txt") as f :
+        return f.read()
+
+
+def timed(run):
+    start = time.perf_counter()
+    result = run()
+    return time.perf_counter() - start , result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--functions" , type=int , default=400)
+    ap.add_argument("--repeat" , type=int , default=5)
+    args = ap.parse_args()
+    dfa = load_automaton()
+    cwd = os.getcwd()
+    times = {"full" : [] , "cold" : [] , "edit" : []}
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            path = os.path.join(tmp , "input.txt")
+            edited = args.functions // 2
+            write_source(path , args.functions , edited , 0)
+            full(path)  # warm caches (automaton, grammar, imports)
+            for n in range(args.repeat) :
+                if os.path.exists("incremental_cache.bin") :
+                    os.remove("incremental_cache.bin")
+                write_source(path , args.functions , edited , 0)
+                elapsed , _ = timed(lambda : incremental(path , dfa))
+                times["cold"].append(elapsed)
+                write_source(path , args.functions , edited , n + 1)
+                elapsed , result = timed(lambda : incremental(path , dfa))
+                times["edit"].append(elapsed)
+                elapsed , expected = timed(lambda : full(path))
+                times["full"].append(elapsed)
+                if result != expected :
+                    print("incremental output.txt differs from the full build")
+                    sys.exit(1)
+        finally :
+            os.chdir(cwd)
+    print(f"{args.functions} functions , one edited")
+    for name , label in (("full" , "full build") , ("cold" , "incremental, no cache") , ("edit" , "incremental, one edit")) :
+        print(f"{label:>22}: {min(times[name]) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Peak memory and allocation count of a full compile (scan, parse, code generation)
+# on a generated program. Artifacts go to a temporary directory.
+# usage (from the project root): python3 Tests/benchmarks/bench_memory.py [--functions 120] [--release] [--no-tree]
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from parser.parser import Parser
+from parser.syntax_errors import SyntaxErrors
+from scanner.scanner import load_automaton , open_source
+from scanner.lexical_errors import LexicalErrors
+from scanner.symbol_table import SymbolTable
+from scanner.tokens import Tokens
+from code_gen.codeGen import CodeGen
+
+GRAMMAR_DIR = os.path.join(ROOT , "parser" , "grammar_config")
+
+FUNCTION = """int f{i}(int a , int b[]){{
+    int s; int k;
+    s = 0; k = 0;
+    /* a comment that the scanner skips */
+    while (k < a) {{
+        s = s + b[k] * {i} - 1;
+        if (s == 1000) {{ break; }} else {{ k = k + 1; }}
+    }}
+    return s;
+}}
+"""
+
+MAIN = """void main(void){
+    int arr[4]; int r;
+    arr[0] = 1; arr[1] = 2; arr[2] = 3; arr[3] = 4;
+    r = f0(4 , arr);
+    output(r);
+}
+"""
+
+
+def make_source(path , functions):
+    with open(path , "w" , encoding="utf-8") as f :
+        for i in range(functions) :
+            f.write(FUNCTION.format(i=i))
+        f.write(MAIN)
+
+
+def compile_once(path , scanner_mode , source_reader , artifacts=True , parse_tree=True , pipeline=None):
+    lexical_errors = LexicalErrors(file_path="lexical_errors.txt")
+    buffer = open_source(path , scanner_mode , source_reader , pipeline=pipeline)
+    tokens = Tokens("tokens.txt") if artifacts else None
+    symbol_table = SymbolTable(file_path="symbol_table.txt")
+    dfa = load_automaton(scanner_mode)
+    codeGen = CodeGen(symbol_table=symbol_table)
+    P = Parser(buffer=buffer , dfa=dfa , lexical_errors=lexical_errors , tokens=tokens , symbol_table=symbol_table ,
+               syntax_errors=SyntaxErrors() , codeGen=codeGen ,
+               grammar_path=os.path.join(GRAMMAR_DIR , "grammar.txt") ,
+               follow_path=os.path.join(GRAMMAR_DIR , "follow.txt") ,
+               first_path=os.path.join(GRAMMAR_DIR , "first.txt") , build_tree=artifacts and parse_tree)
+    P.start()
+    buffer.close()
+    lexical_errors.update_file()
+    if artifacts : 
+        tokens.update_file()
+    P.codeGen.set_exec_block("main")
+    P.codeGen.export(file_path="output.txt")
+    return P
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--functions" , type=int , default=120)
+    ap.add_argument("--mode" , default="compiled")
+    ap.add_argument("--reader" , default="buffered")
+    ap.add_argument("--release" , action="store_true" , help="compile with artifacts=False")
+    ap.add_argument("--no-tree" , action="store_true" , help="compile with parse_tree=False")
+    args = ap.parse_args()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            path = os.path.join(tmp , "input.txt")
+            make_source(path , args.functions)
+            compile_once(path , args.mode , args.reader , not args.release , not args.no_tree)  # warm caches (automaton, imports)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            P = compile_once(path , args.mode , args.reader , not args.release , not args.no_tree)
+            elapsed = time.perf_counter() - start
+            # taken while the parser (tokens, symbol table, parse tree) is still alive
+            current , peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+            size = os.path.getsize(path)
+        finally :
+            os.chdir(cwd)
+
+    print(f"source: {size / 1024:.1f} KiB")
+    print(f"time (traced): {elapsed:.3f} s")
+    print(f"peak traced memory: {peak / 1024:.1f} KiB")
+    print(f"retained: {current / 1024:.1f} KiB in {blocks} blocks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Memory of the arena parse tree (ParseTree) against one PtNode object per node,
+# for the tree of a generated program. Both trees are copies of the one the
+# parser built, made under tracemalloc, and must render the same lines.
+# usage (from the project root): python3 Tests/benchmarks/bench_parse_tree.py [--functions 400]
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from bench_memory import make_source , compile_once
+from parser.parser import PtNode
+from parser.parse_tree import ParseTree
+
+
+def copy_ptnodes(tree):
+    root = PtNode(tree.text(ParseTree.ROOT))
+    stack = [(ParseTree.ROOT , root)]
+    while stack :
+        node , copy = stack.pop()
+        for child in tree.children(node) :
+            child_copy = PtNode(tree.text(child))
+            copy.add_children(child_copy)
+            stack.append((child , child_copy))
+    return root
+
+
+def copy_arena(tree):
+    arena = ParseTree(tree.text(ParseTree.ROOT))
+    stack = [(ParseTree.ROOT , ParseTree.ROOT)]
+    while stack :
+        node , copy = stack.pop()
+        for child in tree.children(node) :
+            stack.append((child , arena.add_child(copy , tree.text(child))))
+    return arena
+
+
+def measure(name , make , tree):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    copy = make(tree)
+    elapsed = time.perf_counter() - start
+    current , peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - start
+    print(f"{name:>7}: {current / 1024:.1f} KiB ({current / len(tree):.1f} B/node) , built in {elapsed * 1000:.1f} ms , gc.collect {collect * 1000:.1f} ms")
+    return copy
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--functions" , type=int , default=400)
+    args = ap.parse_args()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            path = os.path.join(tmp , "input.txt")
+            make_source(path , args.functions)
+            tree = compile_once(path , "compiled" , "buffered").parse_tree
+        finally :
+            os.chdir(cwd)
+    print(f"{len(tree)} nodes , {len(tree.labels)} distinct labels")
+    ptnodes = measure("PtNode" , copy_ptnodes , tree)
+    ptnode_lines = list(ptnodes.iter_lines())
+    del ptnodes
+    arena = measure("arena" , copy_arena , tree)
+    if list(arena.iter_lines()) != ptnode_lines :
+        print("rendered trees differ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Parser cost per token on deeply nested and on long flat expressions
+# (no parse tree, so only the parsing decisions and code generation are timed),
+# for the generated parser and the diagram interpreter.
+# usage (from the project root): python3 Tests/benchmarks/bench_parser.py [--depth 1000] [--terms 3000] [--mode both] [--startup] [--profile DIR]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from parser.parser import Parser
+from parser.syntax_errors import SyntaxErrors
+from parser.parse_profile import ParseProfile
+from scanner.scanner import load_automaton , open_source
+from scanner.lexical_errors import LexicalErrors
+from scanner.symbol_table import SymbolTable
+from scanner.tokens import Tokens
+from code_gen.codeGen import CodeGen
+from parser.grammar import CompiledGrammar
+from parser.grammar_cache import load_compiled_grammar , GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH , LOADED
+
+GRAMMAR_DIR = os.path.join(ROOT , "parser" , "grammar_config")
+
+
+def nested(depth):
+    return "void main(void){ int a; a = " + "(" * depth + "a + 1" + ")" * depth + "; output(a); }\n"
+
+
+def flat(terms):
+    return "void main(void){ int a; a = " + " + ".join(["a * 2"] * terms) + "; output(a); }\n"
+
+
+def parse(path , profile=None , mode="generated"):
+    lexical_errors = LexicalErrors(file_path="lexical_errors.txt")
+    buffer = open_source(path)
+    tokens = Tokens("tokens.txt")
+    symbol_table = SymbolTable(file_path="symbol_table.txt")
+    P = Parser(buffer=buffer , dfa=load_automaton() , lexical_errors=lexical_errors , tokens=tokens , symbol_table=symbol_table ,
+               syntax_errors=SyntaxErrors() , codeGen=CodeGen(symbol_table=symbol_table) ,
+               grammar_path=os.path.join(GRAMMAR_DIR , "grammar.txt") ,
+               follow_path=os.path.join(GRAMMAR_DIR , "follow.txt") ,
+               first_path=os.path.join(GRAMMAR_DIR , "first.txt") , build_tree=False , profile=profile , parser_mode=mode)
+    start = time.perf_counter()
+    P.start()
+    elapsed = time.perf_counter() - start
+    buffer.close()
+    tokens.update_file()
+    lexical_errors.update_file()
+    return tokens.count , elapsed
+
+
+def startup(repeat=100):
+    for name , load in (("build" , lambda : CompiledGrammar(GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH)) , ("cached" , lambda : (LOADED.clear() , load_compiled_grammar()))):
+        load()
+        start = time.perf_counter()
+        for _ in range(repeat) :
+            load()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name:>7}: {elapsed * 1000:.2f} ms per grammar")
+
+
+def run(args):
+    modes = ("diagrams" , "generated") if args.mode == "both" else (args.mode ,)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            for name , source in (("nested" , nested(args.depth)) , ("flat" , flat(args.terms))) :
+                path = os.path.join(tmp , "input.txt")
+                with open(path , "w") as f :
+                    f.write(source)
+                for mode in modes :
+                    parse(path , mode=mode)
+                    # with --profile every run is instrumented, and the profile of the last one is kept
+                    profiles = [ParseProfile() if args.profile else None for _ in range(args.repeat)]
+                    best = min(parse(path , profile , mode) for profile in profiles)
+                    count , elapsed = best[0] , best[1]
+                    print(f"{name:>7} {mode:>9}: {count} tokens in {elapsed * 1000:.1f} ms ({elapsed / count * 1e6:.2f} us/token)")
+                    if args.profile :
+                        profiles[-1].export(os.path.join(args.profile , f"profile_{name}_{mode}.json"))
+        finally :
+            os.chdir(cwd)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--depth" , type=int , default=1000)
+    ap.add_argument("--terms" , type=int , default=3000)
+    ap.add_argument("--repeat" , type=int , default=3)
+    ap.add_argument("--mode" , choices=("both" , "generated" , "diagrams") , default="both" , help="parser to time (Parser(parser_mode=...))")
+    ap.add_argument("--profile" , metavar="DIR" , help="parse with a ParseProfile and write profile_<case>_<mode>.json to DIR")
+    ap.add_argument("--startup" , action="store_true" , help="only time grammar construction vs the cached artifact")
+    args = ap.parse_args()
+    if args.profile :
+        args.profile = os.path.abspath(args.profile)
+    if args.startup :
+        startup()
+        return
+    # the parser keeps its own stack: no recursion limit or thread stack to raise
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
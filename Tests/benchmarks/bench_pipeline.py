@@ -0,0 +1,56 @@
+# Release build of a generated program with scanning interleaved in the parser
+# (serial) and with the scanner on a producer thread / process feeding token
+# batches through a bounded queue (compile(lex_pipeline=...)). All runs must
+# write the same output.txt and lexical_errors.txt. The overlap only pays off
+# with a second core for the producer.
+# usage (from the project root): python3 Tests/benchmarks/bench_pipeline.py [--functions 2000] [--mode compiled] [--repeat 3]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from bench_memory import make_source , compile_once
+
+
+def artifacts():
+    with open("output.txt") as f , open("lexical_errors.txt") as g :
+        return f.read() , g.read()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--functions" , type=int , default=2000)
+    ap.add_argument("--mode" , default="compiled" , choices=("compiled" , "dfa" , "slice"))
+    ap.add_argument("--repeat" , type=int , default=3)
+    args = ap.parse_args()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            path = os.path.join(tmp , "input.txt")
+            make_source(path , args.functions)
+            print(f"{os.path.getsize(path) / 1e6:.2f} MB source , {os.cpu_count()} cpus")
+            expected = None
+            for pipeline in (None , "thread" , "process") :
+                times = []
+                for _ in range(args.repeat) :
+                    start = time.perf_counter()
+                    compile_once(path , args.mode , "buffered" , artifacts=False , pipeline=pipeline)
+                    times.append(time.perf_counter() - start)
+                    result = artifacts()
+                    if expected is None :
+                        expected = result
+                    elif result != expected :
+                        print(f"{pipeline}: artifacts differ from the serial build")
+                        sys.exit(1)
+                print(f"{pipeline or 'serial':>8}: {min(times) * 1000:.1f} ms")
+        finally :
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
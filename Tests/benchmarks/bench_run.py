@@ -0,0 +1,70 @@
+# Compile and run through files (compile() writes output.txt, execute.exec
+# reads it and runs the tester's VM) against compile_and_run() in memory
+# (program_block decoded once into the VM, output captured), on the tester's
+# test cases. Both must print the same.
+# usage (from the project root): python3 Tests/benchmarks/bench_run.py [--repeat 5]
+import argparse
+import contextlib
+import glob
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import compile
+from execute import exec
+from compile_and_exec import compile_and_run
+
+CASES = os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "*" , "input.txt")
+
+
+def through_files(path):
+    # exec leaves expected.txt alone when the code was not generated
+    if os.path.exists("expected.txt") :
+        os.remove("expected.txt")
+    with contextlib.redirect_stdout(io.StringIO()) :
+        compile(code_file_path=path)
+        exec()
+    if not os.path.exists("expected.txt") :
+        return ""
+    with open("expected.txt") as f :
+        return f.read()
+
+
+def in_memory(path):
+    with open(path) as f :
+        return compile_and_run(f.read()).output
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat" , type=int , default=5)
+    args = ap.parse_args()
+    paths = sorted(glob.glob(CASES))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            for path in paths :
+                if through_files(path) != in_memory(path) :
+                    print(f"{path}: outputs differ")
+                    sys.exit(1)
+            for name , run in (("files" , through_files) , ("memory" , in_memory)) :
+                best = None
+                for _ in range(args.repeat) :
+                    start = time.perf_counter()
+                    for path in paths :
+                        run(path)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best , elapsed)
+                print(f"{name:>6}: {len(paths)} programs in {best * 1000:.1f} ms ({best / len(paths) * 1000:.2f} ms each)")
+        finally :
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
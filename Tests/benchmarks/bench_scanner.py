@@ -0,0 +1,109 @@
+# Scanner throughput on a generated multi-megabyte source.
+# usage (from the project root): python3 Tests/benchmarks/bench_scanner.py [--size-mb 4] [--startup] [--states] [--workers N]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0 , os.path.abspath(os.path.join(os.path.dirname(__file__) , "..", "..")))
+
+from scanner.dfa_cache import load_compiled_dfa
+from scanner.get_next_token import iter_tokens
+from scanner.compiled_dfa import CompiledDFA
+from scanner.init_dfa import build_dfa , init_dfa , init_compiled_dfa
+from scanner.lexical_errors import LexicalErrors
+from scanner.scanner import load_automaton , open_source
+from scanner.symbol_table import SymbolTable
+from scanner.tokens import Tokens
+
+SNIPPET = """/* computes the sum of a list */
+int sum(int arr[] , int n){
+    int i; int s;
+    i = 0; s = 0;
+    while (i < n) {
+        s = s + arr[i] * 2 - 1;
+        if (s == 100000) { break; } else { i = i + 1; }
+    }
+    return s;
+}
+"""
+
+
+def make_source(path , size_mb):
+    target = int(size_mb * 1024 * 1024)
+    with open(path , "w" , encoding="utf-8") as f :
+        written = 0
+        while written < target :
+            f.write(SNIPPET)
+            written += len(SNIPPET)
+
+
+def scan(path , scanner_mode , source_reader , out_dir , workers=1):
+    dfa = load_automaton(scanner_mode)
+    buffer = open_source(path , scanner_mode , source_reader , workers)
+    lexical_errors = LexicalErrors(file_path=os.path.join(out_dir , "lexical_errors.txt"))
+    tokens = Tokens(os.path.join(out_dir , "tokens.txt"))
+    symbol_table = SymbolTable(file_path=os.path.join(out_dir , "symbol_table.txt"))
+    count = 0
+    start = time.perf_counter()
+    for tok in iter_tokens(buffer=buffer , dfa=dfa , lexical_errors=lexical_errors ,
+                           tokens=tokens , symbol_table=symbol_table):
+        if tok[0]!="WHITE" :
+            count += 1
+    elapsed = time.perf_counter() - start
+    buffer.close()
+    return count , elapsed
+
+
+def states():
+    # automaton size before and after minimization
+    for name , dfa in (("built" , build_dfa()) , ("minimized" , init_dfa())):
+        compiled = CompiledDFA.from_dfa(dfa)
+        print(f"{name:>10}: {dfa.num_nodes} states , {compiled.num_classes} char classes , {len(compiled.table)} table entries")
+
+
+def startup(repeat=200):
+    for name , build in (("build_dfa" , build_dfa) , ("init_dfa" , init_dfa) , ("compiled" , init_compiled_dfa) , ("cached" , load_compiled_dfa)):
+        build()
+        start = time.perf_counter()
+        for _ in range(repeat) :
+            build()
+        elapsed = (time.perf_counter() - start) / repeat
+        print(f"{name:>10}: {elapsed * 1e6:.0f} us per automaton")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--size-mb" , type=float , default=4)
+    arg_parser.add_argument("--startup" , action="store_true" , help="only time automaton construction/loading")
+    arg_parser.add_argument("--workers" , type=int , default=1 , help="also time parallel lexing with this many processes")
+    arg_parser.add_argument("--states" , action="store_true" , help="only report automaton size before/after minimization")
+    args = arg_parser.parse_args()
+    if args.states :
+        states()
+        return
+    if args.startup :
+        startup()
+        return
+
+    with tempfile.TemporaryDirectory() as tmp :
+        path = os.path.join(tmp , "input.txt")
+        make_source(path , args.size_mb)
+        size = os.path.getsize(path) / (1024 * 1024)
+        print(f"source: {size:.2f} MB")
+        results = {}
+        for name in ("dfa" , "compiled" , "compiled:mmap" , "slice" , "slice:mmap"):
+            scanner_mode , _ , source_reader = name.partition(":")
+            count , elapsed = scan(path , scanner_mode , source_reader or "buffered" , tmp)
+            results[name] = elapsed
+            print(f"{name:>13}: {count} tokens in {elapsed:.2f}s ({size / elapsed:.2f} MB/s , {results['dfa'] / elapsed:.2f}x)")
+        if args.workers > 1 :
+            for scanner_mode in ("compiled" , "slice") :
+                name = f"{scanner_mode} x{args.workers}"
+                count , elapsed = scan(path , scanner_mode , "buffered" , tmp , args.workers)
+                print(f"{name:>13}: {count} tokens in {elapsed:.2f}s ({size / elapsed:.2f} MB/s , {results['dfa'] / elapsed:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Per-compile latency: a new `python3 compiler.py` process per input against
+# requests to a warm compile server (compile_server.py --stdio). Both must
+# produce the same output.txt.
+# usage (from the project root): python3 Tests/benchmarks/bench_server.py [--input Tests/phase3_tester/test/testcases/T1/input.txt] [--repeat 10] [--workers 1]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+
+
+def cold(source , repeat):
+    times = []
+    with tempfile.TemporaryDirectory() as tmp :
+        with open(os.path.join(tmp , "input.txt") , "w" , encoding="utf-8") as f :
+            f.write(source)
+        for _ in range(repeat) :
+            start = time.perf_counter()
+            subprocess.run([sys.executable , os.path.join(ROOT , "compiler.py")] , cwd=tmp , check=True , capture_output=True)
+            times.append(time.perf_counter() - start)
+        with open(os.path.join(tmp , "output.txt")) as f :
+            return times , f.read()
+
+
+def warm(source , repeat , workers):
+    server = subprocess.Popen([sys.executable , os.path.join(ROOT , "compile_server.py") , "--stdio" , "--workers" , str(workers)] ,
+                              stdin=subprocess.PIPE , stdout=subprocess.PIPE , text=True)
+    times = []
+    try :
+        for n in range(repeat + 1) :
+            start = time.perf_counter()
+            server.stdin.write(json.dumps({"id" : n , "source" : source}) + "\n")
+            server.stdin.flush()
+            response = json.loads(server.stdout.readline())
+            # the first request also pays for forking the worker
+            if n :
+                times.append(time.perf_counter() - start)
+    finally :
+        server.stdin.close()
+        server.wait()
+    return times , response["artifacts"]["output.txt"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input" , default=os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "T1" , "input.txt"))
+    ap.add_argument("--repeat" , type=int , default=10)
+    ap.add_argument("--workers" , type=int , default=1)
+    args = ap.parse_args()
+    with open(args.input , encoding="utf-8") as f :
+        source = f.read()
+    cold_times , expected = cold(source , args.repeat)
+    warm_times , result = warm(source , args.repeat , args.workers)
+    if result != expected :
+        print("server output.txt differs from compiler.py")
+        sys.exit(1)
+    for name , times in (("process per compile" , cold_times) , ("compile server" , warm_times)) :
+        print(f"{name:>20}: {min(times) * 1000:.1f} ms min , {sorted(times)[len(times) // 2] * 1000:.1f} ms median")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Start-up cost of the command line entry points: the import time of each
+# module over a bare interpreter, and a whole `compile_and_exec.py -i` run.
+# Also checks that importing them has no side effects (no file appears in the
+# working directory) and that compile_and_exec.py compiles and executes once.
+# usage (from the project root): python3 Tests/benchmarks/bench_startup.py [--input Tests/phase3_tester/test/testcases/T1/input.txt] [--repeat 20]
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+
+MODULES = ("execute" , "compile_and_exec" , "compiler" , "compile_batch" , "compile_server")
+
+# compile_and_exec.py as __main__, with compile() and exec() counted
+COUNT_CALLS = """
+import runpy , sys
+import compiler , execute
+calls = {"compile" : 0 , "exec" : 0}
+def counted(name , function):
+    def call(*args , **kwargs):
+        calls[name] += 1
+        return function(*args , **kwargs)
+    return call
+compiler.compile = counted("compile" , compiler.compile)
+execute.exec = counted("exec" , execute.exec)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0] , run_name="__main__")
+print(calls["compile"] , calls["exec"] , file=sys.stderr)
+"""
+
+
+def best(command , cwd , repeat , env):
+    times = []
+    for _ in range(repeat) :
+        start = time.perf_counter()
+        subprocess.run(command , cwd=cwd , env=env , check=True , capture_output=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input" , default=os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "T1" , "input.txt"))
+    ap.add_argument("--repeat" , type=int , default=20)
+    args = ap.parse_args()
+    env = dict(os.environ , PYTHONPATH=ROOT)
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp :
+        # the project files are imported from ROOT, nothing should be written to tmp
+        base = best([sys.executable , "-c" , "pass"] , tmp , args.repeat , env)
+        print(f"{'interpreter':>24}: {base * 1000:6.1f} ms")
+        for module in MODULES :
+            elapsed = best([sys.executable , "-c" , f"import {module}"] , tmp , args.repeat , env)
+            print(f"{'import ' + module:>24}: {elapsed * 1000:6.1f} ms (+{(elapsed - base) * 1000:.1f} ms)")
+        if os.listdir(tmp) :
+            print(f"importing wrote {sorted(os.listdir(tmp))}")
+            failed = True
+
+        script = os.path.join(ROOT , "compile_and_exec.py")
+        elapsed = best([sys.executable , script , "--help"] , tmp , args.repeat , env)
+        print(f"{'compile_and_exec --help':>24}: {elapsed * 1000:6.1f} ms (+{(elapsed - base) * 1000:.1f} ms)")
+        elapsed = best([sys.executable , script , "-i" , args.input] , tmp , args.repeat , env)
+        print(f"{'compile_and_exec -i':>24}: {elapsed * 1000:6.1f} ms")
+
+        counts = subprocess.run([sys.executable , "-c" , COUNT_CALLS , script , "-i" , args.input] ,
+                                cwd=tmp , env=env , check=True , capture_output=True , text=True).stderr.split()[-2:]
+        print(f"compile_and_exec -i: {counts[0]} compile, {counts[1]} exec")
+        if counts != ["1" , "1"] :
+            failed = True
+    if failed :
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
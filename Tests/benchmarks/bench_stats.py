@@ -0,0 +1,54 @@
+# compile(stats_path=...) on generated programs of growing size: one line of
+# per-phase times per size, and all the statistics as JSON with --json, to
+# compare compile cost between releases and input sizes.
+# usage (from the project root): python3 Tests/benchmarks/bench_stats.py [--functions 10 100 1000] [--no-memory] [--json stats.json]
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+sys.path.insert(0 , os.path.dirname(os.path.abspath(__file__)))
+
+from compiler import compile
+from bench_memory import make_source
+
+PHASES = ("setup" , "parse" , "code_generation" , "artifacts")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--functions" , type=int , nargs="+" , default=[10 , 100 , 1000])
+    ap.add_argument("--no-memory" , action="store_true" , help="no tracemalloc peaks (and no tracemalloc slowdown)")
+    ap.add_argument("--json" , metavar="PATH" , help="write {functions: statistics} to PATH")
+    args = ap.parse_args()
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            make_source("input.txt" , 1)
+            compile(stats_path="stats.json")  # warm caches (automaton, grammar, generated parser)
+            for functions in args.functions :
+                make_source("input.txt" , functions)
+                compile(stats_path="stats.json" , stats_memory=not args.no_memory)
+                with open("stats.json" , encoding="utf-8") as f :
+                    stats = results[functions] = json.load(f)
+                parts = stats["phases"]["parse"]["parts"]
+                total = stats["total"]
+                times = " ".join(f"{phase}={stats['phases'][phase]['wall'] * 1000:.1f}" for phase in PHASES)
+                memory = f" peak={total['peak_memory'] / 1024:.0f}KiB" if "peak_memory" in total else ""
+                print(f"{functions:>6} functions: {total['tokens']} tokens, {total['instructions']} instructions, "
+                      f"stack {total['semantic_stack_high_water']}{memory}; ms: {times} "
+                      f"(lexing={parts['lexing']['wall'] * 1000:.1f} actions={parts['semantic_actions']['wall'] * 1000:.1f} parsing={parts['parsing']['wall'] * 1000:.1f})")
+        finally :
+            os.chdir(cwd)
+    if args.json :
+        with open(args.json , "w" , encoding="utf-8") as f :
+            json.dump(results , f , indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Symbol table lookup cost as the number of globals/functions grows.
+# usage (from the project root): python3 Tests/benchmarks/bench_symbol_table.py
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0 , os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , "..")))
+
+from scanner.symbol_table import SymbolTable
+
+
+def build(n):
+    # n globals and n functions in the global scope, then two nested scopes
+    table = SymbolTable()
+    address = 20000
+    for i in range(n) :
+        for lexeme , is_function in ((f"g{i}" , False) , (f"f{i}" , True)) :
+            table.add(["ID" , lexeme])
+            record = table.find_record_by_id(lexeme)
+            if is_function :
+                record.address = i
+                record.is_function = True
+            else :
+                record.address = address
+                address += 4
+    table.add_scope()
+    table.add(["ID" , "local"])
+    table.add_scope()
+    return table
+
+
+def per_lookup(fn , keys):
+    start = time.perf_counter()
+    for k in keys :
+        fn(k)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main():
+    random.seed(0)
+    print(f"{'n':>7} {'by id (us)':>11} {'by address (us)':>16} {'last function (us)':>19}")
+    for n in (250 , 1000 , 4000 , 16000) :
+        table = build(n)
+        ids = [f"g{random.randrange(n)}" for _ in range(20000)]
+        addresses = [20000 + 4 * random.randrange(n) for _ in range(20000)]
+        by_id = per_lookup(table.find_record_by_id , ids)
+        by_address = per_lookup(table.get_record_by_address , addresses)
+        last = per_lookup(lambda _ : table.get_last_function_record() , range(20000))
+        print(f"{n:>7} {by_id:>11.3f} {by_address:>16.3f} {last:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# Incremental builds (compile(artifacts=False , incremental=True)) against full builds over
+# chains of edits of the tester's programs, some fixed and the rest random: whole declarations added,
+# removed and moved (also at the very start of the source), blank lines and
+# comments, statements, globals and single characters. After every edit
+# output.txt and semantic_errors.txt of both builds must be the same; exits 1
+# and prints the failing chain otherwise.
+# usage (from the project root): python3 Tests/benchmarks/stress_incremental.py [--chains 40] [--edits 12] [--seed 1]
+import argparse
+import contextlib
+import glob
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import compile
+
+CASES = os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "*" , "input.txt")
+SNIPPETS = ["int g;\n" , "int ga[3];\n" , "void f2(void){ q2 = 1; }\n" , "int h(int x){ return x + 1; }\n" , "\n" , "/* c */\n"]
+STATEMENTS = ["\n int q; q = 3;" , "\n output(7);" , "\n return;" , "\n zz = 1;"]
+
+
+# edit chains that once went wrong: a declaration removed so that only blank
+# lines and comments are left before the next one, then text inserted there
+A = "\nint a;\n\n/* c */\nint b;\nvoid main(void){ b = 2; output(b); }\n"
+B = A.replace("int a;\n" , "" , 1)
+FUNCTION = "void f0(void){ output(1); }\n"
+
+
+def directed_chains(sources):
+    yield [A , B , B[:1] + "int qqq;\n" + B[1:]]
+    with open(os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "R4" , "input.txt")) as f :
+        r4 = f.read()
+    yield [r4 , FUNCTION + r4 , r4 , "void f2(void){ q2 = 1; }\n" + r4]
+    for source in sources :
+        yield [source , FUNCTION + source , source , source[:1] + "\nint qqq;\n" + source[1:]]
+
+
+def declarations(text):
+    return [m.start() for m in re.finditer(r"(?m)^(int|void) " , text)] + [len(text)]
+
+
+def edit(text , rnd):
+    kind = rnd.randrange(7)
+    starts = declarations(text)
+    if kind==0 :
+        # a snippet in the text before the first declaration, or at the start of one
+        at = rnd.choice([rnd.randint(0 , starts[0])] * 3 + starts)
+        return text[:at] + rnd.choice(SNIPPETS) + text[at:]
+    if kind in (1 , 2) and len(starts) > 2 :
+        n = rnd.randrange(len(starts) - 1)
+        a , b = starts[n] , starts[n + 1]
+        if kind==1 :
+            if rnd.randrange(2) :
+                # keep the blank lines and comments that follow the declaration
+                end = max(text.rfind(";" , a , b) , text.rfind("}" , a , b)) + 1
+                newline = text.find("\n" , end , b)
+                b = newline + 1 if end > 0 and newline >= 0 else b
+            return text[:a] + text[b:]
+        rest = text[:a] + text[b:]
+        at = rnd.choice(declarations(rest))
+        return rest[:at] + text[a:b] + rest[at:]
+    if kind==3 :
+        at = rnd.randrange(len(text) + 1)
+        return text[:at] + rnd.choice(["\n" , " " , "\n\n" , "/* c */"]) + text[at:]
+    if kind==4 :
+        bodies = [m.end() for m in re.finditer(r"\)\s*\{" , text)]
+        if bodies :
+            at = rnd.choice(bodies)
+            return text[:at] + rnd.choice(STATEMENTS) + text[at:]
+    if kind==5 :
+        numbers = [m.span() for m in re.finditer(r"\b\d+\b" , text)]
+        if numbers :
+            a , b = rnd.choice(numbers)
+            return text[:a] + str(rnd.randrange(30)) + text[b:]
+    if text :
+        at = rnd.randrange(len(text))
+        return text[:at] + text[at + 1:]
+    return text
+
+
+def build(text , incremental):
+    with open("input.txt" , "w" , encoding="utf-8") as f :
+        f.write(text)
+    for name in ("output.txt" , "semantic_errors.txt") :
+        if os.path.exists(name) :
+            os.remove(name)
+    try :
+        with contextlib.redirect_stdout(io.StringIO()) :
+            compile(artifacts=False , incremental=incremental)
+    except Exception as error :
+        return type(error).__name__
+    with open("output.txt") as f , open("semantic_errors.txt") as g :
+        return f.read() , g.read()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--chains" , type=int , default=40)
+    ap.add_argument("--edits" , type=int , default=12)
+    ap.add_argument("--seed" , type=int , default=1)
+    args = ap.parse_args()
+    rnd = random.Random(args.seed)
+    sources = []
+    for path in sorted(glob.glob(CASES)) :
+        with open(path) as f :
+            sources.append(f.read())
+    cwd = os.getcwd()
+    builds = 0
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            chains = list(directed_chains(sources))
+            for _ in range(args.chains) :
+                texts = [rnd.choice(sources)]
+                for _ in range(args.edits) :
+                    texts.append(edit(texts[-1] , rnd))
+                chains.append(texts)
+            for chain , texts in enumerate(chains) :
+                if os.path.exists("incremental_cache.bin") :
+                    os.remove("incremental_cache.bin")
+                for step , text in enumerate(texts) :
+                    builds += 1
+                    if build(text , True) != build(text , False) :
+                        print(f"chain {chain}: incremental build differs from the full build after edit {step}")
+                        for n , before in enumerate(texts[:step + 1]) :
+                            print(f"--- source {n}\n{before}")
+                        sys.exit(1)
+        finally :
+            os.chdir(cwd)
+    print(f"{len(chains)} chains, {builds} builds: incremental and full builds agree")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Very deep programs through the parser at the default recursion limit:
+# nested expressions, if/else and while bodies, blocks, and long statement lists
+# if/else and while open a scope per level and code generation looks addresses up
+# through every enclosing scope, so they run at --scoped-depth.
+# usage (from the project root): python3 Tests/benchmarks/stress_parser.py [--depth 100000] [--scoped-depth 10000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from parser.parser import Parser
+from parser.syntax_errors import SyntaxErrors
+from scanner.scanner import load_automaton , open_source
+from scanner.lexical_errors import LexicalErrors
+from scanner.symbol_table import SymbolTable
+from code_gen.codeGen import CodeGen
+
+
+def program(body):
+    return "void main(void){ int a; " + body + " output(a); }\n"
+
+
+CASES = {
+    "expression" : lambda n : program("a = " + "(" * n + "a + 1" + ")" * n + ";") ,
+    "sum chain" : lambda n : program("a = " + " + ".join(["a"] * n) + ";") ,
+    "if / else" : lambda n : program("if (1) " * n + "a = 1;" + " else a = 2;" * n) ,
+    "while" : lambda n : program("while (1 < 2) " * n + "a = a + 1;") ,
+    "blocks" : lambda n : program("{ " * n + "a = 1;" + " }" * n) ,
+    "statements" : lambda n : program("a = a + 1; " * n) ,
+}
+SCOPED = {"if / else" , "while"}
+
+
+def parse(path):
+    lexical_errors = LexicalErrors(file_path="lexical_errors.txt")
+    buffer = open_source(path)
+    symbol_table = SymbolTable(file_path="symbol_table.txt")
+    syntax_errors = SyntaxErrors()
+    P = Parser(buffer=buffer , dfa=load_automaton() , lexical_errors=lexical_errors , tokens=None , symbol_table=symbol_table ,
+               syntax_errors=syntax_errors , codeGen=CodeGen(symbol_table=symbol_table) , build_tree=False)
+    start = time.perf_counter()
+    P.start()
+    elapsed = time.perf_counter() - start
+    buffer.close()
+    lexical_errors.update_file()
+    return syntax_errors.error_occured , len(P.codeGen.program_block) , elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--depth" , type=int , default=100000)
+    ap.add_argument("--scoped-depth" , type=int , default=10000)
+    args = ap.parse_args()
+    print(f"recursion limit {sys.getrecursionlimit()}")
+    cwd = os.getcwd()
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp :
+        os.chdir(tmp)
+        try :
+            for name , make in CASES.items() :
+                path = os.path.join(tmp , "input.txt")
+                with open(path , "w") as f :
+                    f.write(make(args.scoped_depth if name in SCOPED else args.depth))
+                try :
+                    errors , size , elapsed = parse(path)
+                except RecursionError :
+                    print(f"{name:>10}: RecursionError")
+                    failed = True
+                    continue
+                failed = failed or errors
+                print(f"{name:>10}: {'syntax errors' if errors else 'ok'} , {size} instructions in {elapsed:.2f} s")
+        finally :
+            os.chdir(cwd)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
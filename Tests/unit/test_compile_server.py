@@ -0,0 +1,71 @@
+# compile_server.py: every response has the same keys, a failed code
+# generation keeps the artifacts it produced, programs run on code_gen/vm.py,
+# and --stdio answers every request with a bounded number in flight.
+# usage (from the project root): python3 -m pytest Tests/unit
+import io
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compile_server import CompileServer , handle , response
+
+SOURCE = "void main(void){ output(1); }\n"
+KEYS = sorted(response(None))
+
+
+class HandleTest(unittest.TestCase):
+    def test_run(self):
+        answer = handle({"id" : 1 , "source" : SOURCE , "run" : True})
+        self.assertEqual(sorted(answer) , KEYS)
+        self.assertTrue(answer["ok"] , answer["error"])
+        self.assertEqual(answer["vm_output"] , "PRINT    1\n")
+        self.assertIsNone(answer["vm_error"])
+        self.assertNotIn("symbol_table.txt" , answer["artifacts"])
+        self.assertIn("output.txt" , answer["artifacts"])
+
+    def test_unknown_options(self):
+        for options in ({"lex_workers" : 1000} , {"lex_pipeline" : "process"} , {"source_reader" : "mmap"}) :
+            answer = handle({"id" : 2 , "source" : SOURCE , "options" : options})
+            self.assertEqual(sorted(answer) , KEYS)
+            self.assertFalse(answer["ok"])
+            self.assertIn("unknown options" , answer["error"])
+
+    def test_failed_code_generation_keeps_the_artifacts(self):
+        answer = handle({"id" : 3 , "source" : "int x;\n" , "run" : True})
+        self.assertEqual(sorted(answer) , KEYS)
+        self.assertFalse(answer["ok"])
+        self.assertIsNotNone(answer["error"])
+        for name in ("tokens.txt" , "lexical_errors.txt" , "syntax_errors.txt" , "parse_tree.txt") :
+            self.assertIn(name , answer["artifacts"])
+        self.assertIsNone(answer["vm_output"])
+
+    def test_max_steps(self):
+        source = "void main(void){ int i; i = 0; while (i < 1) { output(i); } }\n"
+        answer = handle({"id" : 4 , "source" : source , "run" : True} , max_steps=1000)
+        self.assertTrue(answer["ok"] , answer["error"])
+        self.assertIn("VMError" , answer["vm_error"])
+
+
+class ServeStdioTest(unittest.TestCase):
+    def test_every_request_is_answered(self):
+        server = CompileServer(workers=1 , timeout=None , max_pending=2)
+        try :
+            lines = [json.dumps({"id" : n , "source" : SOURCE , "run" : True}) + "\n" for n in range(6)] + ["not json\n"]
+            out = io.StringIO()
+            server.serve_stdio(lines , out)
+        finally :
+            server.close()
+        answers = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(answers) , 7)
+        for answer in answers :
+            self.assertEqual(sorted(answer) , KEYS)
+        self.assertEqual(sorted(answer["id"] for answer in answers if answer["ok"]) , list(range(6)))
+        self.assertEqual([answer["id"] for answer in answers if not answer["ok"]] , [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
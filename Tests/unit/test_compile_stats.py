@@ -0,0 +1,73 @@
+# The compile stats (compile(stats_path=...) / CompileOptions(stats=True)) of a
+# known program: their keys and counts, and with a profile attached as well,
+# one timed wrapper per semantic routine feeding both.
+# usage (from the project root): python3 -m pytest Tests/unit
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import CompileOptions , compile , compile_source
+
+SOURCE = "void main(void){ output(1); }\n"
+PHASES = ["artifacts" , "code_generation" , "parse" , "setup"]
+
+
+class CompileStatsTest(unittest.TestCase):
+    def test_counts(self):
+        result = compile_source(SOURCE , CompileOptions(stats=True))
+        stats = result.stats
+        self.assertEqual(sorted(stats) , ["error" , "phases" , "total" , "trace_memory"])
+        self.assertEqual(sorted(stats["phases"]) , PHASES)
+        self.assertIsNone(stats["error"])
+        parse = stats["phases"]["parse"]
+        self.assertEqual(sorted(parse["parts"]) , ["lexing" , "parsing" , "semantic_actions"])
+        # void main ( void ) { output ( 1 ) ; } $
+        self.assertEqual(parse["tokens"] , 13)
+        self.assertEqual(parse["parts"]["lexing"]["tokens"] , 13)
+        self.assertEqual(parse["parts"]["semantic_actions"]["calls"] , 19)
+        self.assertEqual(stats["total"]["instructions"] , len(result.program_block))
+        self.assertEqual(sum(phase["instructions"] for phase in stats["phases"].values()) , len(result.program_block))
+        self.assertGreater(stats["total"]["semantic_stack_high_water"] , 0)
+
+    def test_profile_and_stats_share_the_wrappers(self):
+        for parser_mode in ("generated" , "diagrams") :
+            result = compile_source(SOURCE , CompileOptions(profile=True , stats=True , parser_mode=parser_mode))
+            actions = result.stats["phases"]["parse"]["parts"]["semantic_actions"]
+            profiled = result.profile["actions"].values()
+            self.assertEqual(sum(entry["count"] for entry in profiled) , actions["calls"])
+            self.assertEqual(result.profile["tokens"] , result.stats["total"]["tokens"])
+            # each call is timed once and both get the same time
+            self.assertAlmostEqual(sum(entry["time"] for entry in profiled) , actions["wall"] , places=9)
+
+    def test_compile_writes_the_stats(self):
+        cwd = os.getcwd()
+        work = tempfile.mkdtemp()
+        try :
+            os.chdir(work)
+            with open("input.txt" , "w") as f :
+                f.write(SOURCE)
+            with contextlib.redirect_stdout(io.StringIO()) :
+                compile(stats_path="stats.json")
+            with open("stats.json") as f :
+                stats = json.load(f)
+        finally :
+            os.chdir(cwd)
+            shutil.rmtree(work , ignore_errors=True)
+        self.assertTrue(stats["trace_memory"])
+        self.assertEqual(sorted(stats["phases"]) , PHASES)
+        self.assertEqual(stats["total"]["tokens"] , 13)
+        self.assertIn("peak_memory" , stats["total"])
+        for phase in stats["phases"].values() :
+            self.assertIn("peak_memory" , phase)
+
+
+if __name__ == "__main__":
+    unittest.main()
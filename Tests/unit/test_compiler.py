@@ -0,0 +1,96 @@
+# compile() writes the artifacts it was asked for, where it was asked to, the
+# same texts compile_source() returns, and removes nothing it did not write
+# unless remove_stale=True.
+# usage (from the project root): python3 -m pytest Tests/unit
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import CompileOptions , compile , compile_source
+
+SOURCE = os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "T1" , "input.txt")
+STALE = ("tokens.txt" , "symbol_table.txt" , "parse_tree.txt")
+
+
+class CompileFilesTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        shutil.copy(SOURCE , "input.txt")
+        for name in STALE :
+            with open(name , "w") as f :
+                f.write("kept\n")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def compile(self , **options):
+        with contextlib.redirect_stdout(io.StringIO()) :
+            compile(**options)
+
+    def read(self , name):
+        with open(name) as f :
+            return f.read()
+
+    def test_release_build_removes_nothing(self):
+        self.compile(artifacts=False)
+        for name in STALE :
+            self.assertEqual(self.read(name) , "kept\n")
+        self.assertTrue(os.path.exists("output.txt"))
+
+    def test_parse_tree_off_keeps_the_file(self):
+        self.compile(parse_tree=False)
+        self.assertEqual(self.read("parse_tree.txt") , "kept\n")
+        self.assertNotEqual(self.read("tokens.txt") , "kept\n")
+
+    def test_remove_stale(self):
+        self.compile(artifacts=False , remove_stale=True)
+        self.assertFalse(os.path.exists("tokens.txt"))
+        self.assertFalse(os.path.exists("parse_tree.txt"))
+        # never written by any build, so never removed
+        self.assertEqual(self.read("symbol_table.txt") , "kept\n")
+
+    def test_parse_tree_file_path(self):
+        self.compile(parse_tree_file_path="tree.txt")
+        self.assertEqual(self.read("parse_tree.txt") , "kept\n")
+        self.assertTrue(self.read("tree.txt").startswith("Program"))
+
+    def test_output_paths(self):
+        os.mkdir("out")
+        self.compile(output_file_path="out/code.txt" , semantic_errors_file_path="out/semantic.txt" ,
+                     syntax_errors_file_path="out/syntax.txt" , lexical_error_file_path="out/lexical.txt")
+        self.assertEqual(sorted(os.listdir("out")) , ["code.txt" , "lexical.txt" , "semantic.txt" , "syntax.txt"])
+        self.assertFalse(os.path.exists("output.txt"))
+
+    def test_same_artifacts_as_compile_source(self):
+        with open("input.txt" , encoding="utf-8") as f :
+            result = compile_source(f.read())
+        self.compile(options=CompileOptions(source_reader="mmap"))
+        for name , text in result.artifacts().items() :
+            self.assertEqual(self.read(name) , text , name)
+
+    def test_options_or_switches(self):
+        with self.assertRaises(TypeError) :
+            self.compile(options=CompileOptions() , artifacts=False)
+
+
+class LazyImportTest(unittest.TestCase):
+    def test_opt_in_modules_are_not_imported(self):
+        # incremental builds, profiles and stats load their modules when asked for
+        code = "import sys , compiler ; print(sorted(m for m in ('code_gen.incremental' , 'parser.parse_profile' , 'parser.compile_stats' , 'tracemalloc') if m in sys.modules))"
+        out = subprocess.run([sys.executable , "-c" , code] , cwd=ROOT , capture_output=True , text=True , check=True).stdout
+        self.assertEqual(out.strip() , "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
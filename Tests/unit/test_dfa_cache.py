@@ -0,0 +1,64 @@
+# A damaged scanner automaton cache is a cache miss: the automaton is rebuilt
+# and the compile goes on as with a good cache.
+# usage (from the project root): python3 -m pytest Tests/unit
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import compile_source
+from scanner.compiled_dfa import CompiledDFA
+from scanner.dfa_cache import CACHE_PATH , definitions_key , load_compiled_dfa , read_compiled_dfa
+
+SOURCE = os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "T1" , "input.txt")
+
+
+class DamagedDfaCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.dir , "scanner_dfa.bin")
+        load_compiled_dfa(self.cache_path)
+        with open(self.cache_path , "rb") as f :
+            self.good = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def test_flipped_bytes_are_a_miss_or_a_dfa(self):
+        key = definitions_key()
+        rng = random.Random(1)
+        for _ in range(100) :
+            damaged = bytearray(self.good)
+            for _ in range(3) :
+                damaged[rng.randrange(len(damaged))] = rng.randrange(256)
+            with open(self.cache_path , "wb") as f :
+                f.write(damaged)
+            dfa = read_compiled_dfa(key , self.cache_path)
+            self.assertTrue(dfa is None or isinstance(dfa , CompiledDFA))
+
+    def test_garbage_cache_is_rebuilt(self):
+        with open(self.cache_path , "wb") as f :
+            f.write(b"\x80\x05garbage" + bytes(range(256)))
+        self.assertIsInstance(load_compiled_dfa(self.cache_path) , CompiledDFA)
+        with open(self.cache_path , "rb") as f :
+            self.assertEqual(f.read() , self.good)
+
+    def test_compiles_with_garbage_in_the_cache(self):
+        with open(SOURCE , encoding="utf-8") as f :
+            text = f.read()
+        expected = compile_source(text)
+        with open(CACHE_PATH , "wb") as f :
+            f.write(os.urandom(4096))
+        result = compile_source(text)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.output , expected.output)
+        self.assertEqual(result.semantic_errors , expected.semantic_errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
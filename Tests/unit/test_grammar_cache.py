@@ -0,0 +1,87 @@
+# A damaged grammar cache is a cache miss: the grammar is compiled again and
+# parsers are built as with a good cache. The grammar and generator keys are
+# hashed once per process, and again only when a file changes.
+# usage (from the project root): python3 -m pytest Tests/unit
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import compile_source
+from parser import grammar_cache
+from parser.grammar import CompiledGrammar
+from parser.grammar_cache import CACHE_PATH , FIRST_PATH , FOLLOW_PATH , GRAMMAR_PATH , grammar_key , load_compiled_grammar , read_compiled_grammar
+from parser.parser_generator import generator_key , load_generated_parser
+
+SOURCE = os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "T1" , "input.txt")
+
+
+class DamagedGrammarCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.dir , "grammar.bin")
+        self.key = grammar_key(GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH)
+        grammar_cache.save_compiled_grammar(load_compiled_grammar() , self.key , self.cache_path)
+        with open(self.cache_path , "rb") as f :
+            self.good = f.read()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def test_flipped_bytes_are_a_miss_or_a_grammar(self):
+        rng = random.Random(1)
+        for _ in range(100) :
+            damaged = bytearray(self.good)
+            for _ in range(3) :
+                damaged[rng.randrange(len(damaged))] = rng.randrange(256)
+            with open(self.cache_path , "wb") as f :
+                f.write(damaged)
+            grammar = read_compiled_grammar(self.key , self.cache_path)
+            self.assertTrue(grammar is None or isinstance(grammar , CompiledGrammar))
+
+    def test_compiles_with_garbage_in_the_cache(self):
+        with open(SOURCE , encoding="utf-8") as f :
+            text = f.read()
+        expected = compile_source(text)
+        with open(CACHE_PATH , "wb") as f :
+            f.write(os.urandom(4096))
+        # forget the grammar this process already loaded, so the cache is read
+        grammar_cache.LOADED.clear()
+        result = compile_source(text)
+        self.assertIsNone(result.error)
+        self.assertEqual(result.output , expected.output)
+        self.assertEqual(result.semantic_errors , expected.semantic_errors)
+
+
+class KeyTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.paths = []
+        for path in (GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH) :
+            self.paths.append(shutil.copy(path , self.dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def test_keys_are_hashed_once(self):
+        key = generator_key(*self.paths)
+        with mock.patch("hashlib.sha256" , side_effect=AssertionError("hashed again")) :
+            self.assertEqual(generator_key(*self.paths) , key)
+            load_generated_parser()
+
+    def test_a_changed_file_is_hashed_again(self):
+        key , grammar = generator_key(*self.paths) , grammar_key(*self.paths)
+        with open(self.paths[1] , "a") as f :
+            f.write("\n")
+        self.assertNotEqual(grammar_key(*self.paths) , grammar)
+        self.assertNotEqual(generator_key(*self.paths) , key)
+
+
+if __name__ == "__main__":
+    unittest.main()
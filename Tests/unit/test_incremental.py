@@ -0,0 +1,115 @@
+# Incremental builds (compile(artifacts=False , incremental=True)) must write
+# the same output.txt and semantic_errors.txt as full builds, reuse declarations
+# when it can, and fall back to a full build on a damaged cache.
+# Tests/benchmarks/stress_incremental.py runs long random edit chains.
+# usage (from the project root): python3 -m pytest Tests/unit
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from code_gen import incremental
+from compiler import compile
+
+CASES = os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases")
+FUNCTION = "void f0(void){ output(1); }\n"
+
+
+def read_case(name):
+    with open(os.path.join(CASES , name , "input.txt") , encoding="utf-8") as f :
+        return f.read()
+
+
+class IncrementalBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def build(self , text , incremental):
+        with open("input.txt" , "w" , encoding="utf-8") as f :
+            f.write(text)
+        for name in ("output.txt" , "semantic_errors.txt") :
+            if os.path.exists(name) :
+                os.remove(name)
+        try :
+            with contextlib.redirect_stdout(io.StringIO()) :
+                compile(artifacts=False , incremental=incremental)
+        except Exception as error :
+            # a program without main: both builds have to stop the same way
+            return type(error).__name__
+        with open("output.txt") as f , open("semantic_errors.txt") as g :
+            return f.read() , g.read()
+
+    def assert_chain(self , texts):
+        for step , text in enumerate(texts) :
+            self.assertEqual(self.build(text , True) , self.build(text , False) , f"after edit {step}")
+
+    def test_edits_match_full_builds(self):
+        r4 = read_case("R4")
+        self.assert_chain([r4 , FUNCTION + r4 , r4 , "void f2(void){ q2 = 1; }\n" + r4])
+        for name in ("T1" , "T5" , "S1") :
+            source = read_case(name)
+            self.assert_chain([source , source + "\n/* c */\n" , source[:1] + "\nint qqq;\n" + source[1:] , source])
+
+    def compiled(self , text):
+        # the segments an incremental build of text compiles
+        compiled = []
+        compile_segment = incremental.compile_segment
+        def counting(segment , *args):
+            compiled.append(segment)
+            return compile_segment(segment , *args)
+        incremental.compile_segment = counting
+        try :
+            self.assertEqual(self.build(text , True) , self.build(text , False))
+        finally :
+            incremental.compile_segment = compile_segment
+        return compiled
+
+    def test_unchanged_source_reuses_every_declaration(self):
+        source = read_case("R4")
+        self.build(source , True)
+        self.assertEqual(self.compiled(source) , [])
+
+    def test_each_declaration_is_compiled_once(self):
+        # main starts at line 36, and 36 is a constant as well: the jump to
+        # main moves when f0 grows, the constant does not
+        main = "int a;\nvoid main(void){ a = 1; f0(); output(a); output(36); }\n"
+        f0 = "void f0(void){ output(1); }\n"
+        self.assertEqual(self.compiled(f0 + main) , [f0 , "int a;\n" , main[7:]])
+        f0 = "void f0(void){ int t; t = 2; output(t + 1); }\n"
+        self.assertEqual(self.compiled(f0 + main) , [f0])
+        code = self.build(f0 + main , True)[0]
+        self.assertIn("(JP ,47 , ,)" , code)
+        self.assertIn("#36" , code)
+
+    def test_damaged_cache_falls_back(self):
+        source = read_case("T1")
+        self.build(source , True)
+        with open("incremental_cache.bin" , "r+b") as f :
+            f.seek(40)
+            f.write(b"\xff\x00\xff")
+        self.assertEqual(self.build(source , True) , self.build(source , False))
+        with open("incremental_cache.bin" , "wb") as f :
+            f.write(os.urandom(512))
+        self.assertEqual(self.build(source , True) , self.build(source , False))
+
+    def test_syntax_errors_count_a_full_build(self):
+        before = incremental.FALLBACKS["full build"]
+        self.assertEqual(self.build("void main(void){ output(1) }\n" , True) , self.build("void main(void){ output(1) }\n" , False))
+        self.assertEqual(incremental.FALLBACKS["full build"] , before + 1)
+        self.assertFalse(os.path.exists("incremental_cache.bin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+# MappedFileReader reads CRLF and CR sources as text mode does, without
+# copying the map: the same tokens, lines and lexical errors as
+# BufferedFileReader in every scanner mode.
+# usage (from the project root): python3 -m pytest Tests/unit
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from scanner.buffer import BufferedFileReader , MappedFileReader
+from scanner.get_next_token import iter_tokens
+from scanner.lexical_errors import LexicalErrors
+from scanner.scanner import load_automaton
+from scanner.symbol_table import SymbolTable
+
+SOURCE = b"int a;\nvoid main(void){\n/* one\ntwo */ a = 1$;\n\n b@ = 2;\n output(a);\n}\n/* open\n"
+
+
+def scan(reader , scanner_mode):
+    errors = LexicalErrors(file_path=None)
+    tokens = [(tok[0] , tok[1] , tok[2]) for tok in iter_tokens(reader , load_automaton(scanner_mode) , errors , None ,
+                                                                SymbolTable(file_path=None) , add_tokens=False)
+              if tok[0] != "WHITE"]
+    errors.update_file()
+    reader.close()
+    return tokens , errors.writer.text
+
+
+class LineBreaksTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def write(self , name , data):
+        path = os.path.join(self.dir , name)
+        with open(path , "wb") as f :
+            f.write(data)
+        return path
+
+    def test_same_as_text_mode(self):
+        for name , line_break in (("crlf" , b"\r\n") , ("cr" , b"\r") , ("mixed" , b"\r\n\r")) :
+            path = self.write(name , SOURCE.replace(b"\n" , line_break))
+            for scanner_mode in ("compiled" , "dfa" , "slice") :
+                expected = scan(BufferedFileReader(path) , scanner_mode)
+                self.assertEqual(scan(MappedFileReader(path) , scanner_mode) , expected , (name , scanner_mode))
+            if name != "mixed" :
+                # one line break each, as in the \n source
+                self.assertEqual(scan(BufferedFileReader(path) , "compiled")[0] , scan(BufferedFileReader(self.write("lf" , SOURCE)) , "compiled")[0])
+
+    def test_the_map_is_not_copied(self):
+        reader = MappedFileReader(self.write("crlf" , SOURCE.replace(b"\n" , b"\r\n")))
+        try :
+            self.assertIs(reader.data , reader.map)
+            self.assertEqual(reader.line_of(reader.size) , SOURCE.count(b"\n") + 1)
+        finally :
+            reader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
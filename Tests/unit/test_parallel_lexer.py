@@ -0,0 +1,102 @@
+# ParallelSource and PipelinedSource must replay the tokens and lexical errors
+# of a serial scan, also when the source is cut into many tiny chunks or
+# handed over in tiny batches.
+# usage (from the project root): python3 -m pytest Tests/unit
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from scanner.buffer import BufferedFileReader
+from scanner.get_next_token import iter_tokens
+from scanner.lexical_errors import LexicalErrors
+from scanner.parallel_lexer import ParallelSource , PipelinedSource , split_points
+from scanner.scanner import load_automaton
+from scanner.slice_scanner import SLICE_BUFFER_SIZE
+from scanner.symbol_table import SymbolTable
+
+INPUTS = sorted(glob.glob(os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "*" , "input.txt")))
+ERRORS = ("int a;\nvoid main(void){\n a = 1$;\n /* one\n two */ b@ = 2;\n\n */ c = 3x;\n output(a);\n}\n" * 20
+          + "int q;\n/* open\n int r;\n")
+
+
+def scan(reader , scanner_mode):
+    # (tokens with line and offset , lexical errors , identifiers in the symbol table)
+    errors = LexicalErrors(file_path=None)
+    symbol_table = SymbolTable(file_path=None)
+    tokens = [(tok.type , tok.lexeme , tok.line , tok.offset) for tok in iter_tokens(reader , load_automaton(scanner_mode) , errors , None ,
+                                                                                     symbol_table , add_tokens=False)]
+    errors.update_file()
+    reader.close()
+    return tokens , errors.writer.text , [record.token.lexeme for record in symbol_table.scopes[0].records]
+
+
+def serial(path , scanner_mode):
+    return scan(BufferedFileReader(path , buffer_size=SLICE_BUFFER_SIZE if scanner_mode=="slice" else 1024) , scanner_mode)
+
+
+class SourceTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.errors = os.path.join(self.dir , "errors.txt")
+        with open(self.errors , "w") as f :
+            f.write(ERRORS)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+
+class ParallelSourceTest(SourceTest):
+    def test_tiny_chunks(self):
+        for path in INPUTS + [self.errors] :
+            for scanner_mode in ("compiled" , "slice") :
+                source = ParallelSource(file_path=path , scanner_mode=scanner_mode , workers=2 , min_chunk=1)
+                # more chunks than workers, so chunks queue up behind each other
+                source.points = split_points(source.source , 40 , min_chunk=1)
+                self.assertGreater(len(source.points) , 2 , path)
+                self.assertEqual(scan(source , scanner_mode) , serial(path , scanner_mode) , (path , scanner_mode))
+
+    def test_one_chunk(self):
+        # the default chunk size keeps a small source in one chunk, lexed in process
+        source = ParallelSource(file_path=self.errors , workers=2)
+        self.assertEqual(source.points , [0])
+        self.assertEqual(scan(source , "compiled") , serial(self.errors , "compiled"))
+
+    def test_split_points(self):
+        # a chunk starts where a serial scan starts a token: after a newline
+        # outside comments, and not on whitespace
+        starts = {tok[3] for tok in serial(self.errors , "compiled")[0]}
+        points = split_points(ERRORS , 50 , min_chunk=1)
+        self.assertGreater(len(points) , 20)
+        for point in points[1:] :
+            self.assertEqual(ERRORS[point - 1] , "\n")
+            self.assertNotIn(ERRORS[point] , " \n\t")
+            self.assertIn(point , starts)
+
+
+class PipelinedSourceTest(SourceTest):
+    def assert_same_as_serial(self , pipeline , paths , scanner_modes):
+        for path in paths :
+            for scanner_mode in scanner_modes :
+                # batches of 3 tokens through a queue of 2: the producer keeps blocking
+                source = PipelinedSource(file_path=path , scanner_mode=scanner_mode , pipeline=pipeline , batch_size=3 , depth=2)
+                self.assertEqual(scan(source , scanner_mode) , serial(path , scanner_mode) , (path , pipeline , scanner_mode))
+
+    def test_thread(self):
+        self.assert_same_as_serial("thread" , INPUTS + [self.errors] , ("compiled" , "slice"))
+
+    def test_process(self):
+        self.assert_same_as_serial("process" , INPUTS[:3] + [self.errors] , ("compiled" ,))
+
+    def test_one_batch(self):
+        source = PipelinedSource(file_path=self.errors , pipeline="thread")
+        self.assertEqual(scan(source , "compiled") , serial(self.errors , "compiled"))
+
+
+if __name__ == "__main__":
+    unittest.main()
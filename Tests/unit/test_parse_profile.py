@@ -0,0 +1,75 @@
+# The parse profile (compile(profile_path=...) / CompileOptions(profile=True))
+# of known programs: its keys and its counts, the same in both parser modes.
+# usage (from the project root): python3 -m pytest Tests/unit
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import CompileOptions , compile , compile_source
+
+SOURCE = "void main(void){ output(1); }\n"
+MISSING_SEMICOLON = "void main(void){ output(1) }\n"
+KEYS = ["actions" , "nonterminals" , "parse_time" , "recoveries" , "tokens" , "tokens_per_second"]
+
+
+def counts(entries):
+    return {name : entry["count"] for name , entry in entries.items()}
+
+
+class ParseProfileTest(unittest.TestCase):
+    def profile(self , text , parser_mode="generated"):
+        return compile_source(text , CompileOptions(profile=True , parser_mode=parser_mode)).profile
+
+    def test_counts(self):
+        for parser_mode in ("generated" , "diagrams") :
+            profile = self.profile(SOURCE , parser_mode)
+            self.assertEqual(sorted(profile) , KEYS)
+            # void main ( void ) { output ( 1 ) ; } $
+            self.assertEqual(profile["tokens"] , 13)
+            nonterminals = counts(profile["nonterminals"])
+            self.assertEqual(nonterminals["Program"] , 1)
+            self.assertEqual(nonterminals["DeclarationList"] , 3)
+            self.assertEqual(nonterminals["Expression"] , 2)
+            actions = counts(profile["actions"])
+            self.assertEqual(actions["#push_id"] , 2)
+            self.assertEqual(actions["#main_function"] , 1)
+            self.assertEqual(actions["#push_num"] , 1)
+            self.assertEqual(profile["recoveries"] , {"counts" : {} , "events" : []})
+            for entry in profile["nonterminals"].values() :
+                self.assertEqual(sorted(entry) , ["count" , "self_time" , "time"])
+                self.assertLessEqual(entry["self_time"] , entry["time"])
+
+    def test_recoveries(self):
+        profile = self.profile(MISSING_SEMICOLON)
+        self.assertEqual(profile["recoveries"]["counts"] , {"illegal" : 1 , "eof" : 6})
+        self.assertEqual(profile["recoveries"]["events"][0] , {"kind" : "illegal" , "line" : 1 , "nonterminal" : "TermPrime" , "symbol" : "}"})
+        self.assertEqual(profile["tokens"] , 12)
+
+    def test_compile_writes_the_profile(self):
+        cwd = os.getcwd()
+        work = tempfile.mkdtemp()
+        try :
+            os.chdir(work)
+            with open("input.txt" , "w") as f :
+                f.write(SOURCE)
+            with contextlib.redirect_stdout(io.StringIO()) :
+                compile(profile_path="profile.json")
+            with open("profile.json") as f :
+                profile = json.load(f)
+        finally :
+            os.chdir(cwd)
+            shutil.rmtree(work , ignore_errors=True)
+        self.assertEqual(sorted(profile) , KEYS)
+        self.assertEqual(counts(profile["actions"]) , counts(self.profile(SOURCE)["actions"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+# parse_tree.txt rendered from the ParseTree arena must be byte for byte the
+# text of a PtNode tree (one object per node, as the parser built before the
+# arena) built from the same parse, in both parser modes.
+# usage (from the project root): python3 -m pytest Tests/unit
+import glob
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from code_gen.codeGen import CodeGen
+from parser.parse_tree import ParseTree
+from parser.parser import Parser , PtNode
+from parser.syntax_errors import SyntaxErrors
+from scanner.buffer import StringReader
+from scanner.lexical_errors import LexicalErrors
+from scanner.scanner import load_automaton
+from scanner.symbol_table import SymbolTable
+
+INPUTS = sorted(glob.glob(os.path.join(ROOT , "Tests" , "**" , "input.txt") , recursive=True))
+
+
+class PtNodeParser(Parser):
+    # builds a PtNode for every node it adds to the arena
+    def __init__(self , **kwargs):
+        super().__init__(**kwargs)
+        self.ptnodes = {ParseTree.ROOT : PtNode("Program")}
+
+    def add_child(self , pt_par : int , label : str) -> int:
+        child = super().add_child(pt_par , label)
+        self.copy(pt_par , child , label)
+        return child
+
+    def add_leaf(self , pt_par : int):
+        if self.build_tree :
+            label = self.leaf_repr()
+            self.copy(pt_par , self.parse_tree.add_child(pt_par , label) , label)
+
+    def copy(self , pt_par : int , child : int , label : str):
+        node = self.ptnodes[child] = PtNode(label)
+        self.ptnodes[pt_par].add_children(node)
+
+
+def parse(text , parser_mode):
+    symbol_table = SymbolTable(file_path=None)
+    P = PtNodeParser(buffer=StringReader(text) , dfa=load_automaton() , lexical_errors=LexicalErrors(file_path=None) , tokens=None ,
+                     symbol_table=symbol_table , syntax_errors=SyntaxErrors(file_path=None) , codeGen=CodeGen(symbol_table=symbol_table) ,
+                     parser_mode=parser_mode , tree_path=None)
+    try :
+        P.start()
+    except Exception :
+        # code generation stopped the parse: render the part that was built
+        P.write_tree()
+    return P
+
+
+class ParseTreeTest(unittest.TestCase):
+    def test_same_text_as_ptnodes(self):
+        for path in INPUTS :
+            with open(path , encoding="utf-8") as f :
+                text = f.read()
+            for parser_mode in ("generated" , "diagrams") :
+                P = parse(text , parser_mode)
+                self.assertEqual(len(P.ptnodes) , len(P.parse_tree) , path)
+                expected = "\n".join(P.ptnodes[ParseTree.ROOT].to_lines())
+                self.assertEqual(P.tree_text.encode("utf-8") , expected.encode("utf-8") , (path , parser_mode))
+
+    def test_views(self):
+        P = parse("void main(void){ output(1); }\n" , "generated")
+        root = P.ptnodes[ParseTree.ROOT]
+        view = P.parse_tree.view()
+        self.assertEqual(view.label , root.label)
+        self.assertEqual([child.label for child in view.children] , [child.label for child in root.children])
+        # a subtree renders on its own as a PtNode does
+        self.assertEqual(view.children[0].to_lines("  ") , root.children[0].to_lines("  " , True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+# A damaged generated parser (parser/.cache/generated_parser.py) is generated
+# again instead of failing every compile, and a rewritten file never runs the
+# bytecode of the one before.
+# usage (from the project root): python3 -m pytest Tests/unit
+import importlib.util
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from parser import parser_generator
+from parser.parser_generator import load_generated_parser
+
+
+class DamagedGeneratedParserTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir , "generated_parser.py")
+        self.loaded = dict(parser_generator.LOADED)
+        parser_generator.LOADED.clear()
+        self.module = load_generated_parser(path=self.path)
+        with open(self.path , "rb") as f :
+            self.good = f.read()
+
+    def tearDown(self):
+        parser_generator.LOADED.clear()
+        parser_generator.LOADED.update(self.loaded)
+        shutil.rmtree(self.dir , ignore_errors=True)
+
+    def load_damaged(self , damaged , keep_stat=False):
+        stat = os.stat(self.path)
+        with open(self.path , "wb") as f :
+            f.write(damaged)
+        if keep_stat :
+            os.utime(self.path , ns=(stat.st_atime_ns , stat.st_mtime_ns))
+        parser_generator.LOADED.clear()
+        module = load_generated_parser(path=self.path)
+        self.assertEqual(module.END_KEY , self.module.END_KEY)
+        with open(self.path , "rb") as f :
+            return f.read()
+
+    def test_damaged_bodies_are_generated_again(self):
+        # keep the key line, so the damage is only found by importing the file
+        header = self.good.index(b"\n" , self.good.index(b"GRAMMAR_KEY")) + 1
+        rng = random.Random(1)
+        for _ in range(20) :
+            damaged = bytearray(self.good)
+            for _ in range(3) :
+                damaged[rng.randrange(header , len(damaged))] = rng.randrange(256)
+            self.load_damaged(bytes(damaged))
+
+    def test_invalid_utf8_and_unknown_names(self):
+        header = self.good.index(b"\n" , self.good.index(b"GRAMMAR_KEY")) + 1
+        self.assertEqual(self.load_damaged(self.good[:header] + b"\xff\xfe" + self.good[header + 2:]) , self.good)
+        self.assertEqual(self.load_damaged(self.good[:header] + b"undefined_name\n" + self.good[header:]) , self.good)
+
+    def test_bytecode_is_checked_against_the_source_hash(self):
+        with open(importlib.util.cache_from_source(self.path) , "rb") as f :
+            header = f.read(8)
+        # pyc flags (PEP 552): bit 0 hash based, bit 1 checked
+        self.assertEqual(int.from_bytes(header[4:8] , "little") , 0b11)
+
+    def test_same_size_and_mtime_does_not_run_stale_bytecode(self):
+        # the same number of bytes, and the old mtime: only the source hash tells the files apart
+        damaged = self.good.replace(b"END_KEY = '" , b"END_KEY = 'x" , 1)[:len(self.good) - 1] + b"\n"
+        self.assertEqual(len(damaged) , len(self.good))
+        self.assertEqual(self.load_damaged(damaged , keep_stat=True) , self.good)
+
+
+if __name__ == "__main__":
+    unittest.main()
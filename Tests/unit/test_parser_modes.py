@@ -0,0 +1,113 @@
+# The prediction table must hold the decisions the diagrams and FIRST / FOLLOW
+# sets give, and the diagram walk (parser_mode="diagrams") and the generated
+# parser must build the same programs, with and without syntax errors, also
+# when they nest far deeper than the recursion limit.
+# usage (from the project root): python3 -m pytest Tests/unit
+import glob
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from compiler import CompileOptions , compile_source
+from parser.grammar_cache import load_compiled_grammar
+from parser.prediction import EPSILON , RECOVER_EOF , RECOVER_ILLEGAL , RECOVER_MISSING
+
+INPUTS = sorted(glob.glob(os.path.join(ROOT , "Tests" , "**" , "input.txt") , recursive=True))
+DEPTH = 3000
+# the last two are missing a term and three closing braces at the deepest level
+DEEP = {
+    "expression" : "a = " + "(" * DEPTH + "a + 1" + ")" * DEPTH + ";" ,
+    "blocks" : "{ " * DEPTH + "a = 1;" + " }" * DEPTH ,
+    "if / else" : "if (1) " * 300 + "a = 1;" + " else a = 2;" * 300 ,
+    "while" : "while (a < 2) " * 300 + "a = a + 1;" ,
+    "missing term" : "a = " + "(" * DEPTH + "a + " + ")" * DEPTH + ";" ,
+    "missing braces" : "{ " * DEPTH + "a = 1" + " }" * (DEPTH - 3) ,
+}
+
+
+def edge_match(grammar , edge , component , look):
+    # the parser's test for an edge before the prediction table, on the lists of first.txt / follow.txt
+    if edge is EPSILON :
+        return look in grammar.follows[component]
+    if edge in grammar.terminal_set :
+        return edge == look
+    return look in grammar.firsts[edge] or ("EPSILON" in grammar.firsts[edge] and look in grammar.follows[edge])
+
+
+def predict(grammar , node , look):
+    # the edge a node with several edges takes, or the recovery when none matches
+    for i , (edge , _ , _) in enumerate(node.edges) :
+        if edge_match(grammar , edge , node.component , look) :
+            return i
+    if look == "$" :
+        return RECOVER_EOF
+    if look not in grammar.follows[node.component] :
+        return RECOVER_ILLEGAL
+    return RECOVER_MISSING
+
+
+def step(grammar , node , look):
+    # whether edges[0] matches, or the recovery when it does not
+    edge = node.edges[0][0]
+    if edge_match(grammar , edge , node.component , look) :
+        return 0
+    if look == "$" :
+        return RECOVER_EOF
+    follow = grammar.follows[node.component] if edge in grammar.terminal_set else grammar.follows[edge]
+    if look not in follow :
+        return RECOVER_ILLEGAL
+    return RECOVER_MISSING
+
+
+class PredictionTableTest(unittest.TestCase):
+    def test_same_decisions_as_the_diagrams(self):
+        grammar = load_compiled_grammar()
+        table = grammar.prediction
+        # every terminal, and a symbol the grammar does not know
+        looks = sorted(t for t in grammar.terminal_set if t is not EPSILON) + ["unknown symbol"]
+        checked = 0
+        for node in grammar.graph.nodes.values() :
+            if not node.edges :
+                continue
+            for look in looks :
+                look_id = table.look_id(look)
+                if len(node.edges) > 1 :
+                    self.assertEqual(table.predict[node.id][look_id] , predict(grammar , node , look) , (node.id , look))
+                self.assertEqual(table.step[node.id][look_id] , step(grammar , node , look) , (node.id , look))
+                checked += 1
+        self.assertGreater(checked , 1000)
+
+
+class ParserModesTest(unittest.TestCase):
+    def test_same_artifacts(self):
+        for path in INPUTS :
+            with open(path , encoding="utf-8") as f :
+                text = f.read()
+            generated = compile_source(text , CompileOptions(parser_mode="generated"))
+            diagrams = compile_source(text , CompileOptions(parser_mode="diagrams"))
+            self.assertEqual(diagrams.artifacts() , generated.artifacts() , path)
+            self.assertEqual(repr(diagrams.error) , repr(generated.error) , path)
+
+    def test_deep_nesting(self):
+        # a recursion limit far below DEPTH: neither parser may recurse once per
+        # nesting level (no parse tree: its text grows with the square of the depth)
+        compile_source("void main(void){ }\n")
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(150)
+        try :
+            for name , body in DEEP.items() :
+                text = "void main(void){ int a; " + body + " output(a); }\n"
+                generated = compile_source(text , CompileOptions(parser_mode="generated" , parse_tree=False))
+                diagrams = compile_source(text , CompileOptions(parser_mode="diagrams" , parse_tree=False))
+                self.assertEqual(diagrams.artifacts() , generated.artifacts() , name)
+                self.assertEqual(repr(diagrams.error) , repr(generated.error) , name)
+                self.assertEqual(diagrams.artifacts()["syntax_errors.txt"].startswith("#") , name.startswith("missing") , name)
+        finally :
+            sys.setrecursionlimit(limit)
+
+
+if __name__ == "__main__":
+    unittest.main()
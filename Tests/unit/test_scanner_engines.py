@@ -0,0 +1,95 @@
+# Every scanner engine must give the tokens and lexical errors of the
+# transition-table DFA (scanner_mode="dfa"), on the test programs and on
+# sources full of lexical errors, whatever the buffer size. The slice scanner
+# merges a run of whitespace into one token, so its whitespace is not compared.
+# usage (from the project root): python3 -m pytest Tests/unit
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from scanner.buffer import BufferedFileReader , MappedFileReader
+from scanner.get_next_token import iter_tokens
+from scanner.lexical_errors import LexicalErrors
+from scanner.scanner import load_automaton
+from scanner.symbol_table import SymbolTable
+
+INPUTS = sorted(glob.glob(os.path.join(ROOT , "Tests" , "**" , "input.txt") , recursive=True))
+ERRORS = {
+    "invalid" : "int a;\nvoid main(void){ a = 1$; b@ = 2; c! = 3; output(a#); }\n" ,
+    "numbers" : "int 12ab; a = 3x + 0; b = 123456789012345678901234567890;\n" ,
+    "comments" : "a = 1; */ b = 2; /* one\ntwo */ c = 3; / * d; /* open\n" ,
+    "equals" : "if (a == b) a = = b; a === b; a =! b;\n" ,
+    "long" : "int " + "a" * 3000 + ";\nvoid main(void){ output(" + "9" * 2000 + "); " + "x" * 1500 + "$ }\n" ,
+    "unicode" : "int a; é = 1; a = 2ü;\n" ,
+    "no newline" : "int a; a = 1@" ,
+}
+# small enough that tokens, comments and errors straddle buffer refills
+BUFFER_SIZES = (7 , 1024)
+
+
+def scan(reader , scanner_mode):
+    errors = LexicalErrors(file_path=None)
+    tokens = [(tok[0] , tok[1] , tok[2]) for tok in iter_tokens(reader , load_automaton(scanner_mode) , errors , None ,
+                                                                SymbolTable(file_path=None) , add_tokens=False)]
+    errors.update_file()
+    reader.close()
+    return tokens , errors.writer.text
+
+
+def without_white(result):
+    tokens , errors = result
+    return [tok for tok in tokens if tok[0] != "WHITE"] , errors
+
+
+class ScannerEnginesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        cls.paths = list(INPUTS)
+        for name , text in ERRORS.items() :
+            path = os.path.join(cls.dir , name)
+            with open(path , "w" , encoding="utf-8") as f :
+                f.write(text)
+            cls.paths.append(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.dir , ignore_errors=True)
+
+    def assert_same_as_dfa(self , scanner_mode , white=True):
+        # white=False leaves whitespace tokens out of the comparison
+        for path in self.paths :
+            for buffer_size in BUFFER_SIZES :
+                expected = scan(BufferedFileReader(path , buffer_size=buffer_size) , "dfa")
+                found = scan(BufferedFileReader(path , buffer_size=buffer_size) , scanner_mode)
+                if not white :
+                    expected , found = [without_white(result) for result in (expected , found)]
+                self.assertEqual(found , expected , (path , buffer_size))
+
+    def test_the_error_sources_have_errors(self):
+        for name in ERRORS :
+            self.assertNotIn("no lexical error" , scan(BufferedFileReader(os.path.join(self.dir , name)) , "dfa")[1].lower() , name)
+
+    def test_compiled(self):
+        self.assert_same_as_dfa("compiled")
+
+    def test_slice(self):
+        # the slice scanner returns a run of whitespace as one token
+        self.assert_same_as_dfa("slice" , white=False)
+
+    def test_mapped_reader(self):
+        # MappedFileReader (source_reader="mmap") against BufferedFileReader, in every mode
+        for path in self.paths :
+            for scanner_mode in ("compiled" , "dfa" , "slice") :
+                expected = scan(BufferedFileReader(path) , scanner_mode)
+                self.assertEqual(scan(MappedFileReader(path) , scanner_mode) , expected , (path , scanner_mode))
+
+
+if __name__ == "__main__":
+    unittest.main()
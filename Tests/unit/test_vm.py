@@ -0,0 +1,96 @@
+# code_gen/vm.py must run a program block as the tester's VM
+# (Tests/phase3_tester/test/vm.py) runs its output.txt: the same PRINT lines,
+# the same trace and the same exception, raised at the same instruction.
+# usage (from the project root): python3 -m pytest Tests/unit
+import contextlib
+import glob
+import io
+import os
+import sys
+import unittest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__) , ".." , ".."))
+sys.path.insert(0 , ROOT)
+
+from code_gen.codeGen import CodeGen
+from code_gen.vm import VMError , decode , run_program
+from compiler import compile_source
+from scanner.symbol_table import SymbolTable
+from Tests.phase3_tester.test import vm as tester_vm
+
+CASES = sorted(glob.glob(os.path.join(ROOT , "Tests" , "phase3_tester" , "test" , "testcases" , "*"))
+               + glob.glob(os.path.join(ROOT , "Tests" , "Test_case_G3" , "*")))
+# program blocks the code generator does not write, for the error paths
+BLOCKS = {
+    "indirect" : ["(ASSIGN, #500, 100, )" , "(ASSIGN, #7, @100, )" , "(ADD, @100, #1, 104)" , "(PRINT, 104, , )" , "(PRINT, @100, , )"] ,
+    "true operand" : ["(ASSIGN, true, 100, )" , "(ASSIGN, false, 104, )" , "(PRINT, 100, , )" , "(PRINT, 104, , )"] ,
+    "logic" : ["(ASSIGN, #6, 100, )" , "(AND, 100, #3, 104)" , "(NOT, 104, 108, )" , "(EQ, 104, #2, 112)" , "(LT, #1, 100, 116)" ,
+               "(DIV, 100, #4, 120)" , "(MULT, 100, #-2, 124)" , "(PRINT, 108, , )" , "(PRINT, 112, , )" , "(PRINT, 116, , )" ,
+               "(PRINT, 120, , )" , "(PRINT, 124, , )"] ,
+    "jumps" : ["(ASSIGN, #0, 100, )" , "(JPF, 100, 3, )" , "(PRINT, #1, , )" , "(ASSIGN, #5, 104, )" , "(JP, @104, , )" ,
+               "(PRINT, #2, , )" , "(PRINT, #3, , )"] ,
+    "unset memory" : ["(PRINT, #1, , )" , "(ADD, 100, #1, 104)" , "(PRINT, #2, , )"] ,
+    "unset pointer" : ["(ASSIGN, #1, @100, )"] ,
+    "unknown command" : ["(PRINT, #1, , )" , "(PUSH, #1, , )"] ,
+    "not a command" : ["(PRINT, #1, , )" , "(PRINT 1)"] ,
+    "reserved line" : ["(JP, 2, , )" , "" , "(PRINT, #1, , )"] ,
+    "division by zero" : ["(ASSIGN, #0, 100, )" , "(DIV, #1, 100, 104)"] ,
+}
+
+
+def output_lines(program_block):
+    # output.txt as execute.exec reads it
+    code_gen = CodeGen(symbol_table=SymbolTable(file_path=None))
+    code_gen.program_block = program_block
+    return code_gen.output_text().strip().splitlines()
+
+
+def run_tester(lines):
+    # (output , trace , exception) of the tester's VM on the lines of an output.txt
+    output , trace = io.StringIO() , io.StringIO()
+    error = None
+    try :
+        # it dumps the memory to stderr before it re-raises
+        with contextlib.redirect_stderr(io.StringIO()) :
+            tester_vm.run(lines , output_file=output , error_file=trace)
+    except Exception as exc :
+        error = exc
+    return output.getvalue() , trace.getvalue() , repr(error)
+
+
+def run_decoded(program_block):
+    output , trace = io.StringIO() , io.StringIO()
+    error = None
+    try :
+        run_program(decode(program_block) , output , trace)
+    except Exception as exc :
+        error = exc
+    return output.getvalue() , trace.getvalue() , repr(error)
+
+
+class VMTest(unittest.TestCase):
+    def test_tester_programs(self):
+        for case in CASES :
+            with open(os.path.join(case , "input.txt")) as f :
+                result = compile_source(f.read())
+            found = run_decoded(result.program_block)
+            self.assertEqual(found , run_tester(output_lines(result.program_block)) , case)
+            # the S cases have semantic errors, and no expected.txt
+            if os.path.exists(os.path.join(case , "expected.txt")) :
+                self.assertEqual(found[2] , "None" , case)
+                with open(os.path.join(case , "expected.txt")) as f :
+                    self.assertEqual(found[0].split() , f.read().split() , case)
+
+    def test_error_paths(self):
+        for name , block in BLOCKS.items() :
+            self.assertEqual(run_decoded(block) , run_tester(output_lines(block)) , name)
+
+    def test_max_steps(self):
+        program = decode(["(JP, 0, , )"])
+        with self.assertRaises(VMError) :
+            run_program(program , io.StringIO() , max_steps=1000)
+        self.assertEqual(run_program(decode(BLOCKS["logic"]) , io.StringIO() , max_steps=len(BLOCKS["logic"])) , len(BLOCKS["logic"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
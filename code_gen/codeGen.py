@@ -94,13 +94,13 @@ class CodeGen:
         self.semantic_stack.pop()
     
     def code_gen_hold(self , token:Token , param:None):
-        self.semantic_stack.append(len(self.program_block))
+        self.semantic_stack.append(self.current_line())
         self.program_block.append("PLACE_HOLDER_HOLD")
     
     def code_gen_if_decide(self , token:Token , param:None):
         addr = self.semantic_stack.pop()
         stmt = self.semantic_stack.pop()
-        cur_line = len(self.program_block)
+        cur_line = self.current_line()
         self.add_code(op="JPF" , r1=stmt , r2 =cur_line , line=int(addr))
     
     def code_gen_while_jump(self , token:Token , param:None):
@@ -110,7 +110,7 @@ class CodeGen:
         self.semantic_stack.append(s1)
 
     def code_gen_label(self , token:Token , param:None):
-        self.semantic_stack.append(len(self.program_block))
+        self.semantic_stack.append(self.current_line())
 
     def code_gen_assign(self , token:Token , param:None):
         r1 , r2 = self.semantic_stack.pop() , self.semantic_stack[-1]
@@ -216,7 +216,7 @@ class CodeGen:
     def code_gen_define_function(self , token:Token , param=None):
         self.function_data_pointer , self.function_temp_pointer = self.data_address , self.temp_addres
         record = self.symbol_table.find_record_by_id(self.last_token.lexeme)
-        record.address = len(self.program_block)
+        record.address = self.current_line()
         record.is_function = True
         self.program_block[-1] = ""
 
@@ -248,9 +248,9 @@ class CodeGen:
         self.function_input_pointers.append(len(self.semantic_stack))
 
     def code_gen_function_call(self , token:Token , param=None):
-        for d in range(self.function_data_pointer , self.data_address , self.word_size):
+        for d in self.address_range(self.function_data_pointer , self.data_address , self.word_size):
             self.stack_push(d)
-        for d in range(self.function_temp_pointer , self.temp_addres  , self.word_size):
+        for d in self.address_range(self.function_temp_pointer , self.temp_addres , self.word_size):
             self.stack_push(d)
         self.stack_store_registers()
         
@@ -276,13 +276,13 @@ class CodeGen:
             if arg_types_input_func[ind][1].token_type != func_record.args_type[ind] : 
                 self.semantic_errors.append(f"#{param[0]} : Semantic Error! Mismatch in type of argument {ind+1} of '{func_record.token.lexeme}'. Expected '{func_record.args_type[ind]}' but got '{arg_types_input_func[ind][1].token_type}' instead.")
         
-        self.add_code(op="ASSIGN" , r1=f"#{len(self.program_block)+2}" , r2=self.registers["ra"] )
+        self.add_code(op="ASSIGN" , r1=f"#{self.current_line()+2}" , r2=self.registers["ra"] )
         self.add_code(op="JP" , r1=func_addr)
 
         self.stack_load_registers()
-        for d in range(self.temp_addres , self.function_temp_pointer , -self.word_size):
+        for d in self.address_range(self.temp_addres , self.function_temp_pointer , -self.word_size):
             self.stack_pop(d - self.word_size)
-        for d in range(self.data_address , self.function_data_pointer, -self.word_size):
+        for d in self.address_range(self.data_address , self.function_data_pointer , -self.word_size):
             self.stack_pop(d - self.word_size)
 
         res = self.get_tempblock_var()
@@ -305,7 +305,7 @@ class CodeGen:
         self.is_main_declared = True
         func = self.semantic_stack.pop()
         self.program_block.pop()
-        self.semantic_stack.append(len(self.program_block))
+        self.semantic_stack.append(self.current_line())
         self.program_block.append("MAIN_PLACE_HOLDER")
         self.semantic_stack.append(func)
 
@@ -318,6 +318,26 @@ class CodeGen:
             self.semantic_errors.append(f"#{param[1]} : Semantic Error! Illegal type of void for '{record.token.lexeme}'.")
 
 
+    # Code lines and address runs go through these two, not len() / range():
+    # the incremental build (code_gen/incremental.py) overrides them to keep
+    # its tagged numbers tagged, so it knows what every emitted number is
+    # relative to.
+    def current_line(self):
+        # the line the next instruction goes to
+        return len(self.program_block)
+
+    def address_range(self , start , stop , step):
+        # range(start , stop , step) that yields start + k * step
+        address = start
+        if step > 0 :
+            while address < stop :
+                yield address
+                address += step
+        else :
+            while address > stop :
+                yield address
+                address += step
+
     def get_datablock_var(self , size=1):
         ret = self.data_address
         self.data_address+=self.word_size * size
@@ -370,11 +390,11 @@ class CodeGen:
     def stack_allocate(self , size=1):
         self.add_code("ADD" , f"#{self.word_size * size}" , f"{self.registers['sp']}" ,f"{self.registers['sp']}")
 
-    def stack_store_registers(self , registers=["sp" , "fp" , "ra"]):
+    def stack_store_registers(self , registers=("sp" , "fp" , "ra")):
         for rg in registers : 
             self.stack_push(self.registers[rg])
     
-    def stack_load_registers(self , registers=["ra" , "fp" , "sp"]):
+    def stack_load_registers(self , registers=("ra" , "fp" , "sp")):
         for rg in registers:
             self.stack_pop(self.registers[rg])
 
@@ -388,7 +408,7 @@ class CodeGen:
         self.add_code(op="ASSIGN" , r1=f"#{self.stack_address}" , r2=self.registers['fp'])
         self.add_code(op="ASSIGN" , r1=f"#100000" , r2=self.registers['ra'])
         self.add_code(op="ASSIGN" , r1=f"#100000" , r2=self.registers['rv'])
-        self.add_code(op="JP" , r1=f"{len(self.program_block)+5}")
+        self.add_code(op="JP" , r1=f"{self.current_line()+5}")
         self.stack_pop(self.registers['rv'])
         self.add_code(op="PRINT" , r1=self.registers['rv'])
         self.add_code(op="JP" , r1=f"@{self.registers['ra']}")
@@ -406,22 +426,27 @@ class CodeGen:
         else :
             self.program_block.append(f"({op}, {r1}, {r2}, {r3})")
 
-    def export(self , file_path="output.txt"):
+    def output_text(self) -> str:
+        # the text of output.txt
         if len(self.semantic_errors)!=0 : 
-            with open(file_path, "w") as f:
-                    f.write(f"The code has not been generated.")
-            return
+            return "The code has not been generated."
+        lines = []
+        for i, line in enumerate(self.program_block):
+            if '(' not in line:
+                line = "(ASSIGN , 0, 0 , )"
+            lines.append(f"{i}\t{line}\n")
+        return "".join(lines)
+
+    def semantic_errors_text(self) -> str:
+        # the text of semantic_errors.txt
+        if len(self.semantic_errors)==0 : 
+            return "The input program is semantically correct."
+        return "".join(f"{line}\n" for line in self.semantic_errors)
+
+    def export(self , file_path="output.txt"):
         with open(file_path, "w") as f:
-            for i, line in enumerate(self.program_block):
-                if '(' not in line:
-                    line = "(ASSIGN , 0, 0 , )"
-                f.write(f"{i}\t{line}\n")
+            f.write(self.output_text())
 
     def export_semantic_errors(self , file_path="semantic_errors.txt"):
-        if len(self.semantic_errors)==0 : 
-            with open(file_path, "w") as f:
-                    f.write(f"The input program is semantically correct.")
-            return
         with open(file_path, "w") as f:
-            for i, line in enumerate(self.semantic_errors):
-                f.write(f"{line}\n")
+            f.write(self.semantic_errors_text())
@@ -0,0 +1,558 @@
+import hashlib
+import os
+import re
+
+from code_gen.codeGen import CodeGen
+from parser.grammar_cache import grammar_key , GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH
+from parser.parser import Parser
+from scanner.buffer import StringReader
+from scanner.get_next_token import iter_tokens
+from scanner.pickle_cache import read_cache , save_cache , drop_cache
+from scanner.symbol_table import SymbolTable , Scope , Token
+from scanner.tokens import KIND_WHITE
+
+# bump when the layout of the cached declarations changes
+FORMAT_VERSION = 2
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# code whose behaviour the cached declarations depend on
+DEFINITION_FILES = ["code_gen/codeGen.py" , "code_gen/scopeFrame.py" , "code_gen/incremental.py" , "scanner/symbol_table.py"]
+
+# a Relative in generated text: \0source:value\0
+_MARKER = re.compile("\0(\\d+):(-?\\d+)\0")
+
+
+class SegmentError(Exception):
+    # a segment that can not be compiled on its own (lexical or syntax errors),
+    # or a declaration whose code can not be relocated: the caller falls back to
+    # a full compile, or compiles the declaration again on every build. Any
+    # other exception is a bug here and is not caught.
+    pass
+
+
+# SegmentErrors caught since the process started, by kind (see note_fallback),
+# and the message of the last one of each kind
+FALLBACKS = {"full build" : 0 , "not relocatable" : 0}
+LAST_FALLBACK : dict[str , str] = {}
+
+
+class ErrorCollector(list):
+    # stands in for LexicalErrors / SyntaxErrors while compiling one segment
+    def add(self , no_line , error):
+        self.append((no_line , error))
+
+    def update_file(self):
+        pass
+
+    def discard(self):
+        pass
+
+
+class NotRelocatable(SegmentError):
+    # the code generator did something with a tagged number that can not be
+    # written relative to one boundary value
+    pass
+
+
+class Relative(int):
+    # A number the code of a declaration got from boundary value `source`
+    # (an index into Boundary.values()): the declaration's first line, one of
+    # the CodeGen counters, a semantic stack entry or a global address.
+    # Adding or subtracting a constant keeps the tag; its text is a marker
+    # (_MARKER) that says where it came from, so every number written into an
+    # instruction or a semantic error is recorded there as relocatable.
+    # Anything that would mix two values or scale one is refused.
+    def __new__(cls , value , source):
+        number = int.__new__(cls , value)
+        number.source = source
+        return number
+
+    def __add__(self , other):
+        if type(other) is Relative :
+            raise NotRelocatable("two relocatable numbers added")
+        return Relative(int(self) + other , self.source)
+
+    __radd__ = __add__
+
+    def __sub__(self , other):
+        if type(other) is Relative :
+            if other.source != self.source :
+                raise NotRelocatable("relocatable numbers of two values subtracted")
+            # a distance inside the declaration: a constant
+            return int(self) - int(other)
+        return Relative(int(self) - other , self.source)
+
+    def __rsub__(self , other):
+        raise NotRelocatable("a relocatable number negated")
+
+    def __mul__(self , other):
+        raise NotRelocatable("a relocatable number scaled")
+
+    __rmul__ = __floordiv__ = __rfloordiv__ = __mod__ = __neg__ = __mul__
+
+    def __str__(self):
+        return f"\0{self.source}:{int(self)}\0"
+
+    __repr__ = __str__
+
+    def __format__(self , spec):
+        return str(self) if not spec else format(int(self) , spec)
+
+
+def plain(value):
+    return int(value) if type(value) is Relative else value
+
+
+def relative(value , base : list) -> tuple:
+    # (number , source): a Relative as its distance from base[source], anything else as a constant
+    if type(value) is Relative :
+        return int(value) - base[value.source] , value.source
+    return value , None
+
+
+def untag_text(text : str) -> str:
+    return _MARKER.sub(lambda m : m[2] , text)
+
+
+def template(text : str , base : list) -> tuple:
+    # A line of code or a semantic error with markers as pieces: text, then
+    # numbers that are relative to one of the boundary values.
+    pieces = _MARKER.split(text)
+    parts = [pieces[0]]
+    relocs = []
+    for i in range(1 , len(pieces) , 3) :
+        source , value = int(pieces[i]) , int(pieces[i + 1])
+        relocs.append((len(parts) , source))
+        parts.append(value - base[source])
+        parts.append(pieces[i + 2])
+    return tuple(parts) , tuple(relocs)
+
+
+# indexes of Boundary.values(): the first line, the counters, then the
+# semantic stack entries and the global addresses
+LINE , CODE , DATA , TEMP , FUNCTION_DATA , FUNCTION_TEMP , STACK = range(7)
+
+
+class SegmentBlock(list):
+    # program_block of an incremental build: the declaration being compiled
+    # may only change the lines from floor on
+    floor = 0
+
+    def check(self , index):
+        if index < 0 :
+            index += list.__len__(self)
+        if index < self.floor :
+            raise NotRelocatable("the declaration touched code generated before it")
+
+    def __setitem__(self , index , value):
+        if self.floor :
+            self.check(index)
+        list.__setitem__(self , index , value)
+
+    def pop(self , index=-1):
+        if self.floor :
+            self.check(index)
+        return list.pop(self , index)
+
+
+class RelocatingCodeGen(CodeGen):
+    # CodeGen whose code lines are Relatives while a declaration is compiled
+    # (between tag() and untag()); its other counters are tagged by tag()
+    def __init__(self , symbol_table):
+        self.tagging = False
+        super().__init__(symbol_table=symbol_table)
+        self.program_block = SegmentBlock(self.program_block)
+
+    def current_line(self):
+        line = len(self.program_block)
+        return Relative(line , CODE) if self.tagging else line
+
+    def address_range(self , start , stop , step):
+        if type(start) is Relative or type(stop) is Relative :
+            # how many addresses there are must not depend on the boundary
+            if type(start) is not type(stop) or start.source != stop.source :
+                raise NotRelocatable("an address range between two values")
+        return super().address_range(start , stop , step)
+
+    def tag(self , boundary : "Boundary"):
+        # every number the next declaration can start from, tagged with its
+        # index in boundary.values()
+        self.tagging = True
+        self.program_block.floor = boundary.code
+        self.data_address = Relative(self.data_address , DATA)
+        self.temp_addres = Relative(self.temp_addres , TEMP)
+        self.function_data_pointer = Relative(self.function_data_pointer , FUNCTION_DATA)
+        self.function_temp_pointer = Relative(self.function_temp_pointer , FUNCTION_TEMP)
+        self.semantic_stack[:] = [Relative(v , STACK + i) if type(v) is int else v for i , v in enumerate(self.semantic_stack)]
+        first = STACK + len(self.semantic_stack)
+        for i , record in enumerate(self.symbol_table.scopes[0].records) :
+            if type(record.address) is int :
+                record.address = Relative(record.address , first + i)
+
+    def untag(self):
+        # plain numbers again, and the generated text without markers
+        self.tagging = False
+        self.program_block.floor = 0
+        self.data_address = plain(self.data_address)
+        self.temp_addres = plain(self.temp_addres)
+        self.function_data_pointer = plain(self.function_data_pointer)
+        self.function_temp_pointer = plain(self.function_temp_pointer)
+        self.semantic_stack[:] = [plain(v) for v in self.semantic_stack]
+        for scope in self.symbol_table.scopes :
+            for record in scope.records :
+                if type(record.address) is Relative :
+                    record.address = int(record.address)
+
+
+def global_entry(record) -> tuple:
+    args_type = None if record.args_type is None else tuple(record.args_type)
+    return (record.token.type , record.token.lexeme , record.address , record.token_type , record.is_function , args_type , record.num_args)
+
+
+def address_value(address):
+    # addresses that are not numbers (None before define_id) do not move
+    return address if type(address) is int else None
+
+
+class Boundary:
+    # CodeGen / SymbolTable state between two top-level declarations.
+    # values() are the numbers the code of the next declaration can be relative
+    # to: its first line, the code / data / temp counters, the function frame
+    # pointers, the semantic stack and the global addresses. signature() is a
+    # digest of the rest, which has to be equal for a cached declaration to be reused.
+    __slots__ = ("line" , "code" , "data" , "temp" , "function_data" , "function_temp" , "main" , "stack" , "globals" , "errors")
+
+    def __init__(self , code_gen : CodeGen , line : int):
+        self.line = line
+        self.code = len(code_gen.program_block)
+        self.errors = len(code_gen.semantic_errors)
+        self.data = code_gen.data_address
+        self.temp = code_gen.temp_addres
+        self.function_data = code_gen.function_data_pointer
+        self.function_temp = code_gen.function_temp_pointer
+        self.main = code_gen.is_main_declared
+        self.stack = list(code_gen.semantic_stack)
+        self.globals = [global_entry(r) for r in code_gen.symbol_table.scopes[0].records]
+
+    @staticmethod
+    def at_top_level(code_gen : CodeGen) -> bool:
+        # nothing of a declaration may still be open
+        return (len(code_gen.symbol_table.scopes)==1 and not code_gen.function_input_pointers and not code_gen.function_input_flag
+                and all(not frame.adress_stack and not frame.pending_jumps for frame in code_gen.scopeFrames.values()))
+
+    @staticmethod
+    def current_values(code_gen : CodeGen , line : int , addresses : list) -> list:
+        # values() of the state code_gen is in, given the global addresses
+        values = [line , len(code_gen.program_block) , code_gen.data_address , code_gen.temp_addres ,
+                  code_gen.function_data_pointer , code_gen.function_temp_pointer]
+        values.extend(v if type(v) is int else None for v in code_gen.semantic_stack)
+        return values + addresses
+
+    def addresses(self) -> list:
+        return [address_value(g[2]) for g in self.globals]
+
+    def values(self) -> list:
+        values = [self.line , self.code , self.data , self.temp , self.function_data , self.function_temp]
+        values.extend(v if type(v) is int else None for v in self.stack)
+        return values + self.addresses()
+
+    def address_pattern(self) -> tuple:
+        # CodeGen looks records up by address, so which addresses are equal
+        # matters too: globals that share an address, and global addresses at
+        # or above the data / temp counters, which new variables can run into
+        first = {}
+        pattern = []
+        for i , g in enumerate(self.globals) :
+            address = g[2]
+            if type(address) is not int :
+                continue
+            j = first.setdefault(address , i)
+            if j != i or address >= self.data or address >= self.temp :
+                pattern.append((i , j , address - self.data if address >= self.data else None , address - self.temp if address >= self.temp else None))
+        return tuple(pattern)
+
+    def signature(self) -> bytes:
+        stack = tuple(None if type(v) is int else v for v in self.stack)
+        globals = tuple(g[:2] + (type(g[2]) is int ,) + g[3:] for g in self.globals)
+        return hashlib.sha1(repr((self.main , stack , globals , self.address_pattern())).encode()).digest()
+
+
+def apply_template(line : tuple , base : list) -> str:
+    parts , relocs = line
+    if not relocs :
+        return "".join(parts)
+    parts = list(parts)
+    for i , source in relocs :
+        parts[i] = str(base[source] + parts[i])
+    return "".join(parts)
+
+
+def absolute(number , base : list):
+    value , source = number
+    return value if source is None else base[source] + value
+
+
+class CachedDeclaration:
+    # One top-level declaration: where it is in the source and everything it
+    # did to CodeGen and the symbol table, with the numbers relative to the
+    # Boundary it started from. globals only holds the global records the
+    # declaration added or changed, by their index in the global scope.
+    __slots__ = ("start" , "end" , "signature" , "exit_signature" , "code" , "errors" , "exit" , "stack" , "main" , "globals")
+
+    def __init__(self , start , end , signature , exit_signature , code , errors , exit , stack , main , globals):
+        self.start = start
+        self.end = end
+        self.signature = signature
+        self.exit_signature = exit_signature
+        self.code = code
+        self.errors = errors
+        self.exit = exit
+        self.stack = stack
+        self.main = main
+        self.globals = globals
+
+    def apply(self , code_gen : CodeGen , base : list , addresses : list):
+        # addresses (the global addresses, as in Boundary.values) is kept up to date
+        code_gen.program_block.extend(apply_template(line , base) for line in self.code)
+        code_gen.semantic_errors.extend(apply_template(line , base) for line in self.errors)
+        code , data , temp , function_data , function_temp = (absolute(v , base) for v in self.exit)
+        if code != len(code_gen.program_block) :
+            raise SegmentError("the cached code does not line up")
+        code_gen.data_address = data
+        code_gen.temp_addres = temp
+        code_gen.function_data_pointer = function_data
+        code_gen.function_temp_pointer = function_temp
+        code_gen.is_main_declared = self.main
+        code_gen.semantic_stack[:] = [absolute(v , base) for v in self.stack]
+        scope = code_gen.symbol_table.scopes[0]
+        for i , (token_type , lexeme , address , data_type , is_function , args_type , num_args) in self.globals :
+            if i == len(scope.records) :
+                scope.add(Token(token_type , lexeme))
+                addresses.append(None)
+            record = scope.records[i]
+            address = absolute(address , base)
+            args_type = None if args_type is None else list(args_type)
+            if record.token_type != data_type :
+                record.token_type = data_type
+            if record.args_type != args_type :
+                record.args_type = args_type
+            if record.num_args != num_args :
+                record.num_args = num_args
+            if record.is_function != is_function :
+                record.is_function = is_function
+            if record.address != address :
+                record.address = address
+            addresses[i] = address_value(address)
+
+
+def compile_segment(text , line , base , code_gen , dfa):
+    # parses text (a run of whole top-level declarations) into code_gen
+    errors = ErrorCollector()
+    buffer = StringReader(text , line=line , base=base)
+    P = Parser(buffer=buffer , dfa=dfa , lexical_errors=errors , tokens=None , symbol_table=code_gen.symbol_table ,
+               syntax_errors=errors , codeGen=code_gen , build_tree=False)
+    try :
+        P.start()
+    except SegmentError :
+        raise
+    except Exception as error :
+        # the code generator fails on this program: the full build reports it
+        raise SegmentError(f"{type(error).__name__}: {error}") from error
+    if errors :
+        raise SegmentError(f"line {errors[0][0]}: {errors[0][1]}")
+
+
+def compile_declaration(start , end , text , line , code_gen : RelocatingCodeGen , dfa) -> tuple:
+    # Compiles one declaration into code_gen with every number it can start
+    # from tagged, so that each number it writes is known to be a constant or
+    # relative to one boundary value. Returns (CachedDeclaration , Boundary
+    # after it); the declaration is a placeholder that never matches when its
+    # result can not be cached.
+    boundary = Boundary(code_gen , line)
+    base = boundary.values()
+    code_gen.tag(boundary)
+    try :
+        try :
+            compile_segment(text , Relative(line , LINE) , start , code_gen , dfa)
+        except NotRelocatable as error :
+            # stopped half way: code_gen is of no use any more
+            raise SegmentError(f"not relocatable: {error}") from error
+        block , errors = code_gen.program_block , code_gen.semantic_errors
+        code = [template(l , base) for l in block[boundary.code:]]
+        messages = [template(e , base) for e in errors[boundary.errors:]]
+        exit = [relative(v , base) for v in (Relative(len(block) , CODE) , code_gen.data_address , code_gen.temp_addres ,
+                                             code_gen.function_data_pointer , code_gen.function_temp_pointer)]
+        stack = [relative(v , base) for v in code_gen.semantic_stack]
+        addresses = [relative(r.address , base) for r in code_gen.symbol_table.scopes[0].records]
+        marked = any(type(v) is str and "\0" in v for v in code_gen.semantic_stack)
+    finally :
+        code_gen.untag()
+    # the real text of what was generated
+    block[boundary.code:] = [apply_template(l , base) for l in code]
+    errors[boundary.errors:] = [apply_template(e , base) for e in messages]
+    code_gen.semantic_stack[:] = [untag_text(v) if type(v) is str else v for v in code_gen.semantic_stack]
+    after = Boundary(code_gen , line)
+    if marked :
+        # e.g. an "@address" left on the stack: compiled, but only for this
+        # boundary, so it is compiled again next time
+        note_fallback("not relocatable" , "a relocatable number left on the semantic stack inside text")
+        return CachedDeclaration(start , end , None , None , () , () , () , () , False , ()) , after
+    globals = []
+    for i , g in enumerate(after.globals) :
+        if i < len(boundary.globals) and boundary.globals[i]==g :
+            continue
+        address = addresses[i] if type(g[2]) is int else (g[2] , None)
+        globals.append((i , g[:2] + (address ,) + g[3:]))
+    return CachedDeclaration(start , end , boundary.signature() , after.signature() , code , messages , exit , stack , after.main , globals) , after
+
+
+def common_prefix(a : str , b : str) -> int:
+    # length of the common prefix, comparing slices rather than characters
+    low , high = 0 , min(len(a) , len(b))
+    while low < high :
+        mid = (low + high + 1) // 2
+        if a[low:mid]==b[low:mid] :
+            low = mid
+        else :
+            high = mid - 1
+    return low
+
+
+def split_declarations(text , start , end , line , dfa) -> list[int]:
+    # start offsets of the top-level declarations in text[start:end]; a
+    # declaration ends at a ";" or "}" that brings the brace depth back to 0
+    errors = ErrorCollector()
+    buffer = StringReader(text[start:end] , line=line , base=start)
+    starts = []
+    depth = 0
+    boundary = True
+    for tok in iter_tokens(buffer , dfa , errors , None , None , add_tokens=False , add_symbols=False) :
+        if tok.type=="$" :
+            break
+        if tok.kind==KIND_WHITE :
+            continue
+        if boundary :
+            starts.append(tok.offset)
+            boundary = False
+        if tok.lexeme=="{" :
+            depth += 1
+        elif tok.lexeme=="}" :
+            depth -= 1
+            boundary = depth==0
+        elif tok.lexeme==";" :
+            boundary = depth==0
+        if depth < 0 :
+            raise SegmentError(f"line {tok.line}: unbalanced braces")
+    if errors :
+        raise SegmentError(f"line {errors[0][0]}: lexical error")
+    return starts
+
+
+def cache_key() -> str:
+    h = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    h.update(grammar_key(GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH).encode())
+    for name in DEFINITION_FILES :
+        with open(os.path.join(ROOT_DIR , name) , "rb") as f :
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def load_cache(path , key):
+    payload = read_cache(path , FORMAT_VERSION , key)
+    if payload is None :
+        return "" , []
+    text , declarations = payload.get("text") , payload.get("declarations")
+    if not isinstance(text , str) or not isinstance(declarations , list) or not all(isinstance(d , CachedDeclaration) for d in declarations) :
+        return "" , []
+    return text , declarations
+
+
+def note_fallback(kind , error):
+    # kind is "full build" (the source went through compile()'s full build) or
+    # "not relocatable" (a declaration is compiled again on every build)
+    FALLBACKS[kind] += 1
+    LAST_FALLBACK[kind] = str(error)
+
+
+def plan_declarations(text , old_text , old , dfa) -> list:
+    # (start , cached declaration or None) for every top-level declaration of
+    # text. Declarations that lie in the unchanged prefix or suffix of the
+    # source keep their cached result; only the text in between is lexed.
+    p = common_prefix(text , old_text)
+    q = min(common_prefix(text[::-1] , old_text[::-1]) , min(len(text) , len(old_text)) - p)
+    shift = len(text) - len(old_text)
+    unchanged = text==old_text
+
+    plan = []
+    i = 0
+    # the declaration and the first character of the token after it (its lookahead) are unchanged
+    while i < len(old) and (old[i].end < p or unchanged) :
+        plan.append((old[i].start , old[i]))
+        i += 1
+    j = i
+    # a suffix declaration also keeps the character before it, so it still starts a token
+    while j < len(old) and not (old[j].start > 0 and old[j].start - 1 >= len(old_text) - q and not old_text[old[j].start - 1].isalnum()) :
+        j += 1
+    # declarations tile the source from offset 0, so without a reused prefix
+    # the changed text (which may lie before old[0].start) starts the middle
+    if i==0 :
+        middle_start = 0
+    else :
+        middle_start = old[i].start if i < len(old) else old[-1].end
+    middle_end = old[j].start + shift if j < len(old) else len(text)
+    if middle_start < middle_end :
+        line = 1 + text.count("\n" , 0 , middle_start)
+        starts = split_declarations(text , middle_start , middle_end , line , dfa)
+        if starts and not plan :
+            # leading whitespace and comments belong to the first declaration
+            starts[0] = 0
+        plan.extend((start , None) for start in starts)
+    plan.extend((d.start + shift , d) for d in old[j:])
+    if plan and plan[0][0] != 0 :
+        # a middle without tokens before a reused declaration: that declaration
+        # now owns the text from offset 0 and is compiled again from there
+        plan[0] = (0 , None)
+    return plan
+
+
+def compile_declarations(code_file_path , cache_path , dfa) -> CodeGen:
+    # Compiles code_file_path declaration by declaration, reusing what the
+    # previous call cached in cache_path. Returns the CodeGen with the whole
+    # program generated, or None if the source has lexical or syntax errors
+    # (or fails to compile) and has to go through a full compile instead.
+    with open(code_file_path , "r" , encoding="utf-8") as f :
+        text = f.read()
+    key = cache_key()
+    try :
+        old_text , old = load_cache(cache_path , key)
+        plan = plan_declarations(text , old_text , old , dfa)
+        code_gen = RelocatingCodeGen(symbol_table=SymbolTable(file_path=None))
+        declarations = []
+        boundary = Boundary(code_gen , 1)
+        signature = boundary.signature()
+        addresses = boundary.addresses()
+        line = 1
+        last = 0
+        for n , (start , cached) in enumerate(plan) :
+            end = plan[n + 1][0] if n + 1 < len(plan) else len(text)
+            line += text.count("\n" , last , start)
+            last = start
+            if not Boundary.at_top_level(code_gen) :
+                raise SegmentError("a declaration left a scope open")
+            if cached is not None and cached.signature==signature :
+                # the state a declaration leaves only depends on the state it starts from
+                cached.apply(code_gen , Boundary.current_values(code_gen , line , addresses) , addresses)
+                cached.start , cached.end = start , end
+                signature = cached.exit_signature
+                declarations.append(cached)
+                continue
+            declaration , after = compile_declaration(start , end , text[start:end] , line , code_gen , dfa)
+            signature = after.signature()
+            addresses = after.addresses()
+            declarations.append(declaration)
+    except SegmentError as error :
+        note_fallback("full build" , error)
+        drop_cache(cache_path)
+        return None
+    save_cache(cache_path , FORMAT_VERSION , key , {"text" : text , "declarations" : declarations})
+    return code_gen
@@ -18,10 +18,10 @@ class ScopeFrame:
         self.pending_jumps.pop()
     
     def create_jump_placeholder(self):
-        self.pending_jumps.append(len(self.codeGen.program_block))
+        self.pending_jumps.append(self.codeGen.current_line())
         self.codeGen.add_code(op="PLACE_HOLDER")
     
     def backpatch_jump(self):
-        break_address=len(self.codeGen.program_block)
+        break_address=self.codeGen.current_line()
         place_holder_address=self.pending_jumps.pop()
         self.codeGen.add_code(op="JP" , r1=f"{break_address}" , line=place_holder_address)
\ No newline at end of file
@@ -0,0 +1,135 @@
+import re
+
+# Runs CodeGen.program_block directly, with the semantics of the tester's VM
+# (Tests/phase3_tester/test/vm.py) on the output.txt the same block exports:
+# every instruction is parsed once by decode() instead of by a regex on each
+# execution, and nothing goes through a file. Errors are raised when the
+# faulty instruction runs, as the tester's VM does, with the same exceptions.
+
+COMMAND_PATTERN = re.compile(
+    r'\d+\s+\(\s*(?P<command>[A-Z]+)(?P<params>(\s*,\s*[#@]?[-+]?\d*)+)\s*\)')
+
+# how an operand is read: a constant, memory[v], memory[memory[v]], or an
+# exception to raise (an operand the tester's VM fails on when it reads it)
+CONST , MEM , MEM2 , FAIL = range(4)
+
+OPCODES = ("ADD" , "AND" , "ASSIGN" , "EQ" , "JPF" , "JP" , "LT" , "MULT" , "DIV" , "NOT" , "PRINT" , "SUB")
+ADD , AND , ASSIGN , EQ , JPF , JP , LT , MULT , DIV , NOT , PRINT , SUB = range(len(OPCODES))
+OPCODE_IDS = {name : opcode for opcode , name in enumerate(OPCODES)}
+INVALID = -1
+
+# a placeholder output.txt fills in for a line that was reserved and never written
+PLACEHOLDER = "(ASSIGN , 0, 0 , )"
+
+
+class VMError(Exception):
+    pass
+
+
+def decode_operand(param : str) -> tuple:
+    # (read as a source , read as a destination), each (kind , value)
+    try :
+        value = int(param) if param[0].isdigit() else int(param[1:])
+    except ValueError as error :
+        failed = (FAIL , error)
+        if param.casefold() in ("true" , "false") :
+            return (CONST , int(param.casefold() == "true")) , failed
+        return failed , failed
+    if param.startswith('#') :
+        return (CONST , value) , (CONST , value)
+    if param.startswith('@') :
+        return (MEM2 , value) , (MEM , value)
+    return (MEM , value) , (CONST , value)
+
+
+def decode(program_block : list[str]) -> list[tuple]:
+    # one (opcode , operands , text) per line; text is the output.txt line, for the trace
+    program = []
+    for i , line in enumerate(program_block) :
+        if '(' not in line :
+            line = PLACEHOLDER
+        text = f"{i}\t{line}"
+        match = COMMAND_PATTERN.match(text)
+        if not match :
+            program.append((INVALID , Exception('Invalid Command' , text) , text))
+            continue
+        command = match['command'].upper()
+        params = [s.strip() for s in match['params'].split(',')[1:]]
+        params = [p for p in params if p and not p.isspace()]
+        opcode = OPCODE_IDS.get(command , INVALID)
+        if opcode == INVALID :
+            program.append((INVALID , Exception('Invalid Command' , command) , text))
+            continue
+        program.append((opcode , [decode_operand(p) for p in params] , text))
+    return program
+
+
+def run_program(program : list[tuple] , output , trace=None , max_steps=None) -> int:
+    # PRINT lines go to output and, if given, the tester's execution trace to
+    # trace; returns the number of instructions executed. max_steps bounds a
+    # program that does not stop (VMError).
+    memory = {}
+
+    def read(address):
+        value = memory.get(address , None)
+        if value is None :
+            raise Exception('Invalid access to memory' , address)
+        return value
+
+    def load(operand):
+        kind , value = operand
+        if kind == CONST :
+            return value
+        if kind == MEM :
+            return read(value)
+        if kind == MEM2 :
+            return read(read(value))
+        raise value
+
+    def store(operand , value):
+        address = load(operand)
+        memory[address] = value
+        if trace is not None :
+            print(f'--->  memory[{address}] =' , value , file=trace)
+
+    pc , steps , size = 0 , 0 , len(program)
+    while pc < size :
+        if max_steps is not None and steps >= max_steps :
+            raise VMError(f"stopped after {max_steps} instructions")
+        opcode , operands , text = program[pc]
+        steps += 1
+        if trace is not None :
+            print('--->  PC =' , pc , 'command :' , text , end='' , file=trace)
+        pc += 1
+        if opcode == INVALID :
+            raise operands
+        if opcode == ASSIGN :
+            # like the tester: the destination exists (as 0) before the source is read
+            address = load(operands[1][1])
+            if address not in memory :
+                memory[address] = 0
+            store(operands[1][1] , load(operands[0][0]))
+        elif opcode == ADD :
+            store(operands[2][1] , load(operands[0][0]) + load(operands[1][0]))
+        elif opcode == SUB :
+            store(operands[2][1] , load(operands[0][0]) - load(operands[1][0]))
+        elif opcode == MULT :
+            store(operands[2][1] , load(operands[0][0]) * load(operands[1][0]))
+        elif opcode == DIV :
+            store(operands[2][1] , load(operands[0][0]) // load(operands[1][0]))
+        elif opcode == AND :
+            store(operands[2][1] , load(operands[0][0]) & load(operands[1][0]))
+        elif opcode == EQ :
+            store(operands[2][1] , int(load(operands[0][0]) == load(operands[1][0])))
+        elif opcode == LT :
+            store(operands[2][1] , int(load(operands[0][0]) < load(operands[1][0])))
+        elif opcode == JPF :
+            if not load(operands[0][0]) :
+                pc = load(operands[1][1])
+        elif opcode == JP :
+            pc = load(operands[0][1])
+        elif opcode == NOT :
+            store(operands[1][1] , not load(operands[0][0]))
+        elif opcode == PRINT :
+            print('PRINT' , load(operands[0][0]) , sep='    ' , file=output)
+    return steps
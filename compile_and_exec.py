@@ -1,33 +1,106 @@
-from compiler import compile
-from execute import exec
+import argparse
+import io
+import json
+import os
+import sys
 
 
+class RunResult:
+    # compile_and_run(): the compile (a CompileResult), the PRINT lines the
+    # program wrote (expected.txt), the VM trace (error.txt, only when asked
+    # for), the error that stopped the program and the instructions executed
+    def __init__(self , compiled , output , trace=None , error=None , steps=0):
+        self.compiled = compiled
+        self.output = output
+        self.trace = trace
+        self.error = error
+        self.steps = steps
+
+    def write(self , directory="." , output_file="expected.txt" , error_file="error.txt"):
+        self.compiled.write(directory)
+        with open(os.path.join(directory , output_file) , "w") as f :
+            f.write(self.output)
+        if self.trace is not None :
+            with open(os.path.join(directory , error_file) , "w") as f :
+                f.write(self.trace)
 
-import argparse
-import sys
+
+def compile_and_run(text : str , options=None , trace=False , max_steps=None) -> RunResult:
+    # compile_source() and the program block straight into the VM: no file is
+    # read or written. Runs what execute.exec would run on the output.txt of
+    # the same compile, with the same PRINT output (and trace, with trace=True).
+    from compiler import compile_source
+    from code_gen.vm import decode , run_program
+    compiled = compile_source(text , options)
+    if compiled.output is None :
+        # the code could not be generated at all (e.g. no main)
+        return RunResult(compiled , "" , "" if trace else None , compiled.error)
+    if compiled.output[:1] != "0" :
+        # execute.exec refuses it too: the code was not generated
+        return RunResult(compiled , "" , "" if trace else None , "EXEC : Invalid code format.")
+    output = io.StringIO()
+    trace_file = io.StringIO() if trace else None
+    error , steps = None , 0
+    try :
+        steps = run_program(decode(compiled.program_block) , output , trace_file , max_steps)
+    except Exception as exc :
+        error = f"{type(exc).__name__}: {exc}"
+    return RunResult(compiled , output.getvalue() , trace_file.getvalue() if trace else None , error , steps)
+
+
+def run_in_memory(args) -> int:
+    from compiler import CompileOptions
+    if args.input_file in (None , "-") :
+        text = sys.stdin.read()
+    else :
+        with open(args.input_file) as f :
+            text = f.read()
+    result = compile_and_run(text , CompileOptions(stats=args.stats is not None) , trace=args.trace , max_steps=args.max_steps)
+    sys.stdout.write(result.output)
+    if args.write :
+        os.makedirs(args.write , exist_ok=True)
+        result.write(args.write , args.output_file or "expected.txt" , args.error_file or "error.txt")
+    if args.stats :
+        with open(args.stats , "w" , encoding="utf-8") as f :
+            json.dump(result.compiled.stats , f , indent=2)
+    if result.error is not None :
+        print(result.error , file=sys.stderr)
+        return 1
+    return 0
 
 
 def main():
     input_file = "input.txt"
-    output_file = "expected.txt"  
+    output_file = "expected.txt"
     error_file = "error.txt"
 
     parser = argparse.ArgumentParser()
-    parser.add_argument('-i', '--input_file', help='Path to the input file')
+    parser.add_argument('-i', '--input_file', help='Path to the input file (- for stdin, which implies --memory)')
     parser.add_argument('-o', '--output_file', help='Path to the output file')
     parser.add_argument('-e', '--error_file', help='Path to the error file')
+    parser.add_argument('--stats', metavar='PATH', nargs='?', const='compile_stats.json', help='Write per-phase compile statistics as JSON')
+    parser.add_argument('--memory', action='store_true', help='Compile and run in memory (source from -i or stdin): the program output goes to stdout and no file is written')
+    parser.add_argument('--write', metavar='DIR', help='With --memory: also write the artifacts, the output and the trace into DIR')
+    parser.add_argument('--trace', action='store_true', help='With --memory: keep the VM trace (the error file of --write)')
+    parser.add_argument('--max-steps', type=int, help='With --memory: stop a program after this many instructions')
 
     args = parser.parse_args()
 
+    if args.memory or args.input_file == "-":
+        sys.exit(run_in_memory(args))
     if args.input_file:
         input_file = args.input_file
     if args.output_file:
         output_file = args.output_file
     if args.error_file:
         error_file = args.error_file
-    compile(code_file_path=input_file)
+    # imported here: --help and bad arguments do not load the scanner, parser and code generator
+    from compiler import compile
+    from execute import exec
+    compile(code_file_path=input_file , stats_path=args.stats)
     exec(result_path=output_file , error_path=error_file)
-    
-    
 
-main()
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    main()
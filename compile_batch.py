@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compiler import compile_source , CompileOptions , warm_up
+
+# Compiles many sources at once on a process pool, with compile_source: every
+# input gets a directory of its own under --out with the artifacts compile()
+# would write next to it, e.g.
+#   python3 compile_batch.py Tests/phase3_tester/testcases/*/input.txt --out build
+# writes build/T1/output.txt, build/T1/semantic_errors.txt, ...
+
+
+def output_dirs(paths , out):
+    # the input paths relative to their common directory, without the extension
+    # (a directory named input.txt / input gives its parent's name)
+    paths = [os.path.abspath(path) for path in paths]
+    base = os.path.commonpath([os.path.dirname(path) for path in paths])
+    dirs = []
+    for path in paths :
+        relative = os.path.splitext(os.path.relpath(path , base))[0]
+        if len(paths) > 1 and os.path.basename(relative) == "input" and os.path.dirname(relative) :
+            relative = os.path.dirname(relative)
+        dirs.append(os.path.join(out , relative))
+    return dirs
+
+
+def compile_one(job) -> tuple:
+    # (path , ok , message): not ok when no artifacts could be written; a
+    # compile stopped by an error still writes what it produced, as compile() does
+    path , directory , options = job
+    try :
+        with open(path , encoding="utf-8") as f :
+            text = f.read()
+        result = compile_source(text , options)
+        result.write(directory)
+    except Exception as error :
+        return path , False , f"{type(error).__name__}: {error}"
+    return path , True , result.error
+
+
+def main():
+    ap = argparse.ArgumentParser(description="compile many sources in parallel, one output directory per input")
+    ap.add_argument("inputs" , nargs="*" , help="source files")
+    ap.add_argument("--list" , metavar="FILE" , help="also compile the files listed in FILE, one per line (- for stdin)")
+    ap.add_argument("--out" , default="build" , help="directory the per-input directories are made in")
+    ap.add_argument("--workers" , type=int , default=os.cpu_count() or 1 , help="worker processes")
+    ap.add_argument("--chunksize" , type=int , default=16 , help="inputs sent to a worker at a time")
+    ap.add_argument("--scanner-mode" , default="compiled" , choices=("compiled" , "dfa" , "slice"))
+    ap.add_argument("--parser-mode" , default="generated" , choices=("generated" , "diagrams"))
+    ap.add_argument("--release" , action="store_true" , help="artifacts=False: no tokens.txt or parse_tree.txt")
+    ap.add_argument("--no-parse-tree" , action="store_true" , help="skip parse_tree.txt")
+    args = ap.parse_args()
+    inputs = list(args.inputs)
+    if args.list :
+        with (sys.stdin if args.list == "-" else open(args.list , encoding="utf-8")) as f :
+            inputs += [line.strip() for line in f if line.strip()]
+    if not inputs :
+        ap.error("no inputs")
+
+    options = CompileOptions(scanner_mode=args.scanner_mode , artifacts=not args.release ,
+                             parse_tree=not args.no_parse_tree , parser_mode=args.parser_mode)
+    jobs = [(path , directory , options) for path , directory in zip(inputs , output_dirs(inputs , args.out))]
+    # before the pool forks: the workers inherit the loaded structures
+    warm_up((args.scanner_mode ,))
+    start = time.perf_counter()
+    failed = stopped = 0
+    if args.workers > 1 :
+        with ProcessPoolExecutor(max_workers=args.workers) as pool :
+            results = list(pool.map(compile_one , jobs , chunksize=args.chunksize))
+    else :
+        results = [compile_one(job) for job in jobs]
+    for path , ok , message in results :
+        if not ok :
+            failed += 1
+            print(f"{path}: failed: {message}" , file=sys.stderr)
+        elif message is not None :
+            stopped += 1
+            print(f"{path}: stopped: {message}" , file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs)} inputs compiled into {args.out} in {elapsed:.2f} s ({stopped} stopped by an error , {failed} failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from code_gen.vm import decode , run_program
+from compiler import CompileOptions , compile_source , warm_up
+
+# Long-lived compiler: requests come as JSON lines on stdin (--stdio) or on a
+# Unix socket (--socket PATH), one response line per request:
+#   {"id": 1, "source": "void main(void){ output(1); }", "run": true, "options": {"parser_mode": "generated"}}
+#   {"id": 1, "ok": true, "error": null, "artifacts": {"output.txt": ..., ...}, "stdout": "", "vm_output": "PRINT    1\n", "vm_error": null}
+# Every response has all of these keys (see response()). The automaton, the
+# grammar and the generated parser are loaded once, before the worker
+# processes are forked, so every worker starts warm. Each request is one
+# compile_source() in memory: only the immutable loaded structures outlive it.
+
+# CompileOptions switches a request may set; the ones that start processes
+# (lex_workers, lex_pipeline) or read files (source_reader) stay the server's
+OPTIONS = {"scanner_mode" , "artifacts" , "parse_tree" , "parser_mode"}
+# seconds a request may take by default (compile and run): a program that does
+# not stop would otherwise hold its worker for good
+DEFAULT_TIMEOUT = 30.0
+# instructions a program may run by default: it is stopped by the VM long
+# before the timeout has to interrupt the worker
+DEFAULT_MAX_STEPS = 10_000_000
+
+
+class RequestTimeout(BaseException):
+    # not an Exception: compile_source() must not swallow it
+    pass
+
+
+def on_timeout(signum , frame):
+    raise RequestTimeout()
+
+
+def response(request_id , error=None) -> dict:
+    # the shape of every response: ok is False when error is set
+    return {"id" : request_id , "ok" : error is None , "error" : error , "artifacts" : {} , "stdout" : "" ,
+            "vm_output" : None , "vm_error" : None}
+
+
+def execute(result , max_steps : int = DEFAULT_MAX_STEPS) -> dict:
+    # code_gen/vm.py on the generated instructions, with the output
+    # execute.exec would write; no trace is kept
+    if result.output is None or result.output[:1] != "0" :
+        return {"vm_error" : "invalid code format"}
+    output = io.StringIO()
+    try :
+        run_program(decode(result.program_block) , output , max_steps=max_steps or None)
+    except Exception as error :
+        return {"vm_output" : output.getvalue() , "vm_error" : f"{type(error).__name__}: {error}"}
+    return {"vm_output" : output.getvalue()}
+
+
+def handle(request : dict , timeout : float = None , max_steps : int = DEFAULT_MAX_STEPS) -> dict:
+    # worker side: one compile (and run), in memory
+    answer = response(request.get("id"))
+    options = request.get("options") or {}
+    unknown = set(options) - OPTIONS
+    if unknown :
+        answer.update(ok=False , error=f"unknown options {sorted(unknown)}")
+        return answer
+    stdout = io.StringIO()
+    if timeout :
+        signal.signal(signal.SIGALRM , on_timeout)
+        signal.setitimer(signal.ITIMER_REAL , timeout)
+    try :
+        # the compiler reports on stdout; the protocol owns the real one
+        with contextlib.redirect_stdout(stdout) :
+            result = compile_source(request.get("source" , "") , CompileOptions(**options))
+            if result.parse_exception is not None :
+                # reported like compile() does; the artifacts are still built
+                print(f":(((((( {result.error}")
+        # a compile stopped by code generation (e.g. no main) still has its
+        # lexical, syntax and semantic errors
+        answer.update(artifacts=result.artifacts())
+        if result.generation_exception is not None :
+            answer.update(ok=False , error=result.error)
+        elif request.get("run") :
+            answer.update(execute(result , max_steps))
+    except RequestTimeout :
+        answer.update(ok=False , error=f"timed out after {timeout} s")
+    except Exception as error :
+        answer.update(ok=False , error=f"{type(error).__name__}: {error}")
+    finally :
+        if timeout :
+            signal.setitimer(signal.ITIMER_REAL , 0)
+    answer["stdout"] = stdout.getvalue()
+    return answer
+
+
+class CompileServer:
+    def __init__(self , workers=2 , timeout=DEFAULT_TIMEOUT , max_steps=DEFAULT_MAX_STEPS , max_pending=None):
+        warm_up()
+        self.workers = workers
+        # requests in flight on stdin before the next line is read
+        self.max_pending = max_pending or 4 * workers
+        self.timeout = timeout
+        self.max_steps = max_steps
+        self.lock = threading.Lock()
+        # forked after warm_up: the workers inherit the loaded structures
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+
+    def restart(self , broken):
+        # a worker died (e.g. killed): the other requests of that pool fail too,
+        # the next ones go to a new pool
+        with self.lock :
+            if self.pool is broken :
+                broken.shutdown(wait=False , cancel_futures=True)
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+
+    def submit(self , line : str):
+        try :
+            request = json.loads(line)
+        except json.JSONDecodeError as error :
+            return None , response(None , f"bad request: {error}")
+        if not isinstance(request , dict) :
+            return None , response(None , "bad request: not an object")
+        with self.lock :
+            pool = self.pool
+        try :
+            future = pool.submit(handle , request , self.timeout , self.max_steps)
+        except BrokenProcessPool :
+            self.restart(pool)
+            with self.lock :
+                pool = self.pool
+            future = pool.submit(handle , request , self.timeout , self.max_steps)
+        future.request_id , future.pool = request.get("id") , pool
+        return future , None
+
+    def result(self , future) -> dict:
+        try :
+            return future.result()
+        except BrokenProcessPool as error :
+            self.restart(future.pool)
+            return response(future.request_id , f"worker failed: {error}")
+        except Exception as error :
+            # e.g. a request that cannot be sent to the worker
+            return response(future.request_id , f"{type(error).__name__}: {error}")
+
+    def serve_stdio(self , lines=sys.stdin , out=sys.stdout):
+        # requests are compiled concurrently, at most max_pending at a time;
+        # each response is written as soon as it is done, and then dropped
+        lock = threading.Lock()
+        slots = threading.BoundedSemaphore(self.max_pending)
+
+        def write(answer):
+            with lock :
+                out.write(json.dumps(answer) + "\n")
+                out.flush()
+
+        def done(future):
+            try :
+                write(self.result(future))
+            finally :
+                slots.release()
+
+        for line in lines :
+            if not line.strip() :
+                continue
+            slots.acquire()
+            future , error = self.submit(line)
+            if future is None :
+                slots.release()
+                write(error)
+                continue
+            future.add_done_callback(done)
+        # every slot back: every response is written
+        for _ in range(self.max_pending) :
+            slots.acquire()
+
+    def serve_socket(self , path : str):
+        server = self
+
+        class Connection(socketserver.StreamRequestHandler):
+            # one thread per connection, its requests answered in order
+            def handle(self):
+                for line in self.rfile :
+                    line = line.decode("utf-8")
+                    if not line.strip() :
+                        continue
+                    future , answer = server.submit(line)
+                    if future is not None :
+                        answer = server.result(future)
+                    self.wfile.write((json.dumps(answer) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        if os.path.exists(path) :
+            os.remove(path)
+        with socketserver.ThreadingUnixStreamServer(path , Connection) as unix_server :
+            # open connections do not keep the server from stopping
+            unix_server.daemon_threads = True
+            try :
+                unix_server.serve_forever()
+            finally :
+                os.remove(path)
+
+    def close(self):
+        self.pool.shutdown(wait=True , cancel_futures=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="compile server: JSON-line requests on stdin or a Unix socket")
+    mode = ap.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--stdio" , action="store_true" , help="read requests from stdin, answer on stdout")
+    mode.add_argument("--socket" , metavar="PATH" , help="listen on this Unix socket")
+    ap.add_argument("--workers" , type=int , default=os.cpu_count() or 1 , help="worker processes")
+    ap.add_argument("--timeout" , type=float , default=DEFAULT_TIMEOUT , help=f"seconds a request may take (compile and run), {DEFAULT_TIMEOUT:g} by default; 0 turns the limit off")
+    ap.add_argument("--max-pending" , type=int , help="--stdio requests in flight at a time, 4 per worker by default")
+    ap.add_argument("--max-steps" , type=int , default=DEFAULT_MAX_STEPS , help=f"instructions a program may run, {DEFAULT_MAX_STEPS} by default; 0 turns the limit off")
+    args = ap.parse_args()
+    server = CompileServer(workers=args.workers , timeout=args.timeout , max_steps=args.max_steps , max_pending=args.max_pending)
+    # terminated like interrupted: the workers are shut down with the server
+    signal.signal(signal.SIGTERM , lambda signum , frame : sys.exit(0))
+    try :
+        if args.stdio :
+            server.serve_stdio()
+        else :
+            server.serve_socket(args.socket)
+    except KeyboardInterrupt :
+        pass
+    finally :
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,22 @@
 # Pouria Erfanzadeh (401011180)
 # Group: G3
 
+import argparse
+import json
+import os
+
 from parser.parser import Parser
 from parser.syntax_errors import SyntaxErrors
-from scanner.buffer import BufferedFileReader
-from scanner.init_dfa import init_dfa
+from parser.phase import phase
+from parser.grammar_cache import load_compiled_grammar
+from parser.parser_generator import load_generated_parser
+from scanner.scanner import load_automaton , open_source
 from scanner.lexical_errors import LexicalErrors
 from scanner.symbol_table import SymbolTable
 from scanner.tokens import Tokens
+from scanner.buffer import StringReader
+from scanner.slice_scanner import SLICE_BUFFER_SIZE
+from scanner.artifact_writer import ArtifactWriter
 from code_gen.codeGen import CodeGen
 
 
@@ -17,27 +26,294 @@ def compile(
         code_file_path="input.txt" , 
         lexical_error_file_path="lexical_errors.txt" ,
         tokens_file_path="tokens.txt" ,
-        symbol_table_file_path="symbol_table.txt"
+        symbol_table_file_path="symbol_table.txt" ,
+        parse_tree_file_path="parse_tree.txt" ,
+        syntax_errors_file_path="syntax_errors.txt" ,
+        output_file_path="output.txt" ,
+        semantic_errors_file_path="semantic_errors.txt" ,
+        options=None ,
+        profile_path=None ,
+        stats_path=None ,
+        incremental=False ,
+        incremental_cache_path="incremental_cache.bin" ,
+        remove_stale=False ,
+        **switches
     ):
-    lexical_errors = LexicalErrors(file_path=lexical_error_file_path)
-    buffer = BufferedFileReader(file_path=code_file_path)
-    tokens = Tokens(tokens_file_path)
-    symbol_table = SymbolTable(file_path=symbol_table_file_path)
-    dfa = init_dfa()
-    codeGen = CodeGen(symbol_table=symbol_table)
-
-    P = Parser(buffer=buffer , dfa=dfa , lexical_errors=lexical_errors , 
-            tokens=tokens , symbol_table=symbol_table , syntax_errors=SyntaxErrors() , codeGen=codeGen , debug=False)
+    # compile_source() on a source file, with every artifact streamed to its
+    # *_file_path instead of kept in memory. What is built is options (a
+    # CompileOptions), or CompileOptions(**switches): scanner_mode, artifacts,
+    # parse_tree, parser_mode, source_reader="mmap", lex_workers,
+    # lex_pipeline, ... (see CompileOptions). With stats_path the stats trace
+    # memory unless stats_memory=False.
+    # profile_path writes per-nonterminal / per-action timings as JSON there,
+    # stats_path per-phase wall / CPU time, memory peaks and counts.
+    # incremental=True is a release build (artifacts=False is required) that only
+    # recompiles the top-level declarations changed since the last one (cached
+    # in incremental_cache_path); sources with lexical or syntax errors get the
+    # full build.
+    # remove_stale=True removes the tokens / parse tree files at
+    # tokens_file_path / parse_tree_file_path when this build does not write
+    # them, so none is left beside an output.txt it does not match. Nothing is
+    # removed otherwise.
+    # An exception that stops the parse is reported on stdout; one that stops
+    # code generation (e.g. no main) is raised once the other artifacts are written.
+    if options is None : 
+        switches.setdefault("stats_memory" , True)
+        options = CompileOptions(**switches)
+    elif switches : 
+        raise TypeError("pass either options or CompileOptions switches, not both")
+    options = options.but(profile=options.profile or profile_path is not None , stats=options.stats or stats_path is not None)
+    if incremental and options.artifacts : 
+        # it never writes tokens.txt, symbol_table.txt or parse_tree.txt
+        raise ValueError("incremental builds are release builds: pass artifacts=False")
+    if remove_stale and not options.artifacts : 
+        remove_files(tokens_file_path , parse_tree_file_path)
+    elif remove_stale and not options.parse_tree : 
+        remove_files(parse_tree_file_path)
+    files = {"tokens" : tokens_file_path , "lexical_errors" : lexical_error_file_path , "symbol_table" : symbol_table_file_path ,
+             "parse_tree" : parse_tree_file_path , "syntax_errors" : syntax_errors_file_path ,
+             "output" : output_file_path , "semantic_errors" : semantic_errors_file_path}
+
+    stats = None
+    if options.stats : 
+        from parser.compile_stats import CompileStats
+        stats = CompileStats(trace_memory=options.stats_memory)
+        stats.start()
+    result = None
+    if incremental : 
+        with phase(stats , "incremental") : 
+            result = compile_incremental(code_file_path , files , incremental_cache_path , options.scanner_mode)
+    if result is None : 
+        with phase(stats , "setup") : 
+            buffer = open_source(code_file_path , options.scanner_mode , options.source_reader , options.lex_workers , options.lex_pipeline)
+        result = run_compile(buffer , options , files , stats)
+    if result.parse_exception is not None : 
+        error = result.parse_exception
+        print(f":(((((( {type(error).__name__}: {error}")
+    if stats is not None : 
+        stats.error = result.error
+        stats.stop()
+        write_json(stats_path , stats.to_dict())
+    if profile_path is not None and result.profile is not None : 
+        write_json(profile_path , result.profile)
+    if result.generation_exception is not None : 
+        raise result.generation_exception
+
+def remove_files(*paths):
+    # artifacts this build does not write (remove_stale=True)
+    for path in paths : 
+        try : 
+            os.remove(path)
+        except FileNotFoundError : 
+            pass
+
+def write_json(path , data):
+    with open(path , "w" , encoding="utf-8") as f : 
+        json.dump(data , f , indent=2)
+
+def write_artifact(path , text):
+    # through a temporary file, like the streamed artifacts
+    writer = ArtifactWriter(path)
+    writer.write(text)
+    writer.commit()
+
+def compile_incremental(code_file_path , files , cache_path , scanner_mode="compiled") -> "CompileResult":
+    # the result of an incremental build, or None when the source needs the full one
+    from code_gen.incremental import compile_declarations
+    codeGen = compile_declarations(code_file_path , cache_path , load_automaton(scanner_mode))
+    if codeGen is None : 
+        return None
+    # only sources without lexical and syntax errors get here
+    LexicalErrors(file_path=files["lexical_errors"]).update_file()
+    SyntaxErrors(file_path=files["syntax_errors"]).update_file()
+    codeGen.set_exec_block("main")
+    write_artifact(files["output"] , codeGen.output_text())
+    write_artifact(files["semantic_errors"] , codeGen.semantic_errors_text())
+    written = {field : files[field] for field in ("lexical_errors" , "syntax_errors" , "output" , "semantic_errors")}
+    return CompileResult(tokens=None , lexical_errors=None , parse_tree=None , syntax_errors=None , output=None , semantic_errors=None ,
+                         program_block=list(codeGen.program_block) , files=written)
+
+class CompileOptions:
+    # What a compile builds: the switches of compile(), compile_source() and
+    # compile_batch.py, defined here only.
+    # artifacts=False is the release build: no tokens.txt, symbol_table.txt or
+    # parse_tree.txt, and no tokens / parse tree kept in memory for them.
+    # parse_tree=False only skips building and writing parse_tree.txt.
+    # parser_mode="diagrams" walks the transition diagrams instead of running
+    # the parser generated from them (same output, slower).
+    # source_reader ("buffered" / "mmap"), lex_workers > 1 (lex large sources
+    # in chunks on a process pool first) and lex_pipeline ("thread" /
+    # "process": lex on a producer beside the parser; not with lex_workers > 1)
+    # are how compile() reads its source file; compile_source has the text already.
+    # profile / stats: CompileResult.profile / .stats; stats_memory adds
+    # tracemalloc peaks, which are process wide (compile() only).
+    def __init__(self , scanner_mode="compiled" , artifacts=True , parse_tree=True , parser_mode="generated" , profile=False , stats=False ,
+                 source_reader="buffered" , lex_workers=1 , lex_pipeline=None , stats_memory=False):
+        self.scanner_mode = scanner_mode
+        self.artifacts = artifacts
+        self.parse_tree = parse_tree
+        self.parser_mode = parser_mode
+        self.profile = profile
+        self.stats = stats
+        self.source_reader = source_reader
+        self.lex_workers = lex_workers
+        self.lex_pipeline = lex_pipeline
+        self.stats_memory = stats_memory
+
+    def but(self , **changes) -> "CompileOptions":
+        # a copy with some switches changed
+        return CompileOptions(**{**vars(self) , **changes})
+
+
+class CompileResult:
+    # Everything one compile produced. Texts are exactly what compile() writes
+    # to the file of the same name; None for an artifact that was not built
+    # (tokens / parse tree without artifacts, parse tree without parse_tree;
+    # output / semantic_errors when the code could not be finished), or that
+    # was streamed to a file instead (files: field -> path, compile() only).
+    # error is the exception that stopped the parse or code generation, if
+    # any; parse_exception / generation_exception are the exceptions themselves.
+    FILES = {"tokens" : "tokens.txt" , "lexical_errors" : "lexical_errors.txt" , "parse_tree" : "parse_tree.txt" ,
+             "syntax_errors" : "syntax_errors.txt" , "output" : "output.txt" , "semantic_errors" : "semantic_errors.txt"}
+
+    def __init__(self , tokens , lexical_errors , parse_tree , syntax_errors , output , semantic_errors , program_block , error=None , profile=None , stats=None ,
+                 files=None , parse_exception=None , generation_exception=None):
+        self.tokens = tokens
+        self.lexical_errors = lexical_errors
+        self.parse_tree = parse_tree
+        self.syntax_errors = syntax_errors
+        self.output = output
+        self.semantic_errors = semantic_errors
+        # the generated instructions, without the line numbers of output.txt
+        self.program_block = program_block
+        self.error = error
+        self.profile = profile
+        self.stats = stats
+        self.files = files or {}
+        self.parse_exception = parse_exception
+        self.generation_exception = generation_exception
+
+    def artifacts(self) -> dict[str , str]:
+        # file name -> text, for the artifacts that were built in memory
+        texts = {name : getattr(self , field) for field , name in self.FILES.items()}
+        return {name : text for name , text in texts.items() if text is not None}
+
+    def write(self , directory="." , files=None):
+        # files: field -> file name (relative to directory) instead of FILES
+        os.makedirs(directory , exist_ok=True)
+        names = {**self.FILES , **(files or {})}
+        for field in self.FILES :
+            text = getattr(self , field)
+            if text is not None : 
+                with open(os.path.join(directory , names[field]) , "w" , encoding="utf-8") as f :
+                    f.write(text)
+
+
+def compile_source(text:str , options:CompileOptions=None) -> CompileResult:
+    # compile() without side effects: the source is a string, nothing is read
+    # from or written to the disk, and nothing is shared with other compiles but
+    # the loaded (read only) automaton, grammar and generated parser, so it can
+    # run concurrently in threads or one process per core
+    options = (options or CompileOptions()).but(stats_memory=False)
+    stats = None
+    if options.stats : 
+        from parser.compile_stats import CompileStats
+        stats = CompileStats(trace_memory=False)
+        stats.start()
+    with phase(stats , "setup") : 
+        buffer = StringReader(text , buffer_size=SLICE_BUFFER_SIZE if options.scanner_mode=="slice" else 1024)
+    result = run_compile(buffer , options , None , stats)
+    if stats is not None : 
+        stats.error = result.error
+        stats.stop()
+        result.stats = stats.to_dict()
+    return result
+
+
+def warm_up(scanner_modes=("compiled" ,)):
+    # loads the automata, the grammar and the generated parser once, e.g.
+    # before a process pool forks, so that every worker inherits them
+    for scanner_mode in scanner_modes : 
+        load_automaton(scanner_mode)
+    load_compiled_grammar()
+    load_generated_parser()
+
+
+def run_compile(buffer , options:CompileOptions , files:dict=None , stats=None) -> CompileResult:
+    # The one compile behind compile_source() and compile(). buffer reads the
+    # source; files maps the CompileResult.FILES fields (and "symbol_table") to
+    # the paths the artifacts are streamed to, or is None to keep every
+    # artifact in memory, in the result. stats is started and stopped by the caller.
+    path = files.get if files is not None else lambda field : None
+    with phase(stats , "setup") : 
+        lexical_errors = LexicalErrors(file_path=path("lexical_errors"))
+        tokens = Tokens(path("tokens")) if options.artifacts else None
+        symbol_table = SymbolTable(file_path=path("symbol_table"))
+        syntax_errors = SyntaxErrors(file_path=path("syntax_errors"))
+        codeGen = CodeGen(symbol_table=symbol_table)
+        profile = None
+        if options.profile : 
+            from parser.parse_profile import ParseProfile
+            profile = ParseProfile()
+
+        P = Parser(buffer=buffer , dfa=load_automaton(options.scanner_mode) , lexical_errors=lexical_errors , tokens=tokens ,
+                   symbol_table=symbol_table , syntax_errors=syntax_errors , codeGen=codeGen , build_tree=options.artifacts and options.parse_tree ,
+                   profile=profile , parser_mode=options.parser_mode , tree_path=path("parse_tree") , stats=stats)
+    parse_exception = generation_exception = None
     try : 
         P.start()
-    except :
-        print(":((((((")
+    except Exception as exc :
+        parse_exception = exc
+    buffer.close()
+
+    with phase(stats , "artifacts") : 
+        lexical_errors.update_file()
+        if tokens is not None : 
+            tokens.update_file()
+            symbol_table.update_file()
+    # without a parsed main there is no code to finish: no output.txt or
+    # semantic_errors.txt, and the error goes in the result
+    output = semantic_errors = None
+    try : 
+        with phase(stats , "code_generation") : 
+            codeGen.set_exec_block("main")
+        with phase(stats , "artifacts") : 
+            output , semantic_errors = codeGen.output_text() , codeGen.semantic_errors_text()
+    except Exception as exc :
+        generation_exception = exc
+    written = {}
+    if files is not None : 
+        # streamed artifacts are in their files, not in the result
+        with phase(stats , "artifacts") : 
+            for field , text in (("output" , output) , ("semantic_errors" , semantic_errors)) :
+                if text is not None : 
+                    write_artifact(files[field] , text)
+        built = {"tokens" : tokens is not None , "lexical_errors" : True ,
+                 "parse_tree" : options.artifacts and options.parse_tree and parse_exception is None ,
+                 "syntax_errors" : parse_exception is None , "output" : output is not None , "semantic_errors" : semantic_errors is not None}
+        written = {field : files[field] for field , done in built.items() if done}
+        output = semantic_errors = None
+    error = parse_exception or generation_exception
+    return CompileResult(tokens=tokens.writer.text if tokens is not None else None ,
+                         lexical_errors=lexical_errors.writer.text ,
+                         parse_tree=P.tree_text ,
+                         syntax_errors=syntax_errors.writer.text ,
+                         output=output ,
+                         semantic_errors=semantic_errors ,
+                         program_block=list(codeGen.program_block) ,
+                         error=f"{type(error).__name__}: {error}" if error is not None else None ,
+                         profile=profile.to_dict() if profile is not None else None ,
+                         files=written ,
+                         parse_exception=parse_exception ,
+                         generation_exception=generation_exception)
 
-    lexical_errors.update_file()
-    tokens.update_file()
-    symbol_table.update_file()
-    P.codeGen.set_exec_block("main")
-    P.codeGen.export(file_path="output.txt")
-    P.codeGen.export_semantic_errors(file_path="semantic_errors.txt")
+def main():
+    ap = argparse.ArgumentParser(description="compile a source file; the artifacts are written to the working directory")
+    ap.add_argument("-i" , "--input_file" , default="input.txt" , help="Path to the input file")
+    ap.add_argument("--stats" , metavar="PATH" , nargs="?" , const="compile_stats.json" , help="write per-phase time / memory / count statistics as JSON (default compile_stats.json)")
+    ap.add_argument("--stats-no-memory" , action="store_true" , help="statistics without tracemalloc (which slows the compile down)")
+    args = ap.parse_args()
+    compile(code_file_path=args.input_file , stats_path=args.stats , stats_memory=not args.stats_no_memory)
 
-compile()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
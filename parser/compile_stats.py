@@ -0,0 +1,114 @@
+import json
+import time
+import tracemalloc
+
+
+class CompileStats:
+    # Per-phase cost of one compile, attached with compile(stats_path=...) or
+    # Parser(..., stats=CompileStats()). Phases run one after the other and a
+    # phase entered twice (the parser and compile() both write artifacts) adds up.
+    #   setup: loading the automaton / grammar / parser, building the Parser
+    #   parse: the whole P.start() parse; lexing and semantic actions run
+    #          interleaved inside it, so they are timed per call and reported
+    #          as its parts ("lexing", "semantic_actions", the rest is "parsing")
+    #   code_generation: finishing the program block (the jump to main)
+    #   artifacts: writing parse_tree.txt, tokens.txt, output.txt, ...
+    # Every phase has wall and CPU time and, with trace_memory, the tracemalloc
+    # peak reached during it. tracemalloc slows the whole compile down; the
+    # times are comparable between runs made with the same setting only.
+    # Lexing and the actions are timed by the Parser's Instruments
+    # (parser/instrumentation.py), the same wrappers a ParseProfile uses.
+    def __init__(self , trace_memory=True , clock=time.perf_counter , cpu_clock=time.process_time):
+        self.trace_memory = trace_memory
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.phases : dict[str , dict] = {}
+        self.lexing = [0.0 , 0.0]
+        self.actions = [0 , 0.0 , 0.0]
+        self.tokens = 0
+        self.parse_tree_nodes = None
+        self.semantic_stack_high_water = 0
+        self.program_block : list = None
+        self.semantic_stack : list = None
+        self.error : str = None
+        self.started_tracing = False
+        self.started = None
+        self.total = None
+
+    def attach(self , codeGen):
+        # instructions and the semantic stack are read from this codeGen
+        self.program_block = codeGen.program_block
+        self.semantic_stack = codeGen.semantic_stack
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing() :
+            tracemalloc.start()
+            self.started_tracing = True
+        self.started = (self.clock() , self.cpu_clock())
+
+    def stop(self):
+        if self.started is None :
+            return
+        wall , cpu = self.started
+        self.total = {"wall" : self.clock() - wall , "cpu" : self.cpu_clock() - cpu}
+        if self.started_tracing :
+            tracemalloc.stop()
+            self.started_tracing = False
+        self.started = None
+
+    def phase(self , name : str):
+        return Phase(self , name)
+
+    def to_dict(self) -> dict:
+        phases = {name : dict(stats) for name , stats in self.phases.items()}
+        parse = phases.get("parse")
+        if parse is not None :
+            lexing = {"wall" : self.lexing[0] , "cpu" : self.lexing[1] , "tokens" : self.tokens}
+            actions = {"wall" : self.actions[1] , "cpu" : self.actions[2] , "calls" : self.actions[0]}
+            parsing = {"wall" : parse["wall"] - lexing["wall"] - actions["wall"] , "cpu" : parse["cpu"] - lexing["cpu"] - actions["cpu"]}
+            parse.update(tokens=self.tokens , parse_tree_nodes=self.parse_tree_nodes ,
+                         semantic_stack_high_water=self.semantic_stack_high_water ,
+                         parts={"lexing" : lexing , "semantic_actions" : actions , "parsing" : parsing})
+        total = dict(self.total or {})
+        total.update(tokens=self.tokens , parse_tree_nodes=self.parse_tree_nodes ,
+                     instructions=len(self.program_block) if self.program_block is not None else None ,
+                     semantic_stack_high_water=self.semantic_stack_high_water)
+        if self.trace_memory :
+            total["peak_memory"] = max((stats["peak_memory"] for stats in phases.values()) , default=0)
+        return {"trace_memory" : self.trace_memory , "phases" : phases , "total" : total , "error" : self.error}
+
+    def export(self , file_path="compile_stats.json"):
+        with open(file_path , "w" , encoding="utf-8") as f :
+            json.dump(self.to_dict() , f , indent=2)
+
+
+class Phase:
+    # with stats.phase("parse"): ... adds that block to the phase
+    def __init__(self , stats : CompileStats , name : str):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        stats = self.stats
+        if tracemalloc.is_tracing() :
+            tracemalloc.reset_peak()
+        self.instructions = len(stats.program_block) if stats.program_block is not None else 0
+        self.started = (stats.clock() , stats.cpu_clock())
+        return self
+
+    def __exit__(self , *exc_info):
+        stats = self.stats
+        wall , cpu = self.started
+        wall , cpu = stats.clock() - wall , stats.cpu_clock() - cpu
+        phase = stats.phases.get(self.name)
+        if phase is None :
+            phase = stats.phases[self.name] = {"wall" : 0.0 , "cpu" : 0.0 , "instructions" : 0}
+            if stats.trace_memory :
+                phase["peak_memory"] = 0
+        phase["wall"] += wall
+        phase["cpu"] += cpu
+        if stats.program_block is not None :
+            phase["instructions"] += len(stats.program_block) - self.instructions
+        if stats.trace_memory and tracemalloc.is_tracing() :
+            phase["peak_memory"] = max(phase["peak_memory"] , tracemalloc.get_traced_memory()[1])
+        return False
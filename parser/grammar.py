@@ -0,0 +1,173 @@
+import sys
+
+from parser.prediction import PredictionTable
+
+
+def extract_action_params(action : str) -> list[str]:
+    if "(" not in action : 
+        return []
+    return action[action.find('(')+1:action.rfind(')')].split(',')
+
+def extract_action_action(action : str):
+    if "(" not in action : 
+        return action[1:]
+    return action[1:action.find('(')]
+
+
+class TdNode:
+    __slots__ = ("id" , "component" , "is_accept" , "edges")
+
+    def __init__(self ,component: str , id : int , is_accept : bool = False):
+        self.id = id
+        self.component = component
+        self.is_accept = is_accept
+        self.edges = []
+    def add_edge(self , edge: str , dest : int , actions:dict[str , list[str]]=None):
+        # a dict of its own per edge: a shared default would collect every edge's actions
+        if actions is None : 
+            actions = {"start":[] , "finish":[]}
+        self.edges.append((edge , dest , actions))
+
+    def __str__(self):
+        return f'{self.id} ,{self.component} , {self.is_accept} , {self.edges}'
+
+class TdGraph:
+    def __init__(self):
+        self.non_terminal_first : dict[str , int] = {}
+        self.cur_id : int = 0
+        self.nodes : dict[int , TdNode] = {}
+
+    def add_node(self , component : str , is_accept : bool = False) -> int:
+        self.cur_id+=1
+        node = TdNode(component=component , id = self.cur_id ,  is_accept=is_accept)
+        if component not in self.non_terminal_first : 
+            self.non_terminal_first[component] = self.cur_id
+        self.nodes[self.cur_id] = node
+        return self.cur_id
+
+    def add_edge(self , start: int , edge : str, dest : int , actions:dict[str , list[str]]=None):
+        self.nodes[start].add_edge(edge , dest , actions=actions)
+
+    def get_edge_actions(self , start: int , edge : str  , dest : int):
+        for e in self.nodes[start].edges : 
+            if e[0]==edge and e[1]==dest : 
+                return e[2]
+        return None
+    
+    def get_first_non_terminal(self , component : str) -> int: 
+        try : 
+            return self.non_terminal_first[component]
+        except:
+            return  -1
+    
+    def __str__(self):
+        return "\n".join([f"{i} : {self.nodes[i]}" for i in self.nodes.keys()]) + "\n" + str(self.non_terminal_first)
+
+
+class CompiledGrammar:
+    # Everything the parser derives from grammar.txt / first.txt / follow.txt:
+    # the transition diagrams, the parsed semantic actions of every edge and the
+    # prediction table. parser/grammar_cache.py stores it between runs.
+    def __init__(self , grammar_path : str , follow_path : str , first_path : str):
+        self.nonTerminals : list[str] = []
+        self.terminals : list[str] = []
+        self.grammar = self.load_grammar(grammar_path) 
+        self.follows = self.load_follow_first(follow_path)
+        self.firsts = self.load_follow_first(first_path)
+        self.terminal_set = frozenset(self.terminals)
+
+        self.graph : TdGraph = TdGraph()
+        self.makeTdGraph()
+        self.edge_actions = self.parse_actions()
+        self.prediction = PredictionTable.build(self.graph , self.terminals , self.firsts , self.follows)
+
+    def intern_symbols(self):
+        # unpickled strings are fresh objects: intern them again so that grammar
+        # symbols can keep being compared by identity
+        intern = sys.intern
+        self.nonTerminals = [intern(x) for x in self.nonTerminals]
+        self.terminals = [intern(x) for x in self.terminals]
+        self.terminal_set = frozenset(self.terminals)
+        self.grammar = {intern(k) : [[intern(u) for u in alt] for alt in alts] for k , alts in self.grammar.items()}
+        self.follows = {intern(k) : [intern(u) for u in v] for k , v in self.follows.items()}
+        self.firsts = {intern(k) : [intern(u) for u in v] for k , v in self.firsts.items()}
+        self.graph.non_terminal_first = {intern(k) : v for k , v in self.graph.non_terminal_first.items()}
+        for node in self.graph.nodes.values():
+            node.component = intern(node.component)
+            node.edges = [(intern(edge) , dest , actions) for edge , dest , actions in node.edges]
+        prediction = self.prediction
+        prediction.symbols = [None] + [intern(x) for x in prediction.symbols[1:]]
+        prediction.look_ids = {s : i for i , s in enumerate(prediction.symbols) if s is not None}
+
+    def load_grammar(self , path : str) -> dict[str , list[list[str]]]:
+        d = {}
+        with open(path , "r" , encoding="utf8") as f : 
+            for line in f :
+                line = line.strip()
+                if not line : 
+                    continue
+                lhs , rhs = [x.strip() for x in line.split("->" , 1)]
+                lhs = sys.intern(lhs)
+                self.nonTerminals.append(lhs)
+                self.terminals.append(lhs)
+                for alt in rhs.split("|"):
+                    alt = [sys.intern(u) for u in alt.split()]
+                    try :
+                        d[lhs].append(alt)
+                    except:
+                        d[lhs] = []
+                        d[lhs].append(alt)
+                    self.terminals.extend(alt)
+        self.terminals = list(set(self.terminals))
+        self.nonTerminals = list(set(self.nonTerminals))
+        for i in self.nonTerminals : 
+            if i in self.terminals : 
+                self.terminals.remove(i)
+        self.terminals = [i for i in self.terminals if i[0]!="#" ]
+        self.nonTerminals = [i for i in self.nonTerminals if i[0]!="#" ]
+        return d
+    
+    def load_follow_first(self , path : str) -> dict[str , list[str]]:
+        d = {}
+        with open(path , "r" , encoding="utf8") as f : 
+            for line in f : 
+                line = line.strip().split()
+                d[sys.intern(line[0])] = [sys.intern(u) for u in line[1:]]
+        return d
+    
+    def tdGraph_accept_index(self , path):
+        for i in range(len(path)-1 , -1 , -1):
+            if path[i][0]!="#" : 
+                return i
+        
+    def makeTdGraph(self):
+        for v in self.grammar.keys():
+            cur_id = self.graph.add_node(v)
+            for path in self.grammar[v] : 
+                actions = []
+                cur_id = self.graph.get_first_non_terminal(v)
+                accept_index = self.tdGraph_accept_index(path=path)
+                last_actions = None
+                for i in range(len(path)):
+                    u = path[i]
+                    if u[0]=="#" : 
+                        actions.append(u)
+                        continue
+                    new_id = self.graph.add_node(v , is_accept=(i==accept_index))
+                    last_actions = {"start":actions.copy() , "finish":[]}
+                    self.graph.add_edge(cur_id , u , new_id , actions=last_actions)
+                    actions.clear()
+                    cur_id = new_id
+                if len(actions) > 0 : 
+                    last_actions["finish"] = actions
+
+    def parse_actions(self):
+        # per node, per edge (in the order of node.edges): the start and finish
+        # actions as (action, subroutine name, params) with the params split once
+        edge_actions = {}
+        for node in self.graph.nodes.values():
+            edges = []
+            for edge , dest , actions in node.edges : 
+                edges.append(tuple(tuple((action , extract_action_action(action) , tuple(extract_action_params(action))) for action in actions[key]) for key in ("start" , "finish")))
+            edge_actions[node.id] = tuple(edges)
+        return edge_actions
@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+from parser.grammar import CompiledGrammar
+from scanner.pickle_cache import read_cache , save_cache
+
+# bump when the layout of the stored fields changes
+FORMAT_VERSION = 2
+
+PARSER_DIR = os.path.dirname(os.path.abspath(__file__))
+GRAMMAR_DIR = os.path.join(PARSER_DIR , "grammar_config")
+GRAMMAR_PATH = os.path.join(GRAMMAR_DIR , "grammar.txt")
+FOLLOW_PATH = os.path.join(GRAMMAR_DIR , "follow.txt")
+FIRST_PATH = os.path.join(GRAMMAR_DIR , "first.txt")
+CACHE_PATH = os.path.join(PARSER_DIR , ".cache" , "grammar.bin")
+# the code that turns the config files into a CompiledGrammar
+DEFINITION_FILES = ["grammar.py" , "prediction.py"]
+# grammars already loaded by this process, by key: parsers built one after the
+# other (e.g. one per declaration in incremental builds) share one
+LOADED : dict[str , CompiledGrammar] = {}
+# keys already hashed by this process, by the files' (path , mtime , size):
+# every Parser asks for them, a warm worker should not read the files each time
+KEYS : dict[tuple , str] = {}
+
+
+def cached_key(name:str , paths:list , compute) -> str:
+    # compute(), hashed again only when one of paths changed mtime or size
+    signature = (name ,) + tuple((path , st.st_mtime_ns , st.st_size) for path , st in ((path , os.stat(path)) for path in paths))
+    key = KEYS.get(signature)
+    if key is None :
+        key = KEYS[signature] = compute()
+    return key
+
+
+def grammar_key(grammar_path:str , follow_path:str , first_path:str) -> str:
+    paths = [grammar_path , follow_path , first_path] + [os.path.join(PARSER_DIR , name) for name in DEFINITION_FILES]
+
+    def compute():
+        h = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+        for path in paths :
+            with open(path , "rb") as f :
+                h.update(f.read())
+            h.update(b"\0")
+        return h.hexdigest()
+    return cached_key("grammar" , paths , compute)
+
+
+def save_compiled_grammar(grammar:CompiledGrammar , key:str , cache_path:str=CACHE_PATH):
+    save_cache(cache_path , FORMAT_VERSION , key , {"grammar" : grammar})
+
+
+def read_compiled_grammar(key:str , cache_path:str=CACHE_PATH) -> CompiledGrammar:
+    payload = read_cache(cache_path , FORMAT_VERSION , key)
+    grammar = None if payload is None else payload.get("grammar")
+    if not isinstance(grammar , CompiledGrammar) :
+        return None
+    try :
+        grammar.intern_symbols()
+    except Exception :
+        # a damaged artifact with a valid key: rebuilt like any other miss
+        return None
+    return grammar
+
+
+def load_compiled_grammar(grammar_path:str=GRAMMAR_PATH , follow_path:str=FOLLOW_PATH , first_path:str=FIRST_PATH , cache_path:str=CACHE_PATH) -> CompiledGrammar:
+    key = grammar_key(grammar_path , follow_path , first_path)
+    grammar = LOADED.get(key)
+    if grammar is not None :
+        return grammar
+    grammar = read_compiled_grammar(key , cache_path)
+    if grammar is None :
+        grammar = CompiledGrammar(grammar_path , follow_path , first_path)
+        save_compiled_grammar(grammar , key , cache_path)
+    LOADED[key] = grammar
+    return grammar
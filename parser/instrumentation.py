@@ -0,0 +1,70 @@
+from scanner.tokens import KIND_WHITE
+
+
+class Instruments:
+    # The wrappers a parse gets for its ParseProfile and / or CompileStats:
+    # every bound semantic routine is wrapped once and the token stream
+    # counted once, whichever of the two are attached, and each call is timed
+    # once and its numbers given to both. Parser only builds one when a
+    # profile or stats are attached, so a plain parse runs none of it.
+    #   profile: calls and wall time per action, token count
+    #   stats: calls, wall and CPU time of all actions, the semantic-stack
+    #          high-water mark, wall and CPU time spent lexing, token count
+    # With stats the times come from stats.clock / stats.cpu_clock, otherwise
+    # from profile.clock.
+    def __init__(self , profile=None , stats=None):
+        self.profile = profile
+        self.stats = stats
+        self.clock = stats.clock if stats is not None else profile.clock
+
+    def wrap_action(self , action : str , routine):
+        counts = self.profile.action_counts(action) if self.profile is not None else None
+        clock = self.clock
+        stats = self.stats
+        if stats is None :
+            def timed(token , param):
+                start = clock()
+                routine(token=token , param=param)
+                counts[0] += 1
+                counts[1] += clock() - start
+            return timed
+
+        cpu_clock , actions = stats.cpu_clock , stats.actions
+
+        def timed(token , param):
+            wall , cpu = clock() , cpu_clock()
+            routine(token=token , param=param)
+            wall , cpu = clock() - wall , cpu_clock() - cpu
+            actions[0] += 1
+            actions[1] += wall
+            actions[2] += cpu
+            if counts is not None :
+                counts[0] += 1
+                counts[1] += wall
+            if stats.semantic_stack is not None and len(stats.semantic_stack) > stats.semantic_stack_high_water :
+                stats.semantic_stack_high_water = len(stats.semantic_stack)
+        return timed
+
+    def tokens(self , stream):
+        profile , stats = self.profile , self.stats
+        if stats is None :
+            for tok in stream :
+                if tok.kind!=KIND_WHITE :
+                    profile.tokens += 1
+                yield tok
+            return
+        # the time spent in the token stream is lexing (and the symbol table and
+        # tokens.txt writes that come with each token)
+        clock , cpu_clock , lexing = self.clock , stats.cpu_clock , stats.lexing
+        while True :
+            wall , cpu = clock() , cpu_clock()
+            tok = next(stream , None)
+            lexing[0] += clock() - wall
+            lexing[1] += cpu_clock() - cpu
+            if tok is None :
+                return
+            if tok.kind!=KIND_WHITE :
+                stats.tokens += 1
+                if profile is not None :
+                    profile.tokens += 1
+            yield tok
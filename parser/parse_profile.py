@@ -0,0 +1,74 @@
+import json
+import time
+
+
+class ParseProfile:
+    # Instrumentation for one parse, attached with Parser(..., profile=ParseProfile()).
+    # Nothing of it runs without a profile: semantic routines are only wrapped,
+    # and the token stream only counted (parser/instrumentation.py), when one is attached.
+    #   nonterminals: entries, inclusive time and self time (children excluded)
+    #   actions: calls and time per semantic action
+    #   recoveries: one event per panic-mode recovery
+    #   tokens / parse time: throughput of the whole parse
+    def __init__(self , clock=time.perf_counter):
+        self.clock = clock
+        self.nonterminals : dict[str , list] = {}
+        self.actions : dict[str , list] = {}
+        self.recoveries : list[dict] = []
+        self.tokens = 0
+        self.parse_time = 0.0
+        self.frames = []
+        self.started = None
+
+    def start(self):
+        self.started = self.clock()
+
+    def stop(self):
+        if self.started is not None :
+            self.parse_time += self.clock() - self.started
+            self.started = None
+
+    def enter(self , nonterminal : str):
+        stats = self.nonterminals.get(nonterminal)
+        if stats is None :
+            stats = self.nonterminals[nonterminal] = [0 , 0.0 , 0.0]
+        stats[0] += 1
+        # [stats , start , time spent in children]
+        self.frames.append([stats , self.clock() , 0.0])
+
+    def exit(self):
+        stats , start , children = self.frames.pop()
+        elapsed = self.clock() - start
+        stats[1] += elapsed
+        stats[2] += elapsed - children
+        if self.frames :
+            self.frames[-1][2] += elapsed
+
+    def recovery(self , kind : str , line : int , nonterminal : str , symbol : str):
+        self.recoveries.append({"kind" : kind , "line" : line , "nonterminal" : nonterminal , "symbol" : symbol})
+
+    def action_counts(self , action : str) -> list:
+        # [calls , time] of action, updated by the routine Instruments wraps for it
+        counts = self.actions.get(action)
+        if counts is None :
+            counts = self.actions[action] = [0 , 0.0]
+        return counts
+
+    def to_dict(self) -> dict:
+        kinds = {}
+        for event in self.recoveries :
+            kinds[event["kind"]] = kinds.get(event["kind"] , 0) + 1
+        nonterminals = sorted(self.nonterminals.items() , key=lambda item : -item[1][2])
+        actions = sorted(self.actions.items() , key=lambda item : -item[1][1])
+        return {
+            "parse_time" : self.parse_time ,
+            "tokens" : self.tokens ,
+            "tokens_per_second" : self.tokens / self.parse_time if self.parse_time else 0.0 ,
+            "nonterminals" : {nt : {"count" : count , "time" : total , "self_time" : own} for nt , (count , total , own) in nonterminals} ,
+            "actions" : {action : {"count" : count , "time" : total} for action , (count , total) in actions if count} ,
+            "recoveries" : {"counts" : kinds , "events" : self.recoveries} ,
+        }
+
+    def export(self , file_path="parse_profile.json"):
+        with open(file_path , "w" , encoding="utf-8") as f :
+            json.dump(self.to_dict() , f , indent=2)
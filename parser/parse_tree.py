@@ -0,0 +1,117 @@
+from array import array
+
+
+class ParseTree:
+    # Arena of parse tree nodes: node i is described by parallel arrays instead
+    # of one object (with its own children list) per node.
+    #   label[i]: id of the node's text in labels (every distinct text is stored once)
+    #   first_child[i] / last_child[i] / next_sibling[i]: node indexes, -1 for none
+    # Node 0 is the root.
+    ROOT = 0
+
+    def __init__(self , root_label : str = "Program"):
+        self.labels : list[str] = []
+        self.label_ids : dict[str , int] = {}
+        self.label = array("i")
+        self.first_child = array("i")
+        self.last_child = array("i")
+        self.next_sibling = array("i")
+        self.add_node(root_label)
+
+    def __len__(self):
+        return len(self.label)
+
+    def label_id(self , text : str) -> int:
+        label_id = self.label_ids.get(text)
+        if label_id is None :
+            label_id = self.label_ids[text] = len(self.labels)
+            self.labels.append(text)
+        return label_id
+
+    def add_node(self , text : str) -> int:
+        node = len(self.label)
+        self.label.append(self.label_id(text))
+        self.first_child.append(-1)
+        self.last_child.append(-1)
+        self.next_sibling.append(-1)
+        return node
+
+    def add_child(self , parent : int , text : str) -> int:
+        node = self.add_node(text)
+        last = self.last_child[parent]
+        if last < 0 :
+            self.first_child[parent] = node
+        else :
+            self.next_sibling[last] = node
+        self.last_child[parent] = node
+        return node
+
+    def text(self , node : int) -> str:
+        return self.labels[self.label[node]]
+
+    def children(self , node : int):
+        child = self.first_child[node]
+        while child >= 0 :
+            yield child
+            child = self.next_sibling[child]
+
+    def view(self , node : int = ROOT) -> "PtView":
+        return PtView(self , node)
+
+    def iter_lines(self , node : int = ROOT , prefix : str = ''):
+        # same lines as PtNode.iter_lines: the stack holds the next node to print
+        # at every open level (-1 once a level is done), parts the prefix pieces
+        label = self.label
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        program = self.label_ids.get("Program" , -1)
+        parts = [prefix]
+        stack = [node]
+        while stack :
+            i = stack[-1]
+            if i < 0 :
+                stack.pop()
+                parts.pop()
+                continue
+            # the node the rendering starts from is printed without its siblings
+            sibling = next_sibling[i] if len(stack) > 1 else -1
+            stack[-1] = sibling
+            if label[i] == program :
+                joint , part = '' , ''
+            elif sibling < 0 :
+                joint , part = '└── ' , '    '
+            else :
+                joint , part = '├── ' , '│   '
+            yield "".join(parts) + joint + labels[label[i]]
+            child = first_child[i]
+            if child >= 0 :
+                parts.append(part)
+                stack.append(child)
+
+
+class PtView:
+    # Read-only handle on one node of a ParseTree with the PtNode interface
+    # (label, children, to_lines, iter_lines); views are made on demand.
+    __slots__ = ("tree" , "node")
+
+    def __init__(self , tree : ParseTree , node : int):
+        self.tree = tree
+        self.node = node
+
+    @property
+    def label(self) -> str:
+        return self.tree.text(self.node)
+
+    @property
+    def children(self) -> list["PtView"]:
+        return [PtView(self.tree , child) for child in self.tree.children(self.node)]
+
+    def iter_lines(self , prefix : str = ''):
+        return self.tree.iter_lines(self.node , prefix)
+
+    def to_lines(self , prefix : str = '') -> list[str]:
+        return list(self.iter_lines(prefix))
+
+    def __repr__(self):
+        return f"PtView({self.node}, {self.label!r})"
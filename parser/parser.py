@@ -1,59 +1,23 @@
 from parser.syntax_errors import SyntaxErrors
 from scanner.buffer import BufferedFileReader
+from scanner.artifact_writer import ArtifactWriter
 from scanner.DFA import DFA
-from scanner.tokens import Tokens
+from scanner.tokens import Tokens , KIND_KEYWORD , KIND_SYMBOL , KIND_WHITE
 from scanner.lexical_errors import LexicalErrors
 from scanner.symbol_table import SymbolTable
-from scanner.get_next_token import get_next_token
+from scanner.get_next_token import iter_tokens
 from scanner.init_dfa import init_dfa
 from code_gen.codeGen import CodeGen
-from scanner.symbol_table import Token
-class TdNode:
-    def __init__(self ,component: str , id : int , is_accept : bool = False):
-        self.id = id
-        self.component = component
-        self.is_accept = is_accept
-        self.edges = []
-    def add_edge(self , edge: str , dest : int , actions:dict[str , list[str]]={"start":[] , "finish":[]}):
-        self.edges.append((edge , dest , actions))
-
-    def __str__(self):
-        return f'{self.id} ,{self.component} , {self.is_accept} , {self.edges}'
-
-class TdGraph:
-    def __init__(self):
-        self.non_terminal_first : dict[str , int] = {}
-        self.cur_id : int = 0
-        self.nodes : dict[int , TdNode] = {}
-
-    def add_node(self , component : str , is_accept : bool = False) -> int:
-        self.cur_id+=1
-        node = TdNode(component=component , id = self.cur_id ,  is_accept=is_accept)
-        if component not in self.non_terminal_first : 
-            self.non_terminal_first[component] = self.cur_id
-        self.nodes[self.cur_id] = node
-        return self.cur_id
-
-    def add_edge(self , start: int , edge : str, dest : int , actions:dict[str , list[str]]={"start":[] , "finish":[]}):
-        self.nodes[start].add_edge(edge , dest , actions=actions)
-
-    def get_edge_actions(self , start: int , edge : str  , dest : int):
-        for e in self.nodes[start].edges : 
-            if e[0]==edge and e[1]==dest : 
-                return e[2]
-        return None
-    
-    def get_first_non_terminal(self , component : str) -> int: 
-        try : 
-            return self.non_terminal_first[component]
-        except:
-            return  -1
-    
-    def __str__(self):
-        return "\n".join([f"{i} : {self.nodes[i]}" for i in self.nodes.keys()]) + "\n" + str(self.non_terminal_first)
-
+from parser.parse_tree import ParseTree , PtView
+from parser.phase import phase
+from parser.prediction import EPSILON , RECOVER_EOF , RECOVER_ILLEGAL
+from parser.grammar import TdGraph
+from parser.grammar_cache import load_compiled_grammar , GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH
+from parser.parser_generator import load_generated_parser
 
 class PtNode:
+    __slots__ = ("label" , "children")
+
     def __init__(self,label : str):
         self.label = label
         self.children : list[PtNode] = []
@@ -62,18 +26,31 @@ class PtNode:
         self.children.append(child)
     
     def to_lines(self,prefix : str = '' , is_last : bool = True) -> list[str]:
-        joint = joint = '└── ' if is_last else '├── '
-        if self.label == "Program" : 
-            joint = ''
-        line  = prefix + joint + self.label
-        lines = [line]
-        child_prefix = prefix + ('    ' if is_last else '│   ')
-        if self.label == "Program" : 
-            child_prefix = prefix
-        for i, child in enumerate(self.children):
-            last = i ==(len(self.children) - 1)
-            lines.extend(child.to_lines(child_prefix, last))
-        return lines
+        return list(self.iter_lines(prefix , is_last))
+
+    def iter_lines(self , prefix : str = '' , is_last : bool = True):
+        # Lines of the tree, one at a time and without recursion. One iterator
+        # over the children per open node; parts holds the prefix piece each open
+        # node adds, so only the line being yielded is ever built.
+        parts = [prefix]
+        stack = [iter([(self , is_last)])]
+        while stack : 
+            entry = next(stack[-1] , None)
+            if entry is None : 
+                stack.pop()
+                parts.pop()
+                continue
+            node , is_last = entry
+            if node.label == "Program" : 
+                joint , part = '' , ''
+            else : 
+                joint = '└── ' if is_last else '├── '
+                part = '    ' if is_last else '│   '
+            yield "".join(parts) + joint + node.label
+            children = node.children
+            if children : 
+                parts.append(part)
+                stack.append(zip(children , [False] * (len(children) - 1) + [True]))
     
 class Parser : 
     def __init__(self , buffer:BufferedFileReader 
@@ -83,25 +60,38 @@ class Parser :
                       , symbol_table:SymbolTable 
                       , syntax_errors : SyntaxErrors 
                       , codeGen : CodeGen
-                      , grammar_path : str = "parser/grammar_config/grammar.txt"
-                      , follow_path : str = "parser/grammar_config/follow.txt"
-                      , first_path : str = "parser/grammar_config/first.txt" 
+                      , grammar_path : str = GRAMMAR_PATH
+                      , follow_path : str = FOLLOW_PATH
+                      , first_path : str = FIRST_PATH 
                       , debug:bool = False
+                      , build_tree:bool = True
+                      , profile : "ParseProfile" = None
+                      , parser_mode : str = "generated"
+                      , tree_path : str = "parse_tree.txt"
+                      , stats : "CompileStats" = None
                  ):
 
-        self.nonTerminals : list[str] = []
-        self.terminals : list[str] = []
-        self.grammar = self.load_grammar(grammar_path) 
-        self.follows = self.load_follow_first(follow_path)
-        self.firsts = self.load_follow_first(first_path)
+        # diagrams, parsed actions and prediction table come from the grammar artifact cache
+        compiled = load_compiled_grammar(grammar_path , follow_path , first_path)
+        self.nonTerminals : list[str] = compiled.nonTerminals
+        self.terminals : list[str] = compiled.terminals
+        self.grammar = compiled.grammar
+        self.follows = compiled.follows
+        self.firsts = compiled.firsts
 
-        self.graph : TdGraph = TdGraph()
-        self.makeTdGraph()
+        self.graph : TdGraph = compiled.graph
+        self.terminal_set = compiled.terminal_set
+        self.edge_actions = compiled.edge_actions
+        # every edge choice and recovery, indexed by (diagram node, lookahead id)
+        self.prediction = compiled.prediction
 
         self.cur_symbol : str = None
+        self.cur_look : int = 0
         self.cur_token = None
         
-        self.parse_tree_root : PtNode = None
+        # the tree lives in an arena; nodes are handled as indexes into it
+        self.parse_tree : ParseTree = None
+        self.parse_tree_root : PtView = None
 
         self.syntax_errors = syntax_errors
 
@@ -110,157 +100,288 @@ class Parser :
         self.lexical_errors = lexical_errors
         self.tokens = tokens
         self.symbol_table = symbol_table
+        # tokens=None: no tokens.txt and nothing kept per token
+        self.token_stream = iter_tokens(buffer=self.buffer , dfa=self.dfa , lexical_errors=self.lexical_errors , 
+                                        tokens=self.tokens , symbol_table=self.symbol_table , add_tokens=self.tokens is not None)
 
         self.codeGen = codeGen
+        # profile=ParseProfile() times nonterminals and actions and counts tokens
+        # and recoveries; without one none of that code runs
+        self.profile = profile
+        # stats=CompileStats() times the parse and artifact phases, and lexing
+        # and the semantic actions inside the parse
+        self.stats = stats
+        if stats is not None : 
+            stats.attach(codeGen)
+        # both share one set of wrappers (parser/instrumentation.py)
+        self.instruments = None
+        if profile is not None or stats is not None : 
+            from parser.instrumentation import Instruments
+            self.instruments = Instruments(profile , stats)
+            self.token_stream = self.instruments.tokens(self.token_stream)
+        # the semantic actions of every edge resolved against this codeGen:
+        # edge_calls[node id][edge index] = (start calls , finish calls),
+        # action_routines[action] = routine for the generated parser
+        self.action_routines = {}
+        self.edge_calls = self.bind_actions(self.edge_actions)
 
         self.eof_error_occured = False
         self.debug = debug
+        # parser_mode="generated": the functions parser_generator.py writes for
+        # the grammar; "diagrams": parse_nonterminal walks the diagrams. The
+        # debug trace is only printed by the diagram walk.
+        if parser_mode not in ("generated" , "diagrams") : 
+            raise ValueError(f"unknown parser mode {parser_mode!r}")
+        self.parser_mode = "diagrams" if debug else parser_mode
+        self.generated = None
+        if self.parser_mode == "generated" : 
+            self.generated = load_generated_parser(grammar_path , follow_path , first_path)
+        # without the tree no node is created and parse_tree.txt is not written;
+        # tree_path=None keeps the rendered tree in self.tree_text instead
+        self.build_tree = build_tree
+        self.tree_path = tree_path
+        self.tree_text : str = None
 
     def start(self):
-        self.advance()
-        root = PtNode("Program")
-        self.parse_nonterminal("Program" , root)
-        
-        self.parse_tree_root = root
-        self.write_tree()
-        self.syntax_errors.update_file()
-
-
-    def parse_nonterminal(self , cur_nt : str , pt_par : PtNode):
-        node_id = self.graph.get_first_non_terminal(cur_nt)
-        cur_node= self.graph.nodes[node_id]
-        self.debug_print("#entered node : " + cur_nt)
-        if len(cur_node.edges) > 1 : 
-            look = self.cur_symbol
-            progressed = False
-
-            for edge , dest , edge_actions in cur_node.edges : 
-                self.debug_print(f"## {cur_nt} : checking edge {edge} with look {look}")
-                if self.edge_match(edge , cur_nt , look) :
+        with phase(self.stats , "parse") : 
+            self.advance()
+            root = None
+            if self.build_tree : 
+                self.parse_tree = ParseTree("Program")
+                root = ParseTree.ROOT
+            if self.profile is not None : 
+                self.profile.start()
+            try : 
+                if self.generated is not None : 
+                    self.run_generated("Program" , root)
+                else : 
+                    self.parse_nonterminal("Program" , root)
+            except : 
+                # a parse that dies half way leaves syntax_errors.txt as it was
+                self.syntax_errors.discard()
+                raise
+            finally : 
+                if self.profile is not None : 
+                    self.profile.stop()
+                if self.stats is not None and self.parse_tree is not None : 
+                    self.stats.parse_tree_nodes = len(self.parse_tree)
+
+            if self.build_tree : 
+                self.parse_tree_root = self.parse_tree.view(root)
+        with phase(self.stats , "artifacts") : 
+            self.write_tree()
+            self.syntax_errors.update_file()
+
+
+    def parse_nonterminal(self , cur_nt : str , pt_par : int):
+        # Walks the diagrams without Python recursion. Taking a nonterminal edge
+        # pushes the current frame (nonterminal, parse tree parent, finish calls, dest)
+        # and enters the edge's diagram; when that diagram is done the frame is
+        # popped, the edge's finish actions run and the walk goes on from dest.
+        # Debug messages and profile hooks are guarded by locals so that they
+        # cost nothing (no formatting, no call) when switched off.
+        nodes = self.graph.nodes
+        predict = self.prediction.predict
+        step = self.prediction.step
+        terminal_set = self.terminal_set
+        edge_calls = self.edge_calls
+        debug = self.debug
+        profile = self.profile
+        stack = []
+        cur_node = None
+        while True : 
+            finished = False
+            if cur_node is None : 
+                cur_node = nodes[self.graph.get_first_non_terminal(cur_nt)]
+                if profile is not None : 
+                    profile.enter(cur_nt)
+                if debug : 
+                    self.debug_print("#entered node : " + cur_nt)
+                if len(cur_node.edges) > 1 : 
+                    look = self.cur_symbol
+                    choice = predict[cur_node.id][self.cur_look]
+
+                    if choice >= 0 : 
+                        edge , dest , edge_actions = cur_node.edges[choice]
+                        start_calls , finish_calls = edge_calls[cur_node.id][choice]
+                        ### codeGen
+                        if start_calls : 
+                            self.do_actions(start_calls)
+                        ###
+                        if debug : 
+                            self.debug_print(f"# {edge} matched with {look}")
+                        if edge is EPSILON : 
+                            self.add_child(pt_par , "epsilon")
+                        elif edge in terminal_set:
+                            if finish_calls : 
+                                self.do_actions(finish_calls)
+                            self.add_leaf(pt_par)
+                            self.advance()
+                        else : 
+                            stack.append((cur_nt , pt_par , finish_calls , dest))
+                            cur_nt , pt_par = edge , self.add_child(pt_par , edge)
+                            cur_node = None
+                            continue
+                        cur_node = nodes[dest]
+                    
+                    else : 
+                        if debug : 
+                            self.debug_print(f"## {cur_nt} : no edge matched with look {look}")
+                        if choice == RECOVER_EOF : 
+                            if profile is not None : 
+                                profile.recovery("eof" , self.buffer.line , cur_nt , look)
+                            if not self.eof_error_occured:
+                                self.eof_error_occured=True
+                                self.syntax_errors.add(self.buffer.line , "syntax error, Unexpected EOF")
+                            finished = True
+                        elif choice == RECOVER_ILLEGAL : 
+                            if debug : 
+                                self.debug_print(f"## {cur_nt} : no edge matched with look {look} and not in follows")
+                            if profile is not None : 
+                                profile.recovery("illegal" , self.buffer.line , cur_nt , look)
+                            self.syntax_errors.add(self.buffer.line , f"syntax error, illegal {look}")
+                            self.advance()
+
+                        else : 
+                            if debug : 
+                                self.debug_print(f"## {cur_nt} : no edge matched with look {look} and in follows")
+                            if profile is not None : 
+                                profile.recovery("missing" , self.buffer.line , cur_nt , cur_nt)
+                            self.syntax_errors.add(self.buffer.line , f"syntax error, missing {cur_nt}")
+                            finished = True
+
+            while not finished : 
+                if cur_node.is_accept : 
+                    finished = True
+                    break
+                
+                look = self.cur_symbol
+
+                edge , dest , edge_actions = cur_node.edges[0]
+                if debug : 
+                    self.debug_print(f"## {cur_nt} : checking edge {edge} with look {look}")
+                action = step[cur_node.id][self.cur_look]
+                if action >= 0 : 
+                    start_calls , finish_calls = edge_calls[cur_node.id][0]
                     ### codeGen
-                    self.do_actions(cur_node_id=cur_node.id , edge=edge , dest_id=dest , start=True)
+                    if start_calls : 
+                        self.do_actions(start_calls)
                     ###
-                    self.debug_print(f"# {edge} matched with {look}")
-                    if edge.lower()=="epsilon" : 
-                        pt_par.add_children(PtNode("epsilon"))
-                        cur_node = self.graph.nodes[dest]
-                        progressed = True
-                        break
-                    
-                    if edge in self.terminals:
-                        self.do_actions(cur_node_id=cur_node.id , edge=edge , dest_id=dest , start=False)
-                        pt_par.add_children(PtNode(self.leaf_repr()))
+                    if debug : 
+                        self.debug_print(f"# {edge} matched with {look}")
+                    if edge in terminal_set:
+                        if finish_calls : 
+                            self.do_actions(finish_calls)
+                        self.add_leaf(pt_par)
                         self.advance()
-                        cur_node = self.graph.nodes[dest]
-                        progressed = True
-                        break
+                        cur_node = nodes[dest]
+                        continue
 
-                    child = PtNode(edge)
-                    pt_par.add_children(child)
-                    self.parse_nonterminal(edge , child)
-                    ### codeGen
-                    self.do_actions(cur_node_id=cur_node.id , edge=edge , dest_id=dest , start=False)
-                    ###
-                    cur_node = self.graph.nodes[dest]
-                    progressed = True
+                    stack.append((cur_nt , pt_par , finish_calls , dest))
+                    cur_nt , pt_par = edge , self.add_child(pt_par , edge)
+                    cur_node = None
                     break
-            
-            if not progressed : 
-                self.debug_print(f"## {cur_nt} : no edge matched with look {look}")
-                if look == "$" : 
+                if action == RECOVER_EOF : 
+                    if profile is not None : 
+                        profile.recovery("eof" , self.buffer.line , cur_nt , look)
                     if not self.eof_error_occured:
                         self.eof_error_occured=True
                         self.syntax_errors.add(self.buffer.line , "syntax error, Unexpected EOF")
-                    return True
-                elif look not in self.follows[cur_nt]: 
-                    self.debug_print(f"## {cur_nt} : no edge matched with look {look} and not in follows")
+                    finished = True
+                elif action == RECOVER_ILLEGAL : 
+                    if debug : 
+                        self.debug_print(f"## {cur_nt} : no edge matched with look {look} and not in follows")
+                    if profile is not None : 
+                        profile.recovery("illegal" , self.buffer.line , cur_nt , look)
                     self.syntax_errors.add(self.buffer.line , f"syntax error, illegal {look}")
                     self.advance()
-
-                else : 
-                    self.debug_print(f"## {cur_nt} : no edge matched with look {look} and in follows")
-                    self.syntax_errors.add(self.buffer.line , f"syntax error, missing {cur_nt}")
-                    return False
-
-
-        while True : 
-            if cur_node.is_accept : 
-                return True
-            
-            look = self.cur_symbol
-
-            edge , dest , edge_actions = cur_node.edges[0]
-            self.debug_print(f"## {cur_nt} : checking edge {edge} with look {look}")
-            if self.edge_match(edge , cur_nt , look) : 
-                ### codeGen
-                self.do_actions(cur_node_id=cur_node.id , edge=edge , dest_id=dest , start=True)
-                ###
-                self.debug_print(f"# {edge} matched with {look}")
-                if edge in self.terminals:
-                    self.do_actions(cur_node_id=cur_node.id , edge=edge , dest_id=dest , start=False)
-                    pt_par.add_children(PtNode(self.leaf_repr()))
-                    self.advance()
-                    cur_node = self.graph.nodes[dest]
-                    continue
-
-                child = PtNode(edge)
-                pt_par.add_children(child)
-                self.parse_nonterminal(edge , child)
-                ### codeGen
-                self.do_actions(cur_node_id=cur_node.id , edge=edge , dest_id=dest , start=False)
-                ###
-                cur_node = self.graph.nodes[dest]
+                else :
+                    if debug : 
+                        self.debug_print(f"## {cur_nt} : no edge matched with look {look} and in follows")
+                    if profile is not None : 
+                        profile.recovery("missing" , self.buffer.line , cur_nt , edge)
+                    self.syntax_errors.add(self.buffer.line , f"syntax error, missing {edge}")
+                    cur_node = nodes[dest]
+
+            if not finished : 
+                # entering the nonterminal of a pushed edge
                 continue
-            if look == "$" : 
-                if not self.eof_error_occured:
-                    self.eof_error_occured=True
-                    self.syntax_errors.add(self.buffer.line , "syntax error, Unexpected EOF")
-                return True
-            elif self.is_terminal(edge) and look not in self.follows[cur_nt]: 
-                self.debug_print(f"## {cur_nt} : no edge matched with look {look} and not in follows")
-                self.syntax_errors.add(self.buffer.line , f"syntax error, illegal {look}")
-                self.advance()
-            elif not self.is_terminal(edge) and look not in self.follows[edge]:
-                self.debug_print(f"## {cur_nt} : no edge matched with look {look} and not in follows")
-                self.syntax_errors.add(self.buffer.line , f"syntax error, illegal {look}")
-                self.advance()
-            else :
-                self.debug_print(f"## {cur_nt} : no edge matched with look {look} and in follows")
-                self.syntax_errors.add(self.buffer.line , f"syntax error, missing {edge}")
-                cur_node = self.graph.nodes[dest]
+            if profile is not None : 
+                profile.exit()
+            if not stack : 
+                return
+            cur_nt , pt_par , finish_calls , dest = stack.pop()
+            ### codeGen
+            if finish_calls : 
+                self.do_actions(finish_calls)
+            ###
+            cur_node = nodes[dest]
     
-    def edge_match(self, edge : str , component : str , look : str) -> bool:
-        if edge.lower() == "epsilon" : 
-            return look in self.follows[component] 
-        if self.is_terminal(edge):
-            return edge.lower()==look.lower()
-        if look in self.firsts[edge] or ("EPSILON" in self.firsts[edge] and (look in self.follows[edge])):
-            return True
-        return False
-
-    
-    def advance(self):
-        tok = self._get_next_token()
-        if tok[0].lower()=="white" : 
-            self.advance()
+    def run_generated(self , cur_nt : str , pt_par : int):
+        # Nonterminals that call others are generators yielding the generator of
+        # the nonterminal they enter; it runs from this stack and the caller is
+        # resumed when it is done, so nesting depth is not bounded by Python's
+        # recursion limit here either.
+        functions = self.generated.build(self)
+        entered = functions[cur_nt](pt_par)
+        if cur_nt not in self.generated.GENERATORS : 
             return
-        self.cur_token = tok
-        self.cur_symbol = self.token_to_symbol(tok)
+        stack = [entered]
+        while stack : 
+            callee = next(stack[-1] , None)
+            if callee is None : 
+                stack.pop()
+            else : 
+                stack.append(callee)
 
-    def extract_action_params(self , action : str) -> list[str]:
-        if "(" not in action : 
-            return []
-        return action[action.find('(')+1:action.rfind(')')].split(',')
-    def extract_action_action(self , action : str):
-        if "(" not in action : 
-            return action[1:]
-        return action[1:action.find('(')]
+    def add_child(self , pt_par : int , label : str) -> int:
+        if not self.build_tree : 
+            return None
+        return self.parse_tree.add_child(pt_par , label)
 
-    def do_actions(self , cur_node_id , edge , dest_id , start):
-        dict_key = "start" if start else "finish"
-        for action in self.graph.get_edge_actions(start=cur_node_id , edge=edge , dest=dest_id)[dict_key]:
-            if self.extract_action_action(action) in self.codeGen.sub_routines.keys():
+    def add_leaf(self , pt_par : int):
+        if self.build_tree : 
+            self.parse_tree.add_child(pt_par , self.leaf_repr())
 
+    def advance(self):
+        # once the stream is exhausted the current token stays "$"
+        for tok in self.token_stream : 
+            if tok.kind!=KIND_WHITE : 
+                self.cur_token = tok
+                self.cur_symbol = self.token_to_symbol(tok)
+                self.cur_look = self.prediction.look_id(self.cur_symbol)
+                return
+
+    def bind_actions(self , edge_actions) -> list[tuple]:
+        # Looks every action up in codeGen.sub_routines once. A call is
+        # (action , routine , static params); actions codeGen has no routine
+        # for are reported here, once each, and left out.
+        sub_routines = self.codeGen.sub_routines
+        unsupported = set()
+
+        def bind(actions):
+            calls = []
+            for action , name , params in actions : 
+                if name in sub_routines : 
+                    routine = sub_routines[name]
+                    if self.instruments is not None : 
+                        routine = self.instruments.wrap_action(action , routine)
+                    self.action_routines[action] = routine
+                    calls.append((action , routine , params))
+                elif action not in unsupported : 
+                    unsupported.add(action)
+                    print(f"{action} doesnt support yet :(")
+            return tuple(calls)
+
+        edge_calls = [()] * (max(edge_actions , default=0) + 1)
+        for node_id , edges in edge_actions.items() : 
+            edge_calls[node_id] = tuple((bind(start) , bind(finish)) for start , finish in edges)
+        return edge_calls
+
+    def do_actions(self , calls):
+        for action , routine , params in calls:
+            # the dump walks every open scope: only build it when debugging
+            if self.debug : 
                 self.debug_print(f"@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@Start:{self.buffer.line}")
                 self.debug_print(f"{action} , {self.cur_token[0]} , {self.cur_token[1]} called")
                 self.debug_print(f"semantic_stack :  {self.codeGen.semantic_stack}")
@@ -268,95 +389,34 @@ class Parser :
                 for sc in self.codeGen.symbol_table.scopes : 
                     self.debug_print([(scr.address , scr.token.lexeme , scr.token_type , scr.args_type) for scr in sc.records])
                 self.debug_print("@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@End")
-                self.codeGen.sub_routines[self.extract_action_action(action)](token=Token(self.cur_token[0] , self.cur_token[1]) , param=self.extract_action_params(action)+[self.buffer.line])
-            else : 
-                print(f"{action} doesnt support yet :(")
+            routine(token=self.cur_token , param=params + (self.buffer.line ,))
         
 
     def token_to_symbol(self,tok) -> str:
-        if tok[0].lower()=="keyword" or tok[0].lower()=="symbol" : 
-            return tok[1]
-        return tok[0]
+        if tok.kind==KIND_KEYWORD or tok.kind==KIND_SYMBOL : 
+            return tok.lexeme
+        return tok.type
     
     def leaf_repr(self) -> str : 
         if self.cur_symbol=="$" : 
             return "$"
         return f"({self.cur_token[0]}, {self.cur_token[1]}) "
 
-    def load_grammar(self , path : str) -> dict[str , list[list[str]]]:
-        d = {}
-        with open(path , "r" , encoding="utf8") as f : 
-            for line in f :
-                line = line.strip()
-                if not line : 
-                    continue
-                lhs , rhs = [x.strip() for x in line.split("->" , 1)]
-                self.nonTerminals.append(lhs)
-                self.terminals.append(lhs)
-                for alt in rhs.split("|"):
-                    try :
-                        d[lhs].append(alt.strip().split())
-                    except:
-                        d[lhs] = []
-                        d[lhs].append(alt.strip().split())
-                    self.terminals.extend(alt.strip().split())
-        self.terminals = list(set(self.terminals))
-        self.nonTerminals = list(set(self.nonTerminals))
-        for i in self.nonTerminals : 
-            if i in self.terminals : 
-                self.terminals.remove(i)
-        self.terminals = [i for i in self.terminals if i[0]!="#" ]
-        self.nonTerminals = [i for i in self.nonTerminals if i[0]!="#" ]
-        return d
-    
-    def load_follow_first(self , path : str) -> dict[str , list[str]]:
-        d = {}
-        with open(path , "r" , encoding="utf8") as f : 
-            for line in f : 
-                line = line.strip().split()
-                d[line[0]] = line[1:]
-        return d
-    
-    def tdGraph_accept_index(self , path):
-        for i in range(len(path)-1 , -1 , -1):
-            if path[i][0]!="#" : 
-                return i
-        
-    def makeTdGraph(self):
-        for v in self.grammar.keys():
-            cur_id = self.graph.add_node(v)
-            for path in self.grammar[v] : 
-                actions = []
-                cur_id = self.graph.get_first_non_terminal(v)
-                last_edge_details = (None , None , None)
-                for i in range(len(path)):
-                    u = path[i]
-                    if u[0]=="#" : 
-                        actions.append(u)
-                        continue
-                    new_id = self.graph.add_node(v , is_accept=(i==self.tdGraph_accept_index(path=path)))
-                    self.graph.add_edge(cur_id , u , new_id , actions={"start":actions.copy() , "finish":[]})
-                    actions.clear()
-                    last_edge_details = (cur_id , u , new_id)
-                    cur_id = new_id
-                if len(actions) > 0 : 
-                    act_dict = self.graph.get_edge_actions(start=last_edge_details[0] , edge=last_edge_details[1] , dest=last_edge_details[2])
-                    act_dict["finish"] = actions
-
-
     def is_terminal(self , token : str) -> bool:
-        return token in self.terminals
-    
-    def _get_next_token(self):
-        nt = get_next_token(buffer=self.buffer , dfa=self.dfa , lexical_errors=self.lexical_errors , 
-                              tokens=self.tokens , symbol_table=self.symbol_table)
-        return nt
+        return token in self.terminal_set
     
-    def write_tree(self , path="parse_tree.txt"):
-        if not self.parse_tree_root:
+    def write_tree(self , path=None):
+        if self.parse_tree is None:
             return
-        with open(path , "w" , encoding="utf-8") as f : 
-            f.write("\n".join(self.parse_tree_root.to_lines()))
+        # streamed line by line: memory stays at the writer's buffer plus one line
+        writer = ArtifactWriter(path or self.tree_path , encoding="utf-8")
+        lines = self.parse_tree.iter_lines()
+        writer.write(next(lines))
+        for line in lines : 
+            writer.write("\n")
+            writer.write(line)
+        writer.commit()
+        self.tree_text = writer.text
 
     def debug_print(self , msg : str):
         if not self.debug:
@@ -0,0 +1,372 @@
+# Generates a recursive-descent parser from the grammar: one function per
+# nonterminal with the prediction and step rows of its diagram inlined as
+# constant tuples, terminal edges matched by comparing lookahead ids, and the
+# semantic actions called directly. It takes the same decisions and recoveries
+# as Parser.parse_nonterminal (which interprets the diagrams), in the same order.
+#
+# Nonterminals that can recurse are generators: entering one is `yield n_X(...)`
+# and Parser.run_generated drives them from an explicit stack, so nesting depth
+# is still not bounded by the Python recursion limit. The others (only
+# terminals, or only such nonterminals below them) are plain functions, called
+# directly.
+#
+# The module is written to parser/.cache/generated_parser.py, keyed by the
+# grammar artifact and this file; `python3 -m parser.parser_generator` (from the
+# project root) builds it ahead of time.
+import hashlib
+import importlib.util
+import os
+import py_compile
+import sys
+
+from parser.grammar import CompiledGrammar
+from parser.grammar_cache import load_compiled_grammar , grammar_key , cached_key , PARSER_DIR , GRAMMAR_PATH , FOLLOW_PATH , FIRST_PATH
+from parser.prediction import EPSILON , RECOVER_EOF , RECOVER_ILLEGAL
+
+# bump when the generated code changes shape
+FORMAT_VERSION = 1
+GENERATED_PATH = os.path.join(PARSER_DIR , ".cache" , "generated_parser.py")
+# generated modules already imported by this process, by key
+LOADED : dict[str , object] = {}
+
+
+def generator_key(grammar_path:str=GRAMMAR_PATH , follow_path:str=FOLLOW_PATH , first_path:str=FIRST_PATH) -> str:
+    grammar = grammar_key(grammar_path , follow_path , first_path)
+    source = os.path.abspath(__file__)
+
+    def compute():
+        h = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+        h.update(grammar.encode())
+        with open(source , "rb") as f :
+            h.update(f.read())
+        return h.hexdigest()
+    # the grammar key is part of the name: it stands for the grammar files
+    return cached_key(f"generator {grammar}" , [source] , compute)
+
+
+def function_name(nonterminal : str) -> str:
+    return f"n_{nonterminal}"
+
+
+class ModuleWriter:
+    # source lines of the generated module with the current indentation
+    def __init__(self):
+        self.lines : list[str] = []
+        self.depth = 0
+
+    def line(self , text : str = ""):
+        self.lines.append("    " * self.depth + text if text else "")
+
+    def indent(self):
+        self.depth += 1
+
+    def dedent(self):
+        self.depth -= 1
+
+    def source(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+class ParserGenerator:
+    def __init__(self , compiled : CompiledGrammar , key : str):
+        self.compiled = compiled
+        self.key = key
+        self.graph = compiled.graph
+        self.prediction = compiled.prediction
+        self.terminal_set = compiled.terminal_set
+        self.nonterminals = list(compiled.grammar.keys())
+        # action text -> name of the local it is bound to
+        self.actions : dict[str , str] = {}
+        # row constants: name -> tuple
+        self.rows : dict[str , tuple] = {}
+        # A nonterminal is a plain function when every nonterminal it enters is
+        # one (so no recursion goes through them); the others are generators.
+        called = {nt : {edge for edge in self.taken_edges(nt) if edge not in self.terminal_set} for nt in self.nonterminals}
+        plain = set()
+        while True :
+            more = {nt for nt in self.nonterminals if nt not in plain and called[nt] <= plain}
+            if not more :
+                break
+            plain |= more
+        self.generators = frozenset(nt for nt in self.nonterminals if nt not in plain)
+
+    def taken_edges(self , nonterminal : str):
+        # the edges the parser can take in a diagram: every edge of the first
+        # node, then edges[0] of each node up to the accepting one
+        first = self.graph.nodes[self.graph.get_first_non_terminal(nonterminal)]
+        starts = [first] if len(first.edges) == 1 else [first] + [self.graph.nodes[dest] for _ , dest , _ in first.edges]
+        for edge , _ , _ in first.edges :
+            yield edge
+        for node in starts :
+            while not node.is_accept :
+                edge , dest , _ = node.edges[0]
+                yield edge
+                node = self.graph.nodes[dest]
+
+    def action_local(self , action : str) -> str:
+        local = self.actions.get(action)
+        if local is None :
+            local = self.actions[action] = f"a{len(self.actions)}"
+        return local
+
+    def row(self , kind : str , node_id : int) -> str:
+        name = f"{kind}{node_id}"
+        self.rows[name] = (self.prediction.predict if kind == "P" else self.prediction.step)[node_id]
+        return name
+
+    def generate(self) -> str:
+        body = ModuleWriter()
+        body.depth = 1
+        for nonterminal in self.nonterminals :
+            self.emit_nonterminal(body , nonterminal)
+
+        out = ModuleWriter()
+        out.line("# generated by parser/parser_generator.py from grammar.txt / first.txt / follow.txt: do not edit")
+        out.line(f"GRAMMAR_KEY = {self.key!r}")
+        out.line()
+        for name , row in self.rows.items() :
+            out.line(f"{name} = {row!r}")
+        out.line()
+        out.line(f"GENERATORS = frozenset({tuple(sorted(self.generators))!r})")
+        out.line()
+        out.line()
+        out.line("def build(parser):")
+        out.indent()
+        out.line("# the nonterminal functions, bound to parser, by nonterminal")
+        out.line("buffer = parser.buffer")
+        out.line("advance = parser.advance")
+        out.line("add_child = parser.add_child")
+        out.line("add_leaf = parser.add_leaf")
+        out.line("syntax_errors = parser.syntax_errors")
+        out.line("profile = parser.profile")
+        out.line("routines = parser.action_routines")
+        out.line()
+        out.line("def unsupported(token , param):")
+        out.line("    pass")
+        out.line()
+        for action , local in self.actions.items() :
+            out.line(f"{local} = routines.get({action!r} , unsupported)")
+        out.line()
+        out.line("def recover_eof(nonterminal):")
+        out.line("    if profile is not None :")
+        out.line("        profile.recovery(\"eof\" , buffer.line , nonterminal , parser.cur_symbol)")
+        out.line("    if not parser.eof_error_occured :")
+        out.line("        parser.eof_error_occured = True")
+        out.line("        syntax_errors.add(buffer.line , \"syntax error, Unexpected EOF\")")
+        out.line()
+        out.line("def recover_illegal(nonterminal):")
+        out.line("    if profile is not None :")
+        out.line("        profile.recovery(\"illegal\" , buffer.line , nonterminal , parser.cur_symbol)")
+        out.line("    syntax_errors.add(buffer.line , f\"syntax error, illegal {parser.cur_symbol}\")")
+        out.line("    advance()")
+        out.line()
+        out.line("def recover_missing(nonterminal , symbol):")
+        out.line("    if profile is not None :")
+        out.line("        profile.recovery(\"missing\" , buffer.line , nonterminal , symbol)")
+        out.line("    syntax_errors.add(buffer.line , f\"syntax error, missing {symbol}\")")
+        out.line()
+        out.lines.extend(body.lines)
+        out.line(f"return {{{' , '.join(f'{nt!r} : {function_name(nt)}' for nt in self.nonterminals)}}}")
+        out.dedent()
+        out.line()
+        out.line()
+        # the last line: a module cut short still imports without it
+        out.line(f"END_KEY = {self.key!r}")
+        return out.source()
+
+    def emit_nonterminal(self , w : ModuleWriter , nonterminal : str):
+        first = self.graph.nodes[self.graph.get_first_non_terminal(nonterminal)]
+        w.line(f"def {function_name(nonterminal)}(pt):")
+        w.indent()
+        w.line("if profile is not None :")
+        w.line(f"    profile.enter({nonterminal!r})")
+        if len(first.edges) > 1 :
+            self.emit_predict(w , nonterminal , first)
+        else :
+            self.emit_chain(w , nonterminal , first)
+        w.line("if profile is not None :")
+        w.line("    profile.exit()")
+        w.dedent()
+        w.line()
+
+    def emit_finish(self , w : ModuleWriter):
+        # the nonterminal stops here; the caller runs the finish actions of its edge
+        w.line("if profile is not None :")
+        w.line("    profile.exit()")
+        w.line("return")
+
+    def emit_actions(self , w : ModuleWriter , actions):
+        # same arguments as Parser.do_actions: the static params, then the line
+        for action , _ , params in actions :
+            args = "".join(f"{param!r} , " for param in params)
+            w.line(f"{self.action_local(action)}(parser.cur_token , ({args}buffer.line ,))")
+
+    def emit_call(self , w : ModuleWriter , edge : str):
+        call = f"{function_name(edge)}(add_child(pt , {edge!r}))"
+        if edge in self.generators :
+            w.line(f"yield {call}")
+        else :
+            w.line(call)
+
+    def emit_predict(self , w : ModuleWriter , nonterminal : str , node):
+        # the first node of a diagram with alternatives: Parser's predict phase
+        row = self.row("P" , node.id)
+        w.line(f"choice = {row}[parser.cur_look]")
+        for index , (edge , dest , _) in enumerate(node.edges) :
+            start , finish = self.compiled.edge_actions[node.id][index]
+            w.line(f"{'if' if index == 0 else 'elif'} choice == {index} :")
+            w.indent()
+            self.emit_actions(w , start)
+            if edge is EPSILON :
+                w.line("add_child(pt , \"epsilon\")")
+            elif edge in self.terminal_set :
+                self.emit_actions(w , finish)
+                w.line("add_leaf(pt)")
+                w.line("advance()")
+            else :
+                self.emit_call(w , edge)
+                self.emit_actions(w , finish)
+            self.emit_chain(w , nonterminal , self.graph.nodes[dest])
+            w.dedent()
+        w.line(f"elif choice == {RECOVER_EOF} :")
+        w.indent()
+        w.line(f"recover_eof({nonterminal!r})")
+        self.emit_finish(w)
+        w.dedent()
+        w.line(f"elif choice == {RECOVER_ILLEGAL} :")
+        w.indent()
+        w.line(f"recover_illegal({nonterminal!r})")
+        # like Parser, go on from the same node with its first edge
+        self.emit_chain(w , nonterminal , node)
+        w.dedent()
+        w.line("else :")
+        w.indent()
+        w.line(f"recover_missing({nonterminal!r} , {nonterminal!r})")
+        self.emit_finish(w)
+        w.dedent()
+
+    def emit_chain(self , w : ModuleWriter , nonterminal : str , node):
+        # Parser's step loop from node to the accepting node: edges[0] of every
+        # node, an illegal lookahead is skipped and a missing edge jumped over
+        while not node.is_accept :
+            edge , dest , _ = node.edges[0]
+            start , finish = self.compiled.edge_actions[node.id][0]
+            terminal = edge in self.terminal_set
+            row = self.row("S" , node.id)
+            w.line("while True :")
+            w.indent()
+            lookup = terminal and edge is not EPSILON
+            if lookup :
+                w.line(f"if parser.cur_look == {self.prediction.look_id(edge)} :")
+            else :
+                w.line(f"action = {row}[parser.cur_look]")
+                w.line("if action >= 0 :")
+            w.indent()
+            self.emit_actions(w , start)
+            if terminal :
+                self.emit_actions(w , finish)
+                w.line("add_leaf(pt)")
+                w.line("advance()")
+            else :
+                self.emit_call(w , edge)
+                self.emit_actions(w , finish)
+            w.line("break")
+            w.dedent()
+            if lookup :
+                w.line(f"action = {row}[parser.cur_look]")
+            w.line(f"if action == {RECOVER_EOF} :")
+            w.indent()
+            w.line(f"recover_eof({nonterminal!r})")
+            self.emit_finish(w)
+            w.dedent()
+            w.line(f"if action == {RECOVER_ILLEGAL} :")
+            w.indent()
+            w.line(f"recover_illegal({nonterminal!r})")
+            w.line("continue")
+            w.dedent()
+            w.line(f"recover_missing({nonterminal!r} , {edge!r})")
+            w.line("break")
+            w.dedent()
+            node = self.graph.nodes[dest]
+
+
+def generate_source(compiled : CompiledGrammar , key : str) -> str:
+    return ParserGenerator(compiled , key).generate()
+
+
+def write_generated(source : str , path : str = GENERATED_PATH) -> bool:
+    try :
+        os.makedirs(os.path.dirname(path) , exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path , "w" , encoding="utf-8") as f :
+            f.write(source)
+        os.replace(tmp_path , path)
+    except OSError :
+        # read-only checkout: the module is compiled from memory instead
+        return False
+    # bytecode checked against the hash of the source rather than its mtime and
+    # size, so a file rewritten in the same second at the same size never runs
+    # the .pyc of the one before
+    try :
+        py_compile.compile(path , doraise=True , invalidation_mode=py_compile.PycInvalidationMode.CHECKED_HASH)
+    except (OSError , py_compile.PyCompileError) :
+        try :
+            os.remove(importlib.util.cache_from_source(path))
+        except OSError :
+            pass
+    return True
+
+
+def read_generated_key(path : str) -> str:
+    try :
+        with open(path , encoding="utf-8") as f :
+            f.readline()
+            line = f.readline()
+    except (OSError , ValueError) :
+        # ValueError: not UTF-8 any more
+        return None
+    if not line.startswith("GRAMMAR_KEY = ") :
+        return None
+    return line[len("GRAMMAR_KEY = "):].strip().strip("'")
+
+
+def import_generated(path : str , source : str = None , key : str = None):
+    spec = importlib.util.spec_from_file_location("generated_parser" , path)
+    module = importlib.util.module_from_spec(spec)
+    if source is None :
+        spec.loader.exec_module(module)
+    else :
+        exec(compile(source , path , "exec") , module.__dict__)
+    if key is not None and getattr(module , "END_KEY" , None) != key :
+        raise ImportError(f"{path} is incomplete" , path=path)
+    return module
+
+
+def load_generated_parser(grammar_path:str=GRAMMAR_PATH , follow_path:str=FOLLOW_PATH , first_path:str=FIRST_PATH , path:str=GENERATED_PATH):
+    # the generated module for this grammar: from this process, from the cache
+    # directory, or generated again when the grammar or the generator changed
+    # (or the cached file is corrupt)
+    key = generator_key(grammar_path , follow_path , first_path)
+    module = LOADED.get(key)
+    if module is not None :
+        return module
+    if read_generated_key(path) == key :
+        try :
+            module = import_generated(path , key=key)
+        except Exception :
+            # corrupt or cut short after a valid key line (a damaged module can
+            # fail with almost anything: SyntaxError, NameError, UnicodeDecodeError, ...): generated again
+            module = None
+    if module is None :
+        source = generate_source(load_compiled_grammar(grammar_path , follow_path , first_path) , key)
+        module = import_generated(path) if write_generated(source , path) else import_generated(path , source)
+    LOADED[key] = module
+    return module
+
+
+if __name__ == "__main__":
+    # build time: python3 -m parser.parser_generator [output path]
+    output = sys.argv[1] if len(sys.argv) > 1 else GENERATED_PATH
+    key = generator_key()
+    write_generated(generate_source(load_compiled_grammar() , key) , output)
+    print(f"wrote {output}")
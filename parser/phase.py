@@ -0,0 +1,10 @@
+import contextlib
+
+# Phase blocks of a CompileStats, without importing parser/compile_stats.py
+# (and tracemalloc) into compiles that keep no stats.
+NO_PHASE = contextlib.nullcontext()
+
+
+def phase(stats , name : str):
+    # stats.phase(name), or a block that records nothing without stats
+    return stats.phase(name) if stats is not None else NO_PHASE
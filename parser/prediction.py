@@ -0,0 +1,81 @@
+import sys
+
+# grammar symbols are interned, so a symbol can be compared by identity
+EPSILON = sys.intern("EPSILON")
+
+# negative entries of a row: no edge applies and this is the recovery to run
+RECOVER_EOF = -1
+RECOVER_ILLEGAL = -2
+RECOVER_MISSING = -3
+
+
+class PredictionTable:
+    # Every decision Parser.parse_nonterminal takes, computed once per grammar.
+    # Lookahead ids: 0 stands for any symbol that is not a terminal of the
+    # grammar, the terminals follow in sorted order (symbols[id] gives it back).
+    #   predict[node id][look id]: for a node with several edges, the index of the
+    #       first edge that matches, or a RECOVER_* code
+    #   step[node id][look id]: for edges[0] of any node with edges, 0 on a match,
+    #       or a RECOVER_* code
+    def __init__(self , symbols:list[str] , predict:dict[int , tuple] , step:dict[int , tuple]):
+        self.symbols = symbols
+        self.look_ids = {s : i for i , s in enumerate(symbols) if s is not None}
+        self.predict = predict
+        self.step = step
+
+    def look_id(self , symbol:str) -> int:
+        return self.look_ids.get(symbol , 0)
+
+    @classmethod
+    def build(cls , graph , terminals , firsts:dict[str , list[str]] , follows:dict[str , list[str]]) -> "PredictionTable":
+        terminals = frozenset(terminals)
+        symbols = [None] + sorted(t for t in terminals if t is not EPSILON)
+        look_ids = {s : i for i , s in enumerate(symbols) if s is not None}
+        eof = look_ids["$"]
+        # FIRST / FOLLOW as frozensets of lookahead ids
+        first_ids = {nt : frozenset(look_ids[t] for t in f if t in look_ids) for nt , f in firsts.items()}
+        follow_ids = {nt : frozenset(look_ids[t] for t in f if t in look_ids) for nt , f in follows.items()}
+        nullable = frozenset(nt for nt , f in firsts.items() if EPSILON in f)
+
+        def match(edge , component , look):
+            if edge is EPSILON :
+                return look in follow_ids[component]
+            if edge in terminals :
+                return look == look_ids.get(edge , -1)
+            return look in first_ids[edge] or (edge in nullable and look in follow_ids[edge])
+
+        predict = {}
+        step = {}
+        ids = range(len(symbols))
+        for node in graph.nodes.values() :
+            if not node.edges :
+                continue
+            component = node.component
+            if len(node.edges) > 1 :
+                row = []
+                for look in ids :
+                    choice = next((i for i , (edge , _ , _) in enumerate(node.edges) if match(edge , component , look)) , None)
+                    if choice is None :
+                        if look == eof :
+                            choice = RECOVER_EOF
+                        elif look not in follow_ids[component] :
+                            choice = RECOVER_ILLEGAL
+                        else :
+                            choice = RECOVER_MISSING
+                    row.append(choice)
+                predict[node.id] = tuple(row)
+            edge = node.edges[0][0]
+            # a terminal edge recovers against FOLLOW(component), a nonterminal one against FOLLOW(edge)
+            recover_follow = follow_ids[component] if edge in terminals else follow_ids[edge]
+            row = []
+            for look in ids :
+                if match(edge , component , look) :
+                    row.append(0)
+                elif look == eof :
+                    row.append(RECOVER_EOF)
+                elif look not in recover_follow :
+                    row.append(RECOVER_ILLEGAL)
+                else :
+                    row.append(RECOVER_MISSING)
+            step[node.id] = tuple(row)
+        return cls(symbols , predict , step)
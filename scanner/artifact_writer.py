@@ -0,0 +1,61 @@
+import io
+import os
+
+# write buffer of every artifact file; memory per artifact stays at this size
+ARTIFACT_BUFFER_SIZE = 1 << 16
+
+
+class ArtifactWriter:
+    # Buffered incremental writer for one artifact file. Text goes to a
+    # temporary sibling file while compiling and replaces file_path on commit(),
+    # so a compile that stops half way leaves the previous artifact untouched.
+    # With file_path=None nothing touches the disk: the text is kept in memory
+    # and is self.text once committed ("" once discarded, like a new file).
+    def __init__(self , file_path , buffer_size=ARTIFACT_BUFFER_SIZE , encoding=None):
+        self.file_path = file_path
+        self.text = None
+        if file_path is None :
+            self.tmp_path = None
+            self.file = io.StringIO()
+            return
+        self.tmp_path = f"{file_path}.{os.getpid()}.tmp"
+        self.file = None
+        try:
+            # the artifact exists from the start, as it always has
+            with open(file_path, 'a'):
+                pass
+            self.file = open(self.tmp_path , "w" , buffering=buffer_size , encoding=encoding)
+        except OSError:
+            print(f"an error occurred while creating the file{self.file_path}")
+
+    def write(self , text):
+        if self.file is not None :
+            self.file.write(text)
+
+    def commit(self):
+        if self.file is None :
+            return
+        if self.file_path is None :
+            self.text = self.file.getvalue()
+            self.file = None
+            return
+        try:
+            self.file.close()
+            os.replace(self.tmp_path , self.file_path)
+        except OSError:
+            print(f"an error occurred while updating the file{self.file_path}")
+        self.file = None
+
+    def discard(self):
+        if self.file is None :
+            return
+        self.file.close()
+        if self.file_path is None :
+            self.text = ""
+            self.file = None
+            return
+        try:
+            os.remove(self.tmp_path)
+        except OSError:
+            pass
+        self.file = None
@@ -1,3 +1,10 @@
+import io
+import mmap
+import os
+import re
+from bisect import bisect_left
+
+
 class BufferedFileReader:
     def __init__(self, file_path="input.txt", buffer_size=1024):
         self.file_path = file_path
@@ -5,12 +12,20 @@ class BufferedFileReader:
         self.file = open(file_path, 'r', encoding='utf-8')
         self.buffer = ''
         self.pos = 0
+        self.base = 0
         self.line = 1
         self.eof = False
+        self.lexeme_start = None
+        self.lexeme_head = ''
         self._fill_buffer()
 
     def _fill_buffer(self):
         chunk = self.file.read(self.buffer_size)
+        self.base += len(self.buffer)
+        if self.lexeme_start is not None:
+            # the lexeme runs into the next chunk: keep its part of this one
+            self.lexeme_head += self.buffer[self.lexeme_start:]
+            self.lexeme_start = 0
         if chunk:
             self.buffer = chunk
             self.pos = 0
@@ -46,5 +61,185 @@ class BufferedFileReader:
         current_line = self.line
         return char , current_line
 
+    def peek(self):
+        # like check_next_char()[0], for callers that already checked has_next()
+        return self.buffer[self.pos]
+
+    @property
+    def offset(self):
+        # characters consumed since the start of the file
+        return self.base + self.pos
+
+    def start_lexeme(self):
+        # lexeme() is then the text read since here, sliced once instead of
+        # built a character at a time
+        self.lexeme_start = self.pos
+        self.lexeme_head = ''
+
+    def lexeme(self):
+        return self.lexeme_head + self.buffer[self.lexeme_start:self.pos]
+
+    def extend(self):
+        # keep the unread tail and append at least as much again from the file,
+        # so a lexeme that runs past the end of the chunk can be matched whole
+        if self.eof:
+            return False
+        rest = self.buffer[self.pos:]
+        chunk = self.file.read(max(self.buffer_size, len(rest)))
+        if not chunk:
+            self.eof = True
+            return False
+        self.base += self.pos
+        if self.lexeme_start is not None:
+            self.lexeme_head += self.buffer[self.lexeme_start:self.pos]
+            self.lexeme_start = 0
+        self.buffer = rest + chunk
+        self.pos = 0
+        return True
+
+    def advance_to(self, pos):
+        self.line += self.buffer.count('\n', self.pos, pos)
+        self.pos = pos
+
+    def close(self):
+        self.file.close()
+
+
+
+class StringReader(BufferedFileReader):
+    # BufferedFileReader over text already in memory, e.g. one chunk of a larger
+    # source: line and offset continue from where the chunk starts in that source
+    def __init__(self, text, line=1, base=0, buffer_size=1024):
+        self.file_path = None
+        self.buffer_size = buffer_size
+        self.file = io.StringIO(text)
+        self.buffer = ''
+        self.pos = 0
+        self.base = base
+        self.line = line
+        self.eof = False
+        self.lexeme_start = None
+        self.lexeme_head = ''
+        self._fill_buffer()
+
+
+# single-byte characters of the char API, without a decode per character;
+# \r reads as \n, as in text mode (a \r\n pair is one \n, see get_next_char)
+_ASCII = [chr(i) for i in range(128)]
+_ASCII[13] = '\n'
+# line breaks as text mode reads them: \r\n, \r or \n
+_LINE_BREAK = re.compile(b'\r\n?|\n')
+
+
+class MappedFileReader:
+    # Reads the source through mmap. The span paths track nothing per
+    # character: the newline index is built once, on the first line query, and
+    # line numbers are found by bisect. The char API (get_next_char) counts
+    # newlines as it goes, like BufferedFileReader, and only falls back to the
+    # index after a jump (advance_to). Offsets are byte offsets into self.data.
+    # The map is never copied, CRLF files included: \r\n and \r are read as
+    # the \n text mode (BufferedFileReader) makes of them, one lexeme or
+    # character at a time (text, get_next_char), and count as one line break.
+    def __init__(self, file_path="input.txt"):
+        self.file_path = file_path
+        self.file = open(file_path, 'rb')
+        self.map = None
+        if os.fstat(self.file.fileno()).st_size:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = self.map
+        else:
+            self.data = b''
+        self.crlf = self.data.find(b'\r') >= 0
+        self.size = len(self.data)
+        self.pos = 0
+        self.eof = True
+        self.newlines = None
+        self.lexeme_start = 0
+        # line at char_pos, kept by get_next_char
+        self.char_pos = 0
+        self.char_line = 1
+
+    def line_of(self, offset):
+        if self.newlines is None:
+            # the last byte of every line break
+            if self.crlf:
+                self.newlines = [m.end() - 1 for m in _LINE_BREAK.finditer(self.data)]
+            else:
+                self.newlines = [m.start() for m in re.finditer(b'\n', self.data)]
+        return bisect_left(self.newlines, offset) + 1
+
+    @property
+    def line(self):
+        if self.pos == self.char_pos:
+            return self.char_line
+        return self.line_of(self.pos)
+
+    @property
+    def offset(self):
+        return self.pos
+
+    def text(self, start, end):
+        text = self.data[start:end].decode('utf-8', errors='replace')
+        if self.crlf and '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text
+
+    def start_lexeme(self):
+        self.lexeme_start = self.pos
+
+    def lexeme(self):
+        return self.text(self.lexeme_start, self.pos)
+
+    def _char_length(self):
+        lead = self.data[self.pos]
+        if lead < 0xC0:
+            return 1
+        if lead < 0xE0:
+            return 2
+        if lead < 0xF0:
+            return 3
+        return 4
+
+    def has_next(self):
+        return self.pos < self.size
+
+    def peek(self):
+        lead = self.data[self.pos]
+        if lead < 0x80:
+            return _ASCII[lead]
+        return self.text(self.pos, self.pos + self._char_length())
+
+    def get_next_char(self):
+        pos = self.pos
+        if pos >= self.size:
+            return False
+        lead = self.data[pos]
+        if lead < 0x80:
+            char = _ASCII[lead]
+            self.pos = pos + 1
+            if lead == 13 and self.data[pos + 1:pos + 2] == b'\n':
+                self.pos = pos + 2
+        else:
+            char = self.peek()
+            self.pos = pos + self._char_length()
+        current_line = self.char_line if pos == self.char_pos else self.line_of(pos)
+        self.char_pos = self.pos
+        self.char_line = current_line + 1 if char == '\n' else current_line
+        return char, current_line
+
+    def check_next_char(self):
+        if not self.has_next():
+            return False
+        return self.peek(), self.line
+
+    def extend(self):
+        return False
+
+    def advance_to(self, pos):
+        self.pos = pos
+
     def close(self):
-        self.file.close()
\ No newline at end of file
+        self.data = b''
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
@@ -0,0 +1,62 @@
+import sys
+from array import array
+
+from scanner.DFA import DFA
+
+
+class CompiledDFA:
+    # Flat version of DFA: characters are mapped to equivalence classes and the
+    # transitions live in one array indexed by state*num_classes+class.
+    def __init__(self , class_map:bytes , table:array , status:list[str] , accept:bytes , trap:bytes , start_node:int=0 , basic_trap:int=1):
+        self.class_map = bytes(class_map)
+        self.num_classes = max(self.class_map) + 1
+        self.table = table
+        self.status = [sys.intern(s) for s in status]
+        self.num_states = len(status)
+        self.accept = bytes(accept)
+        self.trap = bytes(trap)
+        self.is_error = bytes(1 if s.startswith("ERROR") else 0 for s in status)
+        self.is_comment = bytes(1 if s.startswith("COMMENT") else 0 for s in status)
+        self.start_node = start_node
+        self.basic_trap = basic_trap
+        self.current_state = start_node
+
+    @classmethod
+    def from_dfa(cls , dfa:DFA) -> "CompiledDFA":
+        states = range(dfa.num_nodes)
+        # two characters share a class when every state sends them to the same place
+        columns = {}
+        class_map = bytearray(256)
+        for o in range(256):
+            column = tuple(dfa.transition[s][chr(o)] for s in states)
+            class_map[o] = columns.setdefault(column , len(columns))
+        num_classes = len(columns)
+        table = array("H" , [dfa.basic_trap]) * (dfa.num_nodes * num_classes)
+        for column , c in columns.items():
+            for s , dest in zip(states , column):
+                table[s * num_classes + c] = dest
+        return cls(
+            class_map=class_map ,
+            table=table ,
+            status=[dfa.states[s].status for s in states] ,
+            accept=bytes(1 if dfa.states[s].accept else 0 for s in states) ,
+            trap=bytes(1 if dfa.states[s].trap else 0 for s in states) ,
+            start_node=dfa.start_node ,
+            basic_trap=dfa.basic_trap ,
+        )
+
+    def reset(self):
+        self.current_state = self.start_node
+
+    def next_state(self , state:int , edge:str) -> int:
+        o = ord(edge)
+        if o > 255 :
+            o = 255
+        return self.table[state * self.num_classes + self.class_map[o]]
+
+    def change_state(self , edge:str) -> int:
+        self.current_state = self.next_state(self.current_state , edge)
+        return self.current_state
+
+    def get_current_status(self) -> str:
+        return self.status[self.current_state]
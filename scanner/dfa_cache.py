@@ -0,0 +1,63 @@
+import hashlib
+import os
+
+from scanner.compiled_dfa import CompiledDFA
+from scanner.pickle_cache import read_cache , save_cache
+
+# bump when the layout of the stored fields changes
+FORMAT_VERSION = 1
+
+SCANNER_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_PATH = os.path.join(SCANNER_DIR , ".cache" , "scanner_dfa.bin")
+# every file that decides what the built automaton looks like
+DEFINITION_FILES = ["alphabet_config.py" , "DFA.py" , "init_dfa.py" , "minimize_dfa.py" , "compiled_dfa.py"]
+
+
+def definitions_key() -> str:
+    h = hashlib.sha256(f"v{FORMAT_VERSION}".encode())
+    for name in DEFINITION_FILES :
+        with open(os.path.join(SCANNER_DIR , name) , "rb") as f :
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def save_compiled_dfa(dfa:CompiledDFA , key:str , cache_path:str=CACHE_PATH):
+    save_cache(cache_path , FORMAT_VERSION , key , {
+        "class_map" : dfa.class_map ,
+        "table" : dfa.table ,
+        "status" : dfa.status ,
+        "accept" : dfa.accept ,
+        "trap" : dfa.trap ,
+        "start_node" : dfa.start_node ,
+        "basic_trap" : dfa.basic_trap ,
+    })
+
+
+def read_compiled_dfa(key:str , cache_path:str=CACHE_PATH) -> CompiledDFA:
+    payload = read_cache(cache_path , FORMAT_VERSION , key)
+    if payload is None :
+        return None
+    try :
+        return CompiledDFA(
+            class_map=payload["class_map"] ,
+            table=payload["table"] ,
+            status=payload["status"] ,
+            accept=payload["accept"] ,
+            trap=payload["trap"] ,
+            start_node=payload["start_node"] ,
+            basic_trap=payload["basic_trap"] ,
+        )
+    except (KeyError , TypeError , ValueError) :
+        # a damaged artifact with a valid key: rebuilt like any other miss
+        return None
+
+
+def load_compiled_dfa(cache_path:str=CACHE_PATH) -> CompiledDFA:
+    key = definitions_key()
+    dfa = read_compiled_dfa(key , cache_path)
+    if dfa is not None :
+        return dfa
+    from scanner.init_dfa import init_compiled_dfa
+    dfa = init_compiled_dfa()
+    save_compiled_dfa(dfa , key , cache_path)
+    return dfa
@@ -1,51 +1,262 @@
-from scanner.buffer import BufferedFileReader
+import sys
+
+from scanner.buffer import BufferedFileReader , MappedFileReader
 from scanner.DFA import DFA
-from scanner.tokens import Tokens
+from scanner.compiled_dfa import CompiledDFA
+from scanner.slice_scanner import SliceScanner
+from scanner.tokens import Tokens , TokenRecord , TOKEN_KINDS , TOKEN_TYPES , KIND_OTHER , KIND_WHITE , KIND_ID , KIND_KEYWORD
 from scanner.lexical_errors import LexicalErrors
 from scanner.symbol_table import SymbolTable
 from scanner.alphabet_config import is_keyword
 
 
+def iter_tokens(buffer:BufferedFileReader , dfa:DFA , lexical_errors:LexicalErrors , tokens:Tokens , symbol_table:SymbolTable , add_tokens=True , add_symbols=True):
+    # Streams TokenRecords (whitespace included) and stops after the "$" record.
+    # Each token is scanned only when the consumer asks for it, so symbol table
+    # insertions keep happening in step with the parser.
+    if hasattr(buffer , "replay_tokens") : 
+        # ParallelSource: already lexed in chunks, replayed here in order
+        yield from buffer.replay_tokens(lexical_errors , tokens , symbol_table , add_tokens , add_symbols)
+        return
+    if isinstance(dfa , SliceScanner) and isinstance(buffer , MappedFileReader):
+        yield from iter_span_tokens(buffer , dfa , lexical_errors , tokens , symbol_table , add_tokens , add_symbols)
+        return
+    scan = token_scanner(buffer , dfa)
+    while True : 
+        status , token , start_line = scan(buffer , dfa , lexical_errors)
+        if status=="$" : 
+            yield TokenRecord("$" , "$" , buffer.line , buffer.offset)
+            return
+        record = TokenRecord(status , token , start_line , buffer.offset - len(token))
+        handle_token(record , start_line , tokens , symbol_table , add_tokens , add_symbols)
+        yield record
+
+
 def get_next_token(buffer:BufferedFileReader , dfa:DFA , lexical_errors:LexicalErrors , tokens:Tokens , symbol_table:SymbolTable , add_tokens=True , add_symbols=True):
-    dfa.reset()
-    if not buffer.has_next() : 
+    status , token , start_line = token_scanner(buffer , dfa)(buffer , dfa , lexical_errors)
+    if status=="$" : 
         return ["$" , "$"]
-    token = ""
-    start_line = buffer.check_next_char()[1]
+    handle_token([status , token] , start_line , tokens , symbol_table , add_tokens , add_symbols)
+    return [status , token]
+
+
+def token_scanner(buffer , dfa):
+    # Each scan_* function returns (status, lexeme, start line) of the next
+    # token, or ("$", "$", line) at the end, recording lexical errors itself.
+    if isinstance(dfa , CompiledDFA):
+        return scan_compiled
+    if isinstance(dfa , SliceScanner) and isinstance(buffer , MappedFileReader):
+        return scan_mapped
+    if isinstance(dfa , SliceScanner):
+        return scan_slice
+    return scan_dfa
+
+
+class SpanToken:
+    # Token over a MappedFileReader: only the (start, end) span is kept, the
+    # lexeme is decoded and the line looked up the first time they are asked for.
+    __slots__ = ("kind" , "type" , "start" , "end" , "source" , "_lexeme")
+
+    def __init__(self , type , start , end , source:MappedFileReader , lexeme=None):
+        self.kind = TOKEN_KINDS.get(type , KIND_OTHER)
+        self.type = TOKEN_TYPES[self.kind] if self.kind != KIND_OTHER else sys.intern(type)
+        self.start = start
+        self.end = end
+        self.source = source
+        self._lexeme = lexeme
+
+    @property
+    def lexeme(self):
+        if self._lexeme is None : 
+            self._lexeme = sys.intern(self.source.text(self.start , self.end))
+        return self._lexeme
+
+    @property
+    def line(self):
+        return self.source.line_of(self.start)
+
+    @property
+    def offset(self):
+        return self.start
+
+    def __getitem__(self , index):
+        if index==0 : 
+            return self.type
+        if index==1 : 
+            return self.lexeme
+        return (self.type , self.lexeme , self.line , self.offset)[index]
+
+    def __len__(self):
+        return 4
+
+
+def iter_span_tokens(buffer:MappedFileReader , scanner:SliceScanner , lexical_errors:LexicalErrors , tokens:Tokens , symbol_table:SymbolTable , add_tokens=True , add_symbols=True):
+    # whitespace never gets decoded, and only recorded tokens pay for a line lookup
+    while True : 
+        status , start , end = scan_span(buffer , scanner , lexical_errors)
+        if status=="$" : 
+            yield SpanToken("$" , start , end , buffer , "$")
+            return
+        tok = SpanToken(status , start , end , buffer)
+        if tok.kind!=KIND_WHITE : 
+            if tok.kind==KIND_ID and is_keyword(tok.lexeme) : 
+                tok.kind , tok.type = KIND_KEYWORD , TOKEN_TYPES[KIND_KEYWORD]
+            handle_token(tok , tok.line , tokens , symbol_table , add_tokens , add_symbols)
+        yield tok
+
+
+def scan_dfa(buffer:BufferedFileReader , dfa:DFA , lexical_errors:LexicalErrors):
+    # comments and lexical errors restart the scan in place instead of recursing;
+    # the lexeme is sliced from the buffer once it ends (buffer.lexeme())
     while True : 
-        if not buffer.has_next() :
-            if len(dfa.get_current_node().status) >= 5 and dfa.get_current_node().status[0:5]=="ERROR" : 
-                lexical_errors.add(start_line,[dfa.get_current_node().status , token])
-                return ["$" , "$"]
-            if is_keyword(token) :
-                handle_token(["KEYWORD" , token] , start_line , tokens , symbol_table , add_tokens , add_symbols)
-                return  ["KEYWORD" , token]
-            handle_token([dfa.get_current_node().status,token] , start_line , tokens , symbol_table , add_tokens , add_symbols)
-            return [dfa.get_current_node().status,token] 
-
-        new_char , new_line = buffer.check_next_char()
-        new_state = dfa.get_new_state(new_char)
-        if len(new_state.status) >= 5 and new_state.status[0:5]=="ERROR" and new_state.trap : 
+        dfa.reset()
+        if not buffer.has_next() : 
+            return "$" , "$" , buffer.line
+        buffer.start_lexeme()
+        start_line = buffer.check_next_char()[1]
+        while True : 
+            if not buffer.has_next() :
+                token = buffer.lexeme()
+                if len(dfa.get_current_node().status) >= 5 and dfa.get_current_node().status[0:5]=="ERROR" : 
+                    lexical_errors.add(start_line,[dfa.get_current_node().status , token])
+                    return "$" , "$" , buffer.line
+                if is_keyword(token) :
+                    return "KEYWORD" , token , start_line
+                return dfa.get_current_node().status , token , start_line
+
+            new_char , new_line = buffer.check_next_char()
+            new_state = dfa.get_new_state(new_char)
+            if len(new_state.status) >= 5 and new_state.status[0:5]=="ERROR" and new_state.trap : 
+                dfa.change_state(new_char)
+                buffer.get_next_char()
+                lexical_errors.add(start_line,[new_state.status , buffer.lexeme()])
+                break
+            
+            if new_state.trap and dfa.get_current_node().accept and not (len(dfa.get_current_node().status) >= 7 and dfa.get_current_node().status[0:7]=="COMMENT"):
+                token = buffer.lexeme()
+                if is_keyword(token) : 
+                    return "KEYWORD" , token , start_line
+                else : 
+                    return dfa.get_current_node().status , token , start_line
+            
+            if new_state.trap and dfa.get_current_node().accept and len(dfa.get_current_node().status) >= 7 and dfa.get_current_node().status[0:7]=="COMMENT":
+                break
+            
             dfa.change_state(new_char)
             buffer.get_next_char()
-            token+=new_char
-            lexical_errors.add(start_line,[new_state.status , token])
-            return get_next_token(buffer,dfa,lexical_errors,tokens,symbol_table)
-        
-        if new_state.trap and dfa.get_current_node().accept and not (len(dfa.get_current_node().status) >= 7 and dfa.get_current_node().status[0:7]=="COMMENT"):
-            if is_keyword(token) : 
-                handle_token(["KEYWORD" , token] , start_line , tokens , symbol_table , add_tokens , add_symbols)
-                return  ["KEYWORD" , token]
-            else : 
-                handle_token([dfa.get_current_node().status,token] , start_line , tokens , symbol_table , add_tokens , add_symbols)
-                return [dfa.get_current_node().status,token]
-        
-        if new_state.trap and dfa.get_current_node().accept and len(dfa.get_current_node().status) >= 7 and dfa.get_current_node().status[0:7]=="COMMENT":
-            return get_next_token(buffer,dfa,lexical_errors,tokens,symbol_table)
-        
-        dfa.change_state(new_char)
-        buffer.get_next_char()
-        token+=new_char
+
+
+def scan_compiled(buffer:BufferedFileReader , dfa:CompiledDFA , lexical_errors:LexicalErrors):
+    # same decisions as scan_dfa, but every step is plain integer indexing
+    table , class_map , num_classes = dfa.table , dfa.class_map , dfa.num_classes
+    accept , trap , is_error , is_comment , status = dfa.accept , dfa.trap , dfa.is_error , dfa.is_comment , dfa.status
+    while True : 
+        if not buffer.has_next() : 
+            return "$" , "$" , buffer.line
+        state = dfa.start_node
+        buffer.start_lexeme()
+        start_line = buffer.line
+        while True : 
+            if not buffer.has_next() :
+                token = buffer.lexeme()
+                if is_error[state] : 
+                    lexical_errors.add(start_line,[status[state] , token])
+                    return "$" , "$" , buffer.line
+                if is_keyword(token) :
+                    return "KEYWORD" , token , start_line
+                return status[state] , token , start_line
+
+            new_char = buffer.peek()
+            o = ord(new_char)
+            new_state = table[state * num_classes + class_map[o if o < 256 else 255]]
+            if trap[new_state] : 
+                if is_error[new_state] : 
+                    buffer.get_next_char()
+                    lexical_errors.add(start_line,[status[new_state] , buffer.lexeme()])
+                    break
+                if accept[state] : 
+                    if is_comment[state] : 
+                        break
+                    token = buffer.lexeme()
+                    if is_keyword(token) : 
+                        return "KEYWORD" , token , start_line
+                    return status[state] , token , start_line
+
+            state = new_state
+            buffer.get_next_char()
+
+
+def scan_slice(buffer:BufferedFileReader , scanner:SliceScanner , lexical_errors:LexicalErrors):
+    # works on the whole buffer chunk: lexemes are slices, the buffer only moves once per lexeme
+    match = scanner.match
+    while True : 
+        if not buffer.has_next() : 
+            return "$" , "$" , buffer.line
+        text , pos , start_line = buffer.buffer , buffer.pos , buffer.line
+
+        if text.startswith("/*" , pos) : 
+            end = scanner.find_comment_end(text , pos + 2)
+            if end < 0 : 
+                if buffer.extend() : 
+                    continue
+                buffer.advance_to(len(text))
+                lexical_errors.add(start_line,["ERROR_UNCLOSED_COMMENT" , text[pos:]])
+                return "$" , "$" , buffer.line
+            buffer.advance_to(end)
+            if not buffer.has_next() : 
+                return "COMMENT_CLOSED" , text[pos:end] , start_line
+            continue
+
+        m = match(text , pos)
+        end = m.end()
+        # a lexeme touching the end of the chunk may continue in the next one
+        if end == len(text) and buffer.extend() : 
+            continue
+        status , token = m.lastgroup , text[pos:end]
+        buffer.advance_to(end)
+        if status[0:5]=="ERROR" : 
+            lexical_errors.add(start_line,[status , token])
+            continue
+        if status=="ID" and is_keyword(token) : 
+            status = "KEYWORD"
+        return status , token , start_line
+
+
+def scan_span(buffer:MappedFileReader , scanner:SliceScanner , lexical_errors:LexicalErrors):
+    # scan_slice over the mapped bytes: returns (status, start, end) of the
+    # next lexeme, recording lexical errors and skipping comments on the way
+    data , size , match = buffer.data , buffer.size , scanner.match_bytes
+    while True : 
+        pos = buffer.pos
+        if pos >= size : 
+            return "$" , pos , pos
+        if data[pos]==0x2F and data[pos + 1:pos + 2]==b"*" : 
+            end = scanner.find_comment_end_bytes(data , pos + 2)
+            if end < 0 : 
+                buffer.advance_to(size)
+                lexical_errors.add(buffer.line_of(pos),["ERROR_UNCLOSED_COMMENT" , buffer.text(pos , size)])
+                return "$" , size , size
+            buffer.advance_to(end)
+            if end >= size : 
+                return "COMMENT_CLOSED" , pos , end
+            continue
+        m = match(data , pos)
+        end = m.end()
+        buffer.advance_to(end)
+        if m.lastgroup[0:5]=="ERROR" : 
+            lexical_errors.add(buffer.line_of(pos),[m.lastgroup , buffer.text(pos , end)])
+            continue
+        return m.lastgroup , pos , end
+
+
+def scan_mapped(buffer:MappedFileReader , scanner:SliceScanner , lexical_errors:LexicalErrors):
+    status , start , end = scan_span(buffer , scanner , lexical_errors)
+    if status=="$" : 
+        return "$" , "$" , buffer.line
+    token = buffer.text(start , end)
+    if status=="ID" and is_keyword(token) : 
+        status = "KEYWORD"
+    return status , token , buffer.line_of(start)
 
 
 def handle_token(token, no_line ,tokens:Tokens , symbol_table:SymbolTable ,add_tokens=True , add_symbols=True):
@@ -53,7 +264,7 @@ def handle_token(token, no_line ,tokens:Tokens , symbol_table:SymbolTable ,add_t
     txt = token[1]
     if add_symbols:
         if stat=="KEYWORD" or stat=="ID":
-            symbol_table.add([stat , txt])
+            symbol_table.add(token)
     if add_tokens:
         if stat!="WHITE":
             tokens.add(no_line , token)
\ No newline at end of file
@@ -1,12 +1,16 @@
 from scanner import DFA
+from scanner.compiled_dfa import CompiledDFA
+from scanner.minimize_dfa import minimize_dfa
 from scanner.alphabet_config import *
 
 def get_except(L1,L2):
+    L2 = set(L2)
     return [i for i in L1 if i not in L2]
 
 
 
-def init_dfa():
+def build_dfa():
+    # one state per construct as written below; init_dfa() is the minimized automaton
     dfa = DFA.DFA()
 
     #NUM
@@ -80,4 +84,12 @@ def init_dfa():
         dfa.add_edge(dfa.start_node,error_invalid_input,illegal)
 
 
-    return dfa
\ No newline at end of file
+    return dfa
+
+
+def init_dfa():
+    return minimize_dfa(build_dfa())
+
+
+def init_compiled_dfa():
+    return CompiledDFA.from_dfa(init_dfa())
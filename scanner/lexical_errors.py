@@ -1,3 +1,5 @@
+from scanner.artifact_writer import ArtifactWriter
+
 error_massages = {
     "ERROR_INVALID_NUMBER" : "Invalid number" , 
     "ERROR_INVALID_INPUT" : "Invalid input" , 
@@ -8,37 +10,28 @@ error_massages = {
 class LexicalErrors:
     def __init__(self,file_path="lexical_errors.txt"):
         self.file_path = file_path
-        self.errors ={}
+        self.writer = ArtifactWriter(file_path)
+        self.cur_line = None
         self.error_occured = False
-        try:
-            with open(file_path, 'a'):
-                pass 
-        except:
-            print(f"an error occurred while creating the file{self.file_path}")
     def add(self,no_line,error):
         self.error_occured = True
-        #TODO
-        try:
-            self.errors[no_line].append(error)
-        except:
-            self.errors[no_line] = []
-            self.errors[no_line].append(error)
+        # errors arrive in line order; one output line per source line
+        if no_line != self.cur_line : 
+            if self.cur_line is not None : 
+                self.writer.write("\n")
+            self.writer.write(f"{no_line}.\t")
+            self.cur_line = no_line
+        txt = error[1]
+        if error[0]=="ERROR_UNCLOSED_COMMENT":
+            if len(txt) > 7 : txt = txt[0:7] +"..."
+        self.writer.write(f" ({txt}, {error_massages[error[0]]})")
 
     def update_file(self):
-        try:
-            with open(self.file_path, 'w') as f:
-                if not self.error_occured : 
-                    f.write("There is no lexical error.\n")
-                for line in self.errors.keys():
-                    f.write(f"{line}.\t")
-                    for error in self.errors[line]:
-                        txt = error[1]
-                        if error[0]=="ERROR_UNCLOSED_COMMENT":
-                            if len(txt) > 7 : txt = txt[0:7] +"..."
-                        f.write(f" ({txt}, {error_massages[error[0]]})")
-                    f.write("\n")
-        except:
-            print(f"an error occurred while updating the file{self.file_path}")
+        if not self.error_occured : 
+            self.writer.write("There is no lexical error.\n")
+        else : 
+            self.writer.write("\n")
+        self.writer.commit()
 
     #TODO : next phase
     def read_file(self,file_path):
@@ -0,0 +1,80 @@
+from scanner.DFA import DFA
+
+
+def char_classes(dfa:DFA) -> dict[tuple , list[str]]:
+    # characters every state treats the same way; minimization only needs one of each
+    columns = {}
+    states = range(dfa.num_nodes)
+    for c in dfa.alphabet :
+        columns.setdefault(tuple(dfa.transition[s][c] for s in states) , []).append(c)
+    return columns
+
+
+def equivalent_states(dfa:DFA) -> list[list[int]]:
+    # Hopcroft partition refinement. States start out split by (accept, trap, status),
+    # so every label the scanner and the error reporting look at survives the merge.
+    states = range(dfa.num_nodes)
+    letters = [chars[0] for chars in char_classes(dfa).values()]
+
+    # inverse[c][t] = states moving to t on c
+    inverse = {c : {} for c in letters}
+    for s in states :
+        for c in letters :
+            inverse[c].setdefault(dfa.transition[s][c] , []).append(s)
+
+    blocks = {}
+    for s in states :
+        node = dfa.states[s]
+        blocks.setdefault((node.accept , node.trap , node.status) , set()).add(s)
+    partition = list(blocks.values())
+    block_of = {s : i for i , block in enumerate(partition) for s in block}
+
+    work = [(i , c) for i in range(len(partition)) for c in letters]
+    while work :
+        target , c = work.pop()
+        predecessors = set()
+        for t in partition[target] :
+            predecessors.update(inverse[c].get(t , ()))
+        touched = {}
+        for s in predecessors :
+            touched.setdefault(block_of[s] , set()).add(s)
+        for i , inside in touched.items() :
+            block = partition[i]
+            if len(inside) == len(block) :
+                continue
+            outside = block - inside
+            # keep the bigger half in place, the smaller one becomes a new block
+            small , big = (inside , outside) if len(inside) <= len(outside) else (outside , inside)
+            partition[i] = big
+            partition.append(small)
+            new = len(partition) - 1
+            for s in small :
+                block_of[s] = new
+            # Hopcroft's rule: the smaller half is enough, whether or not block i is still pending
+            work.extend((new , a) for a in letters)
+    return sorted(sorted(block) for block in partition)
+
+
+def minimize_dfa(dfa:DFA) -> DFA:
+    # start node and basic trap keep ids 0 and 1, the other blocks follow in order of their first state
+    blocks = equivalent_states(dfa)
+    order = sorted(blocks , key=lambda block : (block[0] != dfa.start_node , block[0] != dfa.basic_trap , block[0]))
+    result = DFA()
+    new_id = {}
+    for block in order :
+        s = block[0]
+        if s == dfa.start_node :
+            i = result.start_node
+        elif s == dfa.basic_trap :
+            i = result.basic_trap
+        else :
+            node = dfa.states[s]
+            i = result.add_state(node.accept , node.trap , node.status)
+        for t in block :
+            new_id[t] = i
+    for block in order :
+        s = block[0]
+        row = result.transition[new_id[s]]
+        for c , dest in dfa.transition[s].items() :
+            row[c] = new_id[dest]
+    return result
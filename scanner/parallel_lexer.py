@@ -0,0 +1,260 @@
+import multiprocessing
+import queue
+import re
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from scanner.alphabet_config import White_spaces
+from scanner.buffer import StringReader
+from scanner.get_next_token import iter_tokens , handle_token
+from scanner.slice_scanner import SliceScanner , SLICE_BUFFER_SIZE
+from scanner.tokens import TokenRecord
+
+# chunks smaller than this are not worth a trip through the pool
+MIN_CHUNK_SIZE = 1 << 18
+# pipelined scanning: tokens per batch, and batches lexed ahead of the parser
+PIPELINE_BATCH = 2048
+PIPELINE_DEPTH = 8
+# seconds the consumer waits for a batch before it checks that the producer is alive
+PIPELINE_POLL = 0.5
+
+_COMMENT_MARK = re.compile(r"/\*|\*/")
+_WHITE = frozenset(White_spaces)
+
+
+def split_points(text:str , parts:int , min_chunk:int=MIN_CHUNK_SIZE) -> list[int]:
+    # Start offsets of chunks that can be lexed independently. A chunk starts
+    # right after a newline that is outside every comment, and not on whitespace
+    # (so a merged WHITE run of the slice scanner never straddles two chunks).
+    # An unclosed comment runs to EOF and so always ends up in the last chunk.
+    size = len(text)
+    step = max(min_chunk , size // max(parts , 1) + 1)
+    points = [0]
+    pos = 0  # everything before pos is classified and pos is outside comments
+    target = step
+    while target < size :
+        cand = target
+        while True :
+            nl = text.find("\n" , cand)
+            if nl < 0 :
+                return points
+            p = nl + 1
+            m = _COMMENT_MARK.search(text , pos , p)
+            while m is not None and m.group()=="*/" :
+                # "*/" outside a comment is an unmatched comment error, not an end
+                m = _COMMENT_MARK.search(text , m.end() , p)
+            if m is None :
+                pos = p
+                if p < size and text[p] not in _WHITE :
+                    break
+                cand = p
+                continue
+            end = SliceScanner.find_comment_end(text , m.end())
+            if end < 0 :
+                return points
+            pos = end
+            cand = end
+        points.append(p)
+        target = p + step
+    return points
+
+
+class ErrorList(list):
+    # stands in for LexicalErrors inside a worker. Each error remembers how many
+    # tokens came before it, so the replay can report it exactly when a serial
+    # scan would have: right before the token that follows it.
+    def __init__(self , tokens:list):
+        super().__init__()
+        self.tokens = tokens
+
+    def add(self , no_line , error):
+        self.append((len(self.tokens) , no_line , error))
+
+
+_automata = {}
+
+
+def lex_chunk(job):
+    # worker side: every token (whitespace included) and lexical error of one chunk
+    from scanner.scanner import load_automaton
+    text , line , base , scanner_mode = job
+    if scanner_mode not in _automata :
+        _automata[scanner_mode] = load_automaton(scanner_mode)
+    dfa = _automata[scanner_mode]
+    buffer = StringReader(text , line=line , base=base , buffer_size=SLICE_BUFFER_SIZE if scanner_mode=="slice" else 1024)
+    tokens = []
+    errors = ErrorList(tokens)
+    for tok in iter_tokens(buffer , dfa , errors , None , None , add_tokens=False , add_symbols=False) :
+        if tok.type=="$" : 
+            break
+        tokens.append((tok.type , tok.lexeme , tok.line , tok.offset))
+    return tokens , list(errors)
+
+
+def lex_batches(text , scanner_mode , put , batch_size=PIPELINE_BATCH):
+    # producer side of a PipelinedSource: the whole source lexed serially, handed
+    # over as (tokens , errors) batches in the layout of lex_chunk. put returns
+    # False when the consumer is gone. An exception is handed over instead.
+    try :
+        from scanner.scanner import load_automaton
+        dfa = load_automaton(scanner_mode)
+        buffer = StringReader(text , buffer_size=SLICE_BUFFER_SIZE if scanner_mode=="slice" else 1024)
+        tokens = []
+        errors = ErrorList(tokens)
+        for tok in iter_tokens(buffer , dfa , errors , None , None , add_tokens=False , add_symbols=False) :
+            if tok.type=="$" : 
+                break
+            tokens.append((tok.type , tok.lexeme , tok.line , tok.offset))
+            if len(tokens) >= batch_size : 
+                if not put((tokens , list(errors))) : 
+                    return
+                # the scan keeps reporting to the same ErrorList
+                tokens = errors.tokens = []
+                errors.clear()
+        if put((tokens , list(errors))) : 
+            put(None)
+    except Exception as error :
+        put(error)
+
+
+def lex_into_queue(text , scanner_mode , out , batch_size=PIPELINE_BATCH):
+    # process entry point: the consumer terminates the process if it stops early
+    lex_batches(text , scanner_mode , lambda item : out.put(item) or True , batch_size)
+
+
+class ParallelSource:
+    # Source lexed chunk by chunk in a process pool. It stands in for the buffer:
+    # iter_tokens hands over to replay_tokens, and line / offset follow
+    # the replayed tokens exactly as a serial buffer would.
+    def __init__(self , file_path="input.txt" , scanner_mode="compiled" , workers=2 , min_chunk=MIN_CHUNK_SIZE):
+        self.file_path = file_path
+        self.scanner_mode = scanner_mode
+        self.workers = workers
+        with open(file_path , 'r' , encoding='utf-8') as f :
+            self.source = f.read()
+        self.points = split_points(self.source , workers , min_chunk)
+        self.line = 1
+        self.offset = 0
+        self.pool = None
+
+    def jobs(self):
+        text = self.source
+        ends = self.points[1:] + [len(text)]
+        line = 1
+        for start , end in zip(self.points , ends) :
+            yield text[start:end] , line , start , self.scanner_mode
+            line += text.count("\n" , start , end)
+
+    def chunk_results(self):
+        if len(self.points) == 1 :
+            yield from map(lex_chunk , self.jobs())
+            return
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        # at most two chunks per worker are lexed ahead of the consumer
+        pending = deque()
+        for job in self.jobs() :
+            pending.append(self.pool.submit(lex_chunk , job))
+            if len(pending) >= 2 * self.workers :
+                yield pending.popleft().result()
+        while pending :
+            yield pending.popleft().result()
+        self.close()
+
+    def replay_tokens(self , lexical_errors , tokens , symbol_table , add_tokens=True , add_symbols=True):
+        # symbol table insertions still happen one token at a time, as the consumer asks
+        for chunk_tokens , errors in self.chunk_results() :
+            errors.reverse()
+            for i , (type , lexeme , line , offset) in enumerate(chunk_tokens) :
+                while errors and errors[-1][0]==i : 
+                    lexical_errors.add(*errors.pop()[1:])
+                record = TokenRecord(type , lexeme , line , offset)
+                self.line = line + lexeme.count("\n")
+                self.offset = offset + len(lexeme)
+                handle_token(record , line , tokens , symbol_table , add_tokens , add_symbols)
+                yield record
+            # errors after the last token of a chunk come before the next chunk's first one
+            while errors : 
+                lexical_errors.add(*errors.pop()[1:])
+        self.line = 1 + self.source.count("\n")
+        self.offset = len(self.source)
+        yield TokenRecord("$" , "$" , self.line , self.offset)
+
+    def close(self):
+        if self.pool is not None :
+            self.pool.shutdown(wait=True , cancel_futures=True)
+            self.pool = None
+
+
+class PipelinedSource(ParallelSource):
+    # Source lexed serially by a producer running beside the parser: a thread
+    # (pipeline="thread") or a process (pipeline="process") fills a bounded queue
+    # with token batches while the parser consumes them. The batches are replayed
+    # by ParallelSource.replay_tokens, so symbol table insertions, tokens.txt and
+    # lexical errors still happen in token order, on the parser's side.
+    def __init__(self , file_path="input.txt" , scanner_mode="compiled" , pipeline="thread" , batch_size=PIPELINE_BATCH , depth=PIPELINE_DEPTH):
+        if pipeline not in ("thread" , "process") : 
+            raise ValueError(f"unknown pipeline {pipeline!r}")
+        super().__init__(file_path=file_path , scanner_mode=scanner_mode , workers=1)
+        self.pipeline = pipeline
+        self.batch_size = batch_size
+        self.depth = depth
+        self.worker = None
+        self.stopped = threading.Event()
+
+    def put(self , item) -> bool:
+        # thread producer: blocks while the queue is full, gives up once closed
+        while not self.stopped.is_set() : 
+            try : 
+                self.batches.put(item , timeout=0.1)
+                return True
+            except queue.Full : 
+                pass
+        return False
+
+    def chunk_results(self):
+        if self.pipeline == "thread" : 
+            self.batches = queue.Queue(maxsize=self.depth)
+            self.worker = threading.Thread(target=lex_batches , args=(self.source , self.scanner_mode , self.put , self.batch_size) , daemon=True)
+        else : 
+            self.batches = multiprocessing.Queue(maxsize=self.depth)
+            self.worker = multiprocessing.Process(target=lex_into_queue , args=(self.source , self.scanner_mode , self.batches , self.batch_size) , daemon=True)
+        self.worker.start()
+        while True : 
+            item = self.next_batch()
+            if item is None : 
+                break
+            if isinstance(item , Exception) : 
+                self.close()
+                raise item
+            yield item
+        self.close()
+
+    def next_batch(self):
+        # a producer that dies without handing over None or an exception (killed,
+        # os._exit, a crash in the interpreter) would leave get() waiting forever
+        while True : 
+            try : 
+                return self.batches.get(timeout=PIPELINE_POLL)
+            except queue.Empty : 
+                pass
+            if not self.worker.is_alive() : 
+                # what it put just before it stopped may still be on its way
+                try : 
+                    return self.batches.get(timeout=PIPELINE_POLL)
+                except queue.Empty : 
+                    pass
+                exitcode = getattr(self.worker , "exitcode" , None)
+                self.close()
+                if exitcode is None : 
+                    raise RuntimeError("the lexer thread stopped without finishing the source")
+                raise RuntimeError(f"the lexer process stopped without finishing the source (exit code {exitcode})")
+
+    def close(self):
+        if self.worker is None : 
+            return
+        self.stopped.set()
+        if self.pipeline == "process" and self.worker.is_alive() : 
+            self.worker.terminate()
+        self.worker.join()
+        self.worker = None
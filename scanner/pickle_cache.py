@@ -0,0 +1,57 @@
+import hashlib
+import os
+import pickle
+
+
+# Versioned pickle files for the caches of the compiler (scanner automaton,
+# grammar, incremental declarations). A payload is reused only when it was
+# written with the same format version and key (a digest of what it was built
+# from); anything else is a miss, and the caller builds the value again. The
+# pickle is stored after its SHA-256 digest, so a file damaged on disk is a
+# miss too rather than a payload that loads with wrong values in it.
+DIGEST_SIZE = hashlib.sha256().digest_size
+
+
+def read_cache(path:str , version:int , key:str) -> dict:
+    # the stored payload, or None on a miss
+    try :
+        with open(path , "rb") as f :
+            data = f.read()
+        digest , body = data[:DIGEST_SIZE] , data[DIGEST_SIZE:]
+        if hashlib.sha256(body).digest() != digest :
+            return None
+        payload = pickle.loads(body)
+    except Exception :
+        # missing, or pickled against classes that have changed since: a pickle
+        # that does not load can fail with almost any exception
+        return None
+    if not isinstance(payload , dict) or payload.get("version") != version or payload.get("key") != key :
+        return None
+    return payload
+
+
+def save_cache(path:str , version:int , key:str , payload:dict):
+    payload = {**payload , "version" : version , "key" : key}
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try :
+        directory = os.path.dirname(path)
+        if directory :
+            os.makedirs(directory , exist_ok=True)
+        body = pickle.dumps(payload , protocol=pickle.HIGHEST_PROTOCOL)
+        with open(tmp_path , "wb") as f :
+            f.write(hashlib.sha256(body).digest())
+            f.write(body)
+        os.replace(tmp_path , path)
+    except OSError :
+        # read-only checkout: keep working with the value in memory
+        try :
+            os.remove(tmp_path)
+        except OSError :
+            pass
+
+
+def drop_cache(path:str):
+    try :
+        os.remove(path)
+    except OSError :
+        pass
@@ -1,22 +1,51 @@
 from scanner.init_dfa import init_dfa
+from scanner.dfa_cache import load_compiled_dfa
+from scanner.slice_scanner import SliceScanner , SLICE_BUFFER_SIZE
 from scanner.symbol_table import SymbolTable
 from scanner.tokens import Tokens
 from scanner.lexical_errors import LexicalErrors
-from scanner.buffer import BufferedFileReader
-from scanner.get_next_token import get_next_token
+from scanner.buffer import BufferedFileReader , MappedFileReader
+from scanner.get_next_token import iter_tokens
 
-def scanner(code_file_path , lexical_error_file_path="lexical_errors.txt" , tokens_file_path="tokens.txt" , symbol_table_file_path="symbol_table.txt"):
+def load_automaton(scanner_mode="compiled"):
+    if scanner_mode=="compiled" : 
+        return load_compiled_dfa()
+    if scanner_mode=="dfa" : 
+        return init_dfa()
+    if scanner_mode=="slice" : 
+        return SliceScanner()
+    raise ValueError(f"unknown scanner mode {scanner_mode!r}")
+
+
+def open_source(code_file_path , scanner_mode="compiled" , source_reader="buffered" , workers=1 , pipeline=None):
+    if workers > 1 and pipeline is not None : 
+        # one lexes chunks on a pool, the other the whole source on one producer
+        raise ValueError("workers > 1 and pipeline are exclusive: pass one of them")
+    if workers > 1 or pipeline is not None : 
+        # multiprocessing and concurrent.futures are most of the import time: only load them when used
+        from scanner.parallel_lexer import ParallelSource , PipelinedSource
+    if workers > 1 : 
+        return ParallelSource(file_path=code_file_path , scanner_mode=scanner_mode , workers=workers)
+    if pipeline is not None : 
+        return PipelinedSource(file_path=code_file_path , scanner_mode=scanner_mode , pipeline=pipeline)
+    if source_reader=="mmap" : 
+        return MappedFileReader(file_path=code_file_path)
+    if source_reader=="buffered" : 
+        return BufferedFileReader(file_path=code_file_path , buffer_size=SLICE_BUFFER_SIZE if scanner_mode=="slice" else 1024)
+    raise ValueError(f"unknown source reader {source_reader!r}")
+
+
+def scanner(code_file_path , lexical_error_file_path="lexical_errors.txt" , tokens_file_path="tokens.txt" , symbol_table_file_path="symbol_table.txt" , scanner_mode="compiled" , source_reader="buffered" , workers=1 , pipeline=None):
     lexical_errors = LexicalErrors(file_path=lexical_error_file_path)
-    buffer = BufferedFileReader(file_path=code_file_path)
+    buffer = open_source(code_file_path , scanner_mode , source_reader , workers , pipeline)
     tokens = Tokens(tokens_file_path)
     symbol_table = SymbolTable(file_path=symbol_table_file_path)
-    dfa = init_dfa()
+    dfa = load_automaton(scanner_mode)
 
-    while True : 
-        new_token = get_next_token(buffer=buffer , dfa=dfa , lexical_errors=lexical_errors , 
-                                   tokens=tokens , symbol_table=symbol_table)
-        if new_token[0]=="$" : 
-            break
+    for new_token in iter_tokens(buffer=buffer , dfa=dfa , lexical_errors=lexical_errors , 
+                                 tokens=tokens , symbol_table=symbol_table):
+        pass
     lexical_errors.update_file()
     tokens.update_file()
-    symbol_table.update_file()
\ No newline at end of file
+    symbol_table.update_file()
+    buffer.close()
\ No newline at end of file
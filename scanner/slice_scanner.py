@@ -0,0 +1,59 @@
+import re
+
+from scanner.alphabet_config import Symbols , White_spaces , Digits , English_aphabet
+
+# the slice engine is happiest with large chunks; lexemes are cut straight out of them
+SLICE_BUFFER_SIZE = 1 << 16
+
+
+def _char_class(chars , negate=False) -> str:
+    return "[" + ("^" if negate else "") + "".join(re.escape(c) for c in dict.fromkeys(chars)) + "]"
+
+
+class SliceScanner:
+    # Master regex with the same maximal-munch decisions as init_dfa().
+    # Comments are not part of it, scan_slice scans them by index.
+    # A run of whitespace comes back as a single WHITE token.
+    def __init__(self):
+        letter = _char_class(English_aphabet)
+        digit = _char_class(Digits)
+        illegal = _char_class(Symbols + White_spaces + Digits + English_aphabet , negate=True)
+        symbol = _char_class(Symbols)
+        white = _char_class(White_spaces)
+        self.pattern = re.compile("|".join([
+            f"(?P<ERROR_INVALID_NUMBER>{digit}+{letter})" ,
+            f"(?P<ERROR_INVALID_INPUT>(?:{digit}+|{letter}(?:{letter}|{digit})*|[=*/])?{illegal})" ,
+            r"(?P<ERROR_UNMATCHED_COMMENT>\*/)" ,
+            f"(?P<NUM>{digit}+)" ,
+            f"(?P<ID>{letter}(?:{letter}|{digit})*)" ,
+            f"(?P<SYMBOL>==|{symbol})" ,
+            f"(?P<WHITE>{white}+)" ,
+        ]))
+        self.match = self.pattern.match
+        # the same decisions over raw UTF-8 bytes (used with MappedFileReader);
+        # every non-ASCII character is illegal, so a multi-byte sequence is one illegal character
+        self.bytes_pattern = re.compile(self.pattern.pattern.replace(illegal , f"(?:[\xc0-\xff][\x80-\xbf]*|{illegal})").encode("latin-1"))
+        self.match_bytes = self.bytes_pattern.match
+
+    @staticmethod
+    def find_comment_end(text:str , pos:int) -> int:
+        # pos points just after "/*". Mirrors the comment states of init_dfa:
+        # a '*' swallows the next character unless that character is '/'.
+        # Returns the index after "*/", or -1 when text ends first.
+        while True :
+            star = text.find("*" , pos)
+            if star < 0 or star + 1 >= len(text) :
+                return -1
+            if text[star + 1] == "/" :
+                return star + 2
+            pos = star + 2
+
+    @staticmethod
+    def find_comment_end_bytes(data , pos:int) -> int:
+        while True :
+            star = data.find(b"*" , pos)
+            if star < 0 or star + 1 >= len(data) :
+                return -1
+            if data[star + 1] == 0x2F :
+                return star + 2
+            pos = star + 2
@@ -1,54 +1,117 @@
-from scanner.alphabet_config import Keywords
+from scanner.alphabet_config import KEYWORDS
 
 class Token:
+    __slots__ = ("type" , "lexeme")
+
     def __init__(self , type , lexeme):
         self.type = type
         self.lexeme = lexeme
 
 class Record:
-    def __init__(self , token: Token =None , address=None , token_type=None , scope : 'Scope' = None , is_function=None ,  num_args=None , args_type:list[str]=None):
+    __slots__ = ("token" , "token_type" , "scope" , "num_args" , "args_type" , "index" , "_address" , "_is_function")
+
+    def __init__(self , token: Token =None , address=None , token_type=None , scope : 'Scope' = None , is_function=None ,  num_args=None , args_type:list[str]=None , index=0):
         self.token = token
-        self.address = address
         self.token_type = token_type
         self.scope = scope
-        self.is_function = is_function
         self.num_args = num_args
         self.args_type = args_type
+        # position in scope.records, so the indexes can keep "first record wins"
+        self.index = index
+        self._address = address
+        self._is_function = is_function
+
+    # address and is_function are assigned by CodeGen after the record exists;
+    # the owning scope re-indexes the record whenever they change
+
+    @property
+    def address(self):
+        return self._address
+
+    @address.setter
+    def address(self , address):
+        old = self._address
+        self._address = address
+        if self.scope is not None : 
+            self.scope.address_changed(self , old)
+
+    @property
+    def is_function(self):
+        return self._is_function
+
+    @is_function.setter
+    def is_function(self , is_function):
+        self._is_function = is_function
+        if self.scope is not None : 
+            self.scope.function_changed(self)
 
 class Scope:
+    __slots__ = ("records" , "parent" , "layer" , "by_lexeme" , "by_address" , "last_function")
+
     def __init__(self , parent=None , layer=0):
         self.records : list[Record] = []
         self.parent : Scope = parent
         self.layer = layer
+        # lexeme -> record and address -> first record (in records order) with that address
+        self.by_lexeme : dict[str , Record] = {}
+        self.by_address : dict[object , Record] = {}
+        self.last_function : Record = None
 
     def add(self , token : Token) -> bool:
         if self.get_record_local(token_lexeme=token.lexeme) is None:
-            record = Record(token=token , scope=self)
+            record = Record(token=token , scope=self , index=len(self.records))
             self.records.append(record)
+            self.by_lexeme[token.lexeme] = record
+            self.by_address.setdefault(None , record)
             return True
         return False
+
+    def address_changed(self , record : Record , old):
+        if self.by_address.get(old) is record : 
+            del self.by_address[old]
+            for r in self.records[record.index + 1:] : 
+                if r.address == old : 
+                    self.by_address[old] = r
+                    break
+        current = self.by_address.get(record.address)
+        if current is None or current.index > record.index : 
+            self.by_address[record.address] = record
+
+    def function_changed(self , record : Record):
+        if record.is_function : 
+            if self.last_function is None or self.last_function.index < record.index : 
+                self.last_function = record
+        elif self.last_function is record : 
+            self.last_function = None
+            for r in reversed(self.records[:record.index]) : 
+                if r.is_function : 
+                    self.last_function = r
+                    break
     
     def get_record_local(self , token_lexeme) -> Record:
-        for record in self.records : 
-            if record.token.lexeme == token_lexeme:
-                return record
+        record = self.by_lexeme.get(token_lexeme)
+        if record is not None : 
+            return record
         if self.parent is not None and self.parent.layer!=0 : 
             return self.parent.get_record(token_lexeme=token_lexeme)
         return None
         
     def get_record(self , token_lexeme) -> Record:
-        for record in self.records : 
-            if record.token.lexeme == token_lexeme:
+        scope = self
+        while scope is not None : 
+            record = scope.by_lexeme.get(token_lexeme)
+            if record is not None : 
                 return record
-        if self.parent is not None : 
-            return self.parent.get_record(token_lexeme=token_lexeme)
+            scope = scope.parent
         return None
+
     def get_record_by_address(self , address) -> Record: 
-        for record in self.records : 
-            if record.address == address : 
+        scope = self
+        while scope is not None : 
+            record = scope.by_address.get(address)
+            if record is not None : 
                 return record
-        if self.parent is not None : 
-            return self.parent.get_record_by_address(address=address)
+            scope = scope.parent
         return None
 
 
@@ -56,7 +119,7 @@ class SymbolTable:
     def __init__(self, file_path="symbol_table.txt"):
         self.file_path = file_path
         self.scopes : list[Scope] = [Scope()]
-        self.keywords = Keywords
+        self.keywords = KEYWORDS
 
     def get_current_scope(self): 
         return self.scopes[-1]
@@ -82,10 +145,7 @@ class SymbolTable:
         return self.get_current_scope().get_record_by_address(address=address)
     
     def get_last_function_record(self) -> Record : 
-        for r in reversed(self.scopes[0].records): 
-            if r.is_function :
-                return r
-        return None
+        return self.scopes[0].last_function
     
     def update_file(self):
         #TODO
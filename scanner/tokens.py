@@ -1,31 +1,61 @@
+import sys
+
+from scanner.artifact_writer import ArtifactWriter
+
+# integer token kinds; TOKEN_TYPES[kind] is the interned type string of each kind
+KIND_ID , KIND_KEYWORD , KIND_NUM , KIND_SYMBOL , KIND_WHITE , KIND_EOF , KIND_OTHER = range(7)
+TOKEN_TYPES = [sys.intern(t) for t in ("ID" , "KEYWORD" , "NUM" , "SYMBOL" , "WHITE" , "$")]
+TOKEN_KINDS = {t : kind for kind , t in enumerate(TOKEN_TYPES)}
+
+
+class TokenRecord:
+    # One scanned token. line is the line the lexeme starts on and offset its
+    # position in the source. Indexing as tok[0] / tok[1] gives type / lexeme.
+    __slots__ = ("kind" , "type" , "lexeme" , "line" , "offset")
+
+    def __init__(self , type , lexeme , line , offset):
+        kind = TOKEN_KINDS.get(type , KIND_OTHER)
+        self.kind = kind
+        self.type = TOKEN_TYPES[kind] if kind != KIND_OTHER else sys.intern(type)
+        self.lexeme = sys.intern(lexeme) if kind != KIND_WHITE else lexeme
+        self.line = line
+        self.offset = offset
+
+    def __getitem__(self , index):
+        if index==0 : 
+            return self.type
+        if index==1 : 
+            return self.lexeme
+        return (self.type , self.lexeme , self.line , self.offset)[index]
+
+    def __len__(self):
+        return 4
+
+    def __repr__(self):
+        return f"TokenRecord({self.type!r}, {self.lexeme!r}, {self.line}, {self.offset})"
+
+
 class Tokens:
+    # tokens arrive in line order, so each line is written out as soon as the next one starts
     def __init__(self,file_path="tokens.txt"):
         self.file_path = file_path
-        self.tokens ={}
-        try:
-            with open(file_path, 'a'):
-                pass 
-        except:
-            print(f"an error occurred while creating the file{self.file_path}")
+        self.writer = ArtifactWriter(file_path)
+        self.cur_line = None
+        self.count = 0
     
     def add(self,no_line , token):
-        try : 
-            self.tokens[no_line].append(token)
-        except:
-            self.tokens[no_line] = []
-            self.tokens[no_line].append(token)
+        if no_line != self.cur_line : 
+            if self.cur_line is not None : 
+                self.writer.write("\n")
+            self.writer.write(f"{no_line}.\t")
+            self.cur_line = no_line
+        self.writer.write(f" ({token[0]}, {token[1]})")
+        self.count += 1
     
     def update_file(self):
-        try:
-            with open(self.file_path, 'w') as f:
-                for line in self.tokens.keys():
-                    f.write(f"{line}.\t")
-                    for token in self.tokens[line]:
-                        f.write(f" ({token[0]}, {token[1]})")
-                    f.write("\n")
-                
-        except:
-            print(f"an error occurred while updating the file{self.file_path}")
+        if self.cur_line is not None : 
+            self.writer.write("\n")
+        self.writer.commit()
 
     #TODO : next phase
     def read_file(self,file_path):